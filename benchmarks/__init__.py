@@ -0,0 +1,7 @@
+"""
+benchmarks
+
+Offline benchmark suite: a local stand-in for ceresne.sk (standin_server), microbenchmarks of the
+detail page path (micro) and end-to-end runs of pagination and the full scraper (e2e), compared
+against stored baselines by run.
+"""
@@ -0,0 +1,77 @@
+"""
+benchmarks/common.py
+
+Helpers shared by the benchmark scenarios. Each scenario runs in its own process (see run.py), so
+the scraper's environment-variable configuration can be set before it is imported and peak RSS
+is measured per scenario.
+"""
+
+import json
+import os
+import resource
+import sys
+
+# Everything that would touch /app or persist state between scenarios is switched off
+SCRAPER_ENV = {
+    "STATE_DB_PATH": "",
+    "HTTP_CACHE_DIR": "",
+    "SNAPSHOT_DIR": "",
+    "CHANGE_LOG_FILE": "",
+    "RUN_REPORT_FILE": "",
+    "METRICS_TEXTFILE": "",
+    "FAILED_URLS_FILE": "",
+    "REQUESTS_PER_SECOND": "0",
+    "PIPELINE_REPORT_SECONDS": "0",
+    "LOG_LEVEL": "WARNING",
+}
+
+
+def import_scraper(server, output_filename, **env):
+    """
+    Imports scraper.py configured for the stand-in server.
+
+    Parameters:
+    server (StandInServer): The running stand-in.
+    output_filename (str): Where run_scraper writes its CSV.
+    **env: Extra environment overrides (applied before the import).
+
+    Returns:
+    module: The scraper module.
+    """
+    os.environ.update(SCRAPER_ENV)
+    os.environ.update({key: str(value) for key, value in env.items()})
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    import scraper
+
+    scraper.BASE = server.base_url
+    scraper.LIST_URL = server.list_url
+    scraper.OUTPUT_FILENAME = output_filename
+    return scraper
+
+
+def peak_rss_mb():
+    """
+    Returns the peak resident set size of this process in MB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def counter_total(registry, name):
+    """
+    Sums a counter over all its label combinations.
+    """
+    return sum(
+        entry["value"]
+        for entry in registry.snapshot()["counters"]
+        if entry["name"] == name
+    )
+
+
+def emit(result):
+    """
+    Prints a scenario result as the last line of output (read by run.py).
+    """
+    print(json.dumps(result), flush=True)
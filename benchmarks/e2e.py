@@ -0,0 +1,148 @@
+"""
+benchmarks/e2e.py
+
+End-to-end benchmarks against the stand-in server:
+- pagination: get_all_listing_links_with_pagination in headless Chrome over the script-paginated
+  listing (skipped when Chrome can't be started);
+- run_scraper: a full run (plain HTTP discovery, detail fetching and CSV writing), with the
+  output checked against the expected rows;
+- incremental: two runs with the listing state store, with one flat's price edited in between.
+  The second run must fetch only the listing page and that flat's detail page.
+
+Each records wall time, pages/s, peak RSS and WebDriver call counts.
+
+Usage:
+    python -m benchmarks.e2e run_scraper --flats 1000
+"""
+
+import argparse
+import csv
+import math
+import tempfile
+import time
+
+from benchmarks.common import counter_total, emit, import_scraper, peak_rss_mb
+from benchmarks.standin_server import StandInServer, expected_row
+
+
+def bench_pagination(flats, page_size=10):
+    """
+    Walks the paginated listing with Selenium.
+    """
+    result = {"scenario": "pagination", "flats": flats}
+    with StandInServer(
+        flats=flats, listing="paginated", page_size=page_size
+    ) as server, tempfile.TemporaryDirectory() as tmp:
+        scraper = import_scraper(server, f"{tmp}/out.csv")
+        from utils.metrics import metrics
+
+        try:
+            from webdriver import get_chrome_driver, quit_driver
+
+            driver = get_chrome_driver(headless=True)
+        except Exception as e:
+            return {**result, "skipped": f"Chrome could not be started: {e}"}
+
+        try:
+            metrics.reset()
+            started = time.perf_counter()
+            links = scraper.get_all_listing_links_with_pagination(driver)
+            elapsed = time.perf_counter() - started
+        finally:
+            quit_driver(driver)
+
+        pages = math.ceil(flats / page_size)
+        expected = [
+            f"{server.base_url}/ponuka-bytov/byt/{n}/" for n in range(1, flats + 1)
+        ]
+        result.update(
+            wall_seconds=round(elapsed, 3),
+            pages=pages,
+            pages_per_second=round(pages / elapsed, 2),
+            webdriver_calls=counter_total(metrics, "webdriver_calls_total"),
+            correct=links == expected,
+        )
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def bench_run_scraper(flats):
+    """
+    Runs the whole scraper (plain HTTP discovery) and checks its output.
+    """
+    result = {"scenario": "run_scraper", "flats": flats}
+    with StandInServer(flats=flats) as server, tempfile.TemporaryDirectory() as tmp:
+        output = f"{tmp}/out.csv"
+        scraper = import_scraper(server, output, LISTING_DISCOVERY="http")
+        from utils.metrics import metrics
+
+        started = time.perf_counter()
+        scraper.run_scraper()
+        elapsed = time.perf_counter() - started
+
+        with open(output, encoding="utf8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        expected = [expected_row(server.base_url, n) for n in range(1, flats + 1)]
+        result.update(
+            wall_seconds=round(elapsed, 3),
+            pages_per_second=round(flats / elapsed, 2),
+            webdriver_calls=counter_total(metrics, "webdriver_calls_total"),
+            requests=server.requests,
+            correct=rows == expected,
+        )
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def bench_incremental(flats):
+    """
+    Runs the scraper twice with a state store, editing one flat's price in the listing payload
+    and on its detail page in between, and checks that only that flat is fetched again.
+    """
+    result = {"scenario": "incremental", "flats": flats}
+    with StandInServer(flats=flats) as server, tempfile.TemporaryDirectory() as tmp:
+        output = f"{tmp}/out.csv"
+        scraper = import_scraper(
+            server,
+            output,
+            LISTING_DISCOVERY="http",
+            STATE_DB_PATH=f"{tmp}/state.sqlite3",
+        )
+        scraper.run_scraper()
+
+        edited = max(1, flats // 2)
+        server.edit_flat(edited, {"price with VAT": "99 999"})
+        before = server.requests
+        started = time.perf_counter()
+        scraper.run_scraper()
+        elapsed = time.perf_counter() - started
+        requests = server.requests - before
+
+        with open(output, encoding="utf8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        expected = [
+            expected_row(server.base_url, n, server.edits) for n in range(1, flats + 1)
+        ]
+        result.update(
+            wall_seconds=round(elapsed, 3),
+            requests=requests,
+            # The listing page and the edited flat's detail page
+            correct=rows == expected and requests == 2,
+        )
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+SCENARIOS = {
+    "pagination": bench_pagination,
+    "run_scraper": bench_run_scraper,
+    "incremental": bench_incremental,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run one end-to-end benchmark.")
+    parser.add_argument("scenario", choices=sorted(SCENARIOS))
+    parser.add_argument("--flats", type=int, default=100)
+    args = parser.parse_args()
+    emit(SCENARIOS[args.scenario](args.flats))
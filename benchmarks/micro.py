@@ -0,0 +1,97 @@
+"""
+benchmarks/micro.py
+
+Microbenchmarks of the detail page path:
+- extract: extract_flat_details on pre-rendered pages, lxml extractor vs. the BeautifulSoup one;
+- parse_detail: parse_flat_detail_requests against the stand-in server (fetch + parse per page),
+  without a cache and with a warm HTTP cache (304 Not Modified path).
+
+Usage:
+    python -m benchmarks.micro extract --flats 200
+"""
+
+import argparse
+import tempfile
+import time
+
+from benchmarks.common import emit, import_scraper, peak_rss_mb
+from benchmarks.standin_server import StandInServer, detail_page
+
+REPEATS = 3
+
+
+def bench_extract(flats):
+    """
+    Times extract_flat_details per page (best of REPEATS) for both parsers.
+    """
+    with StandInServer(flats=0) as server, tempfile.TemporaryDirectory() as tmp:
+        scraper = import_scraper(server, f"{tmp}/out.csv")
+    pages = [
+        (detail_page(n), f"https://www.ceresne.sk/ponuka-bytov/byt/{n}/")
+        for n in range(1, flats + 1)
+    ]
+
+    result = {"scenario": "extract", "flats": flats}
+    for name, extract in (
+        ("lxml", scraper.extract_flat_details),
+        ("bs4", scraper.extract_flat_details_bs4),
+    ):
+        best = float("inf")
+        for _ in range(REPEATS):
+            started = time.perf_counter()
+            for html, url in pages:
+                extract(html, url)
+            best = min(best, time.perf_counter() - started)
+        result[f"{name}_us_per_page"] = round(best / flats * 1e6, 1)
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def bench_parse_detail(flats):
+    """
+    Times parse_flat_detail_requests per page (best of REPEATS), sequentially, without a cache
+    and with a warm cache.
+    """
+    with StandInServer(flats=flats) as server, tempfile.TemporaryDirectory() as tmp:
+        scraper = import_scraper(server, f"{tmp}/out.csv")
+        from utils.fetcher import PoliteFetcher
+        from utils.http_cache import HttpCache
+
+        urls = [f"{server.base_url}/ponuka-bytov/byt/{n}/" for n in range(1, flats + 1)]
+        fetcher = PoliteFetcher(requests_per_second=0)
+        cache = HttpCache(f"{tmp}/cache")
+        result = {"scenario": "parse_detail", "flats": flats}
+        correct = True
+        try:
+            for name, page_cache in (("cold", None), ("warm", cache)):
+                if page_cache:
+                    # Fill the cache so the timed passes get 304 Not Modified
+                    for url in urls:
+                        scraper.parse_flat_detail_requests(url, fetcher, page_cache)
+                best = float("inf")
+                for _ in range(REPEATS):
+                    started = time.perf_counter()
+                    rows = [
+                        scraper.parse_flat_detail_requests(url, fetcher, page_cache)
+                        for url in urls
+                    ]
+                    best = min(best, time.perf_counter() - started)
+                    correct = correct and all(rows)
+                result[f"{name}_ms_per_page"] = round(best / flats * 1000, 3)
+        finally:
+            fetcher.close()
+        result["correct"] = correct
+        result["requests"] = server.requests
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+SCENARIOS = {"extract": bench_extract, "parse_detail": bench_parse_detail}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run one microbenchmark.")
+    parser.add_argument("scenario", choices=sorted(SCENARIOS))
+    parser.add_argument("--flats", type=int, default=200)
+    args = parser.parse_args()
+    emit(SCENARIOS[args.scenario](args.flats))
@@ -0,0 +1,176 @@
+"""
+benchmarks/run.py
+
+Runs the benchmark suite (each scenario in its own process) and compares the results with the
+stored baselines in benchmarks/baselines.json. A metric that got worse than its baseline by more
+than its tolerance (relative, plus a small absolute slack), or a scenario whose output is wrong, is reported as a regression and the exit
+code is 1. Baselines are machine-specific: record them with --update-baselines on the machine
+that runs the comparison.
+
+Usage:
+    python -m benchmarks.run                      # default suite, compare with baselines
+    python -m benchmarks.run --flats 10 1000 10000 # end-to-end sizes
+    python -m benchmarks.run --update-baselines    # store the current results as baselines
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BASELINES_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baselines.json"
+)
+
+# Compared metrics (all lower-is-better) and the relative slack allowed before a regression
+DEFAULT_TOLERANCES = {
+    "wall_seconds": 0.25,
+    "lxml_us_per_page": 0.25,
+    "bs4_us_per_page": 0.25,
+    "cold_ms_per_page": 0.25,
+    "warm_ms_per_page": 0.25,
+    "peak_rss_mb": 0.2,
+    "webdriver_calls": 0.1,
+    "requests": 0.0,
+}
+# Absolute slack added to the limit, so timer noise on tiny values isn't reported
+DEFAULT_SLACK = {
+    "wall_seconds": 0.1,
+    "lxml_us_per_page": 25,
+    "bs4_us_per_page": 250,
+    "cold_ms_per_page": 0.5,
+    "warm_ms_per_page": 0.5,
+    "peak_rss_mb": 5,
+}
+
+
+def suite(flats_sizes):
+    """
+    Returns the scenarios to run as (module, scenario, flats) tuples.
+    """
+    scenarios = [
+        ("benchmarks.micro", "extract", 200),
+        ("benchmarks.micro", "parse_detail", 200),
+    ]
+    for flats in flats_sizes:
+        scenarios.append(("benchmarks.e2e", "run_scraper", flats))
+    for flats in flats_sizes:
+        scenarios.append(("benchmarks.e2e", "incremental", flats))
+    for flats in flats_sizes:
+        # Selenium pagination is slow; cap its size so the suite stays practical
+        scenarios.append(("benchmarks.e2e", "pagination", min(flats, 1000)))
+    return list(dict.fromkeys(scenarios))
+
+
+def run_scenario(module, scenario, flats):
+    """
+    Runs one scenario in a fresh interpreter.
+
+    Returns:
+    dict: The scenario result (with an "error" key if it crashed).
+    """
+    process = subprocess.run(
+        [sys.executable, "-m", module, scenario, "--flats", str(flats)],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True,
+        text=True,
+    )
+    lines = process.stdout.strip().splitlines()
+    if process.returncode or not lines:
+        return {
+            "scenario": scenario,
+            "flats": flats,
+            "error": (process.stderr.strip().splitlines() or ["no output"])[-1],
+        }
+    return json.loads(lines[-1])
+
+
+def result_key(result):
+    return f"{result['scenario']}[{result['flats']}]"
+
+
+def compare(result, baseline, tolerances, slack):
+    """
+    Compares a result with its baseline.
+
+    Returns:
+    list: Descriptions of the regressions found (empty if none).
+    """
+    problems = []
+    if result.get("correct") is False:
+        problems.append("output differs from the expected rows/links")
+    for metric, tolerance in tolerances.items():
+        if metric not in result or metric not in baseline:
+            continue
+        limit = baseline[metric] * (1 + tolerance) + slack.get(metric, 0)
+        if result[metric] > limit:
+            problems.append(
+                f"{metric} {result[metric]} > {limit:.3f} "
+                f"(baseline {baseline[metric]}, +{tolerance:.0%} + {slack.get(metric, 0)})"
+            )
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite.")
+    parser.add_argument(
+        "--flats",
+        type=int,
+        nargs="+",
+        default=[10, 1000],
+        help="Flat counts for the end-to-end scenarios (10 to 10000).",
+    )
+    parser.add_argument("--only", help="Run only scenarios with this name.")
+    parser.add_argument(
+        "--update-baselines",
+        action="store_true",
+        help="Store the results as the new baselines instead of comparing.",
+    )
+    args = parser.parse_args()
+
+    stored = {"results": {}}
+    if os.path.exists(BASELINES_FILE):
+        with open(BASELINES_FILE, encoding="utf8") as f:
+            stored = json.load(f)
+    tolerances = {**DEFAULT_TOLERANCES, **stored.get("tolerances", {})}
+    slack = {**DEFAULT_SLACK, **stored.get("slack", {})}
+
+    regressions = 0
+    for module, scenario, flats in suite(args.flats):
+        if args.only and scenario != args.only:
+            continue
+        result = run_scenario(module, scenario, flats)
+        key = result_key(result)
+        if "error" in result or "skipped" in result:
+            print(f"{key}: {result.get('error') or 'skipped: ' + result['skipped']}")
+            regressions += "error" in result
+            continue
+
+        metrics = {k: v for k, v in result.items() if k not in ("scenario", "flats")}
+        print(f"{key}: {json.dumps(metrics)}")
+        if args.update_baselines:
+            stored["results"][key] = metrics
+            continue
+        baseline = stored["results"].get(key)
+        if baseline is None:
+            print("  no baseline (run with --update-baselines to record one)")
+            continue
+        for problem in compare(result, baseline, tolerances, slack):
+            print(f"  REGRESSION: {problem}")
+            regressions += 1
+
+    if args.update_baselines:
+        stored["tolerances"] = tolerances
+        stored["slack"] = slack
+        with open(BASELINES_FILE, "w", encoding="utf8") as f:
+            json.dump(stored, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baselines written to {BASELINES_FILE}")
+    elif regressions:
+        print(f"{regressions} regression(s) found.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
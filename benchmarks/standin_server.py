@@ -0,0 +1,395 @@
+"""
+benchmarks/standin_server.py
+
+A local stand-in for ceresne.sk that serves any number of synthetic flats, so the scraper can be
+benchmarked without network access. The markup mirrors the parts of the live site the scraper
+reads: an Alpine-style listing table whose rows call goToFlat(), a pagination bar driven by
+setPage(), and detail pages with span and div label/value blocks.
+
+The listing page comes in two flavours:
+- "payload": the flats are embedded in the x-data attribute (plain HTTP discovery finds them);
+- "paginated": only the table is rendered, page by page, by a small script (needs Selenium).
+
+Detail pages carry an ETag and answer conditional requests with 304 Not Modified. Flats can be edited
+while the server runs (StandInServer.edit_flat()), e.g. to check that only changed flats are re-fetched.
+
+Usage:
+    python -m benchmarks.standin_server --flats 1000 --port 8765 --listing paginated
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+STATUSES = ("voľný", "rezervovaný", "predaný")
+DETAIL_PATH = re.compile(r"^/ponuka-bytov/byt/(\d+)/$")
+
+
+def flat_fields(number, edits=None):
+    """
+    Returns the deterministic synthetic data of flat `number` (1-based).
+
+    Parameters:
+    number (int): The flat number.
+    edits (dict): Optional {number: {field: value}} overriding the synthetic values.
+
+    Returns:
+    dict: Field values as the detail page shows them.
+    """
+    rooms = 1 + number % 4
+    total = 35 + rooms * 12 + (number % 7) * 1.5
+    internal = total - 6 - number % 3
+    price = 90000 + rooms * 25000 + (number % 50) * 700
+    fields = {
+        "stage": "ABC"[number % 3],
+        "apartment number": f"{'ABC'[number % 3]}{number}",
+        "floor": str(1 + number % 8),
+        "total area": f"{total:.1f}".replace(".", ","),
+        "rooms": str(rooms),
+        "internal area": f"{internal:.1f}".replace(".", ","),
+        "external area": f"{number % 9}" if number % 2 else "",
+        "status": STATUSES[number % len(STATUSES)],
+        "price with VAT": f"{price:,}".replace(",", " "),
+        "discounted price": (
+            f"{price - 5000:,}".replace(",", " ") if number % 5 == 0 else ""
+        ),
+    }
+    fields.update((edits or {}).get(number, {}))
+    return fields
+
+
+def detail_page(number, edits=None):
+    """
+    Renders the detail page of flat `number`.
+    """
+    f = flat_fields(number, edits)
+    spans = [
+        ("Etapa", f["stage"]),
+        ("Označenie", f["apartment number"]),
+        ("Podlažie", f["floor"]),
+        ("Celková výmera", f"{f['total area']} m²"),
+        ("Počet izieb", f["rooms"]),
+    ]
+    rows = [
+        ("Výmera interiéru", f"{f['internal area']} m²"),
+        ("Stav", f["status"]),
+        ("Cenníková cena s DPH", f"{f['price with VAT']} €"),
+    ]
+    if f["external area"]:
+        rows.insert(1, ("Výmera exteriéru", f"{f['external area']} m²"))
+    if f["discounted price"]:
+        rows.append(("Zvýhodnená cena", f"{f['discounted price']} €"))
+
+    # Some surrounding boilerplate, so parsing cost is closer to the real page
+    filler = "".join(
+        f"<div class='gallery'><img src='/img/{number}-{i}.jpg' alt=''></div>"
+        for i in range(12)
+    )
+    blocks = "".join(
+        f"<div class='param'><span>{label}</span><span>{value}</span></div>"
+        for label, value in spans
+    ) + "".join(
+        f"<div class='row'><div>{label}</div><div>{value}</div></div>"
+        for label, value in rows
+    )
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>"
+        f"<title>Byt {f['apartment number']}</title>"
+        "<script>window.dataLayer = [];</script></head><body>"
+        f"<header><nav><a href='/'>Ceresne</a></nav></header><main>{filler}"
+        f"<section class='flat-detail'>{blocks}</section></main>"
+        "<footer><p>Stand-in for benchmarks</p></footer></body></html>"
+    )
+
+
+def expected_row(base_url, number, edits=None):
+    """
+    Returns the CSV row the scraper should produce for flat `number` (all values as strings).
+    """
+    f = flat_fields(number, edits)
+    row = {"url": f"{base_url}/ponuka-bytov/byt/{number}/", **f}
+    row["price with VAT"] = f["price with VAT"].replace(" ", "")
+    row["discounted price"] = f["discounted price"].replace(" ", "")
+    for area in ("total area", "internal area", "external area"):
+        # Numbers are written without trailing decimal zeros ("59,0" -> "59")
+        if "," in row[area]:
+            row[area] = row[area].rstrip("0").rstrip(",")
+    return row
+
+
+def listing_rows(base_url, flats, edits=None):
+    """
+    Returns the table rows of the listing as [{"url": ..., "cells": [...]}, ...].
+    """
+    rows = []
+    for number in range(1, flats + 1):
+        f = flat_fields(number, edits)
+        rows.append(
+            {
+                "url": f"{base_url}/ponuka-bytov/byt/{number}/",
+                "cells": [
+                    f["apartment number"],
+                    f["rooms"],
+                    f["total area"],
+                    f["status"],
+                    f["price with VAT"],
+                ],
+            }
+        )
+    return rows
+
+
+# Renders the table and pagination like the Alpine component (asynchronously, after a tick)
+PAGINATION_SCRIPT = """
+const rows = JSON.parse(document.getElementById("rows").textContent);
+const pageSize = %(page_size)d;
+const pages = Math.max(1, Math.ceil(rows.length / pageSize));
+let page = 1;
+
+function goToFlat(url) { window.location = url; }
+
+function render() {
+    const body = document.querySelector("#flats tbody");
+    body.innerHTML = "";
+    for (const row of rows.slice((page - 1) * pageSize, page * pageSize)) {
+        const tr = document.createElement("tr");
+        tr.setAttribute("x-on:click", "goToFlat('" + row.url + "')");
+        for (const cell of row.cells) {
+            const td = document.createElement("td");
+            td.textContent = cell;
+            tr.appendChild(td);
+        }
+        body.appendChild(tr);
+    }
+    const list = document.querySelector("div.pagination ul");
+    list.innerHTML = "";
+    const add = (cls, label, target, disabled) => {
+        const li = document.createElement("li");
+        if (cls) li.className = cls;
+        const button = document.createElement("button");
+        button.textContent = label;
+        if (target === "next") button.setAttribute("x-on:click", "setPage(page + 1)");
+        if (target === "prev") button.setAttribute("x-on:click", "setPage(page - 1)");
+        if (disabled) button.setAttribute("disabled", "disabled");
+        button.addEventListener("click", () => setPage(
+            target === "next" ? page + 1 : target === "prev" ? page - 1 : target));
+        li.appendChild(button);
+        list.appendChild(li);
+    };
+    add("pagination-previous", "‹", "prev", page === 1);
+    for (let p = Math.max(1, page - 2); p <= Math.min(pages, page + 2); p++) {
+        add(p === page ? "active" : "", String(p), p, false);
+    }
+    add("pagination-next", "›", "next", page === pages);
+}
+
+function setPage(target) {
+    if (target < 1 || target > pages || target === page) return;
+    page = target;
+    setTimeout(render, %(render_delay_ms)d);
+}
+
+render();
+"""
+
+
+def listing_page(
+    base_url, flats, mode="payload", page_size=10, render_delay_ms=30, edits=None
+):
+    """
+    Renders the listing page.
+
+    Parameters:
+    base_url (str): Base URL used in the detail links.
+    flats (int): Number of flats.
+    mode (str): "payload" (links in the x-data attribute) or "paginated" (script-rendered table).
+    page_size (int): Rows per table page.
+    render_delay_ms (int): Delay before the table re-renders after a page change.
+    edits (dict): Optional {number: {field: value}} overriding the synthetic values.
+    """
+    rows = listing_rows(base_url, flats, edits)
+    table = (
+        "<table id='flats'><thead><tr><th>Byt</th><th>Izby</th><th>Výmera</th>"
+        "<th>Stav</th><th>Cena</th></tr></thead><tbody></tbody></table>"
+        "<div class='pagination'><ul></ul></div>"
+    )
+    if mode == "payload":
+        payload = html.escape(json.dumps({"flats": rows}), quote=True)
+        body = f'<div x-data="flatsTable({payload})">{table}</div>'
+        script = ""
+    else:
+        body = f"<div x-data='flatsTable'>{table}</div>"
+        data = json.dumps(rows).replace("</", "<\\/")
+        script = (
+            f"<script type='application/json' id='rows'>{data}</script>"
+            f"<script>{PAGINATION_SCRIPT % {'page_size': page_size, 'render_delay_ms': render_delay_ms}}</script>"
+        )
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Ponuka bývania</title>"
+        f"</head><body><main>{body}</main>{script}</body></html>"
+    )
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; without this, keep-alive clients hit delayed-ACK stalls
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body and self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        path = self.path.split("?", 1)[0]
+        with server.stats_lock:
+            server.requests += 1
+
+        if path in ("/ponuka-byvania/", "/ponuka-byvania"):
+            body = server.listing.encode("utf8")
+            self._send(200, body, {"Content-Type": "text/html; charset=utf-8"})
+            return
+
+        match = DETAIL_PATH.match(path)
+        number = int(match.group(1)) if match else 0
+        if not 1 <= number <= server.flats:
+            self._send(404, b"Not found", {"Content-Type": "text/plain"})
+            return
+
+        body = detail_page(number, server.edits).encode("utf8")
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, headers={"ETag": etag})
+            return
+        self._send(
+            200, body, {"Content-Type": "text/html; charset=utf-8", "ETag": etag}
+        )
+
+    do_HEAD = do_GET
+
+
+class StandInServer:
+    """
+    The stand-in site, served from a background thread.
+
+    Parameters:
+    flats (int): Number of synthetic flats.
+    listing (str): "payload" or "paginated" listing page (see listing_page()).
+    page_size (int): Rows per listing table page.
+    port (int): Port to listen on (0 picks a free one).
+    latency_ms (float): Artificial delay added to every response.
+    """
+
+    def __init__(
+        self, flats=100, listing="payload", page_size=10, port=0, latency_ms=0
+    ):
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self._server.daemon_threads = True
+        self._server.flats = flats
+        self._server.latency = latency_ms / 1000
+        self._server.requests = 0
+        self._server.stats_lock = threading.Lock()
+        self._server.edits = {}
+        self.flats = flats
+        self.listing_mode = listing
+        self.page_size = page_size
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self.list_url = self.base_url + "/ponuka-byvania/"
+        self._server.listing = listing_page(self.base_url, flats, listing, page_size)
+        self._thread = None
+
+    @property
+    def edits(self):
+        """
+        dict: {number: {field: value}} of the flats edited so far (see expected_row()).
+        """
+        return self._server.edits
+
+    def edit_flat(self, number, fields):
+        """
+        Changes fields of flat `number` on its detail page and in the listing.
+
+        Parameters:
+        number (int): The flat number.
+        fields (dict): {field: value}, with values as the detail page shows them.
+        """
+        self._server.edits.setdefault(number, {}).update(fields)
+        self._server.listing = listing_page(
+            self.base_url,
+            self.flats,
+            self.listing_mode,
+            self.page_size,
+            edits=self._server.edits,
+        )
+
+    @property
+    def requests(self):
+        """
+        int: Requests served so far.
+        """
+        return self._server.requests
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="standin-server", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve a local stand-in for ceresne.sk."
+    )
+    parser.add_argument("--flats", type=int, default=100)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--listing", choices=("payload", "paginated"), default="paginated"
+    )
+    parser.add_argument("--page-size", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    server = StandInServer(
+        args.flats, args.listing, args.page_size, args.port, args.latency_ms
+    )
+    print(f"Serving {args.flats} flats at {server.list_url} (Ctrl+C to stop)")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
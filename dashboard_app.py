@@ -4,11 +4,27 @@ import pandas as pd
 import plotly.express as px
 import plotly.io as pio
 
+from utils.chart_data import histogram_bins, page_count, table_page, thin_scatter
+
+try:
+    # DuckDB query layer over the Parquet snapshots (optional: needs duckdb installed)
+    from utils.history_queries import SnapshotHistory, build_filters
+except ImportError:
+    SnapshotHistory = None
+
 
 # --- Configuration ---
 # Define the path to your CSV file.
 # This assumes dashboard_app.py is in the same directory as the 'output' folder.
 CSV_FILE_PATH = os.path.join(os.path.dirname(__file__), "output", "ceresne_flats.csv")
+# Typed Parquet snapshots written by the scraper (one partition per scrape date)
+SNAPSHOT_DIR = os.path.join(os.path.dirname(__file__), "output", "snapshots")
+
+# Large-data rendering: above this many rows charts use WebGL and server-side binning/thinning,
+# and the raw table is paged on the server instead of sending every row to the browser
+LARGE_DATA_ROWS = int(os.getenv("DASHBOARD_LARGE_DATA_ROWS", "5000"))
+MAX_SCATTER_POINTS = int(os.getenv("DASHBOARD_MAX_SCATTER_POINTS", "5000"))
+TABLE_PAGE_SIZE = int(os.getenv("DASHBOARD_TABLE_PAGE_SIZE", "100"))
 
 # Additional debug & environment re-setup required for the change below, skipped for now
 #  --- Plotly Locale Setup for European Decimal Formatting ---
@@ -19,20 +35,75 @@ CSV_FILE_PATH = os.path.join(os.path.dirname(__file__), "output", "ceresne_flats
 
 
 # --- Load Data ---
-@st.cache_data  # Cache the data loading to improve performance
-@st.cache_data
-# --- Load Data ---
-@st.cache_data
-def load_data(path):
+def latest_snapshot_path(snapshot_dir):
+    """
+    Find the Parquet snapshot of the most recent scrape date.
+
+    Parameters:
+    snapshot_dir (str): The root directory of the date-partitioned snapshots.
+
+    Returns:
+    str: The path of the latest snapshot file, or None if there is none.
+    """
+    try:
+        partitions = sorted(
+            name for name in os.listdir(snapshot_dir) if name.startswith("scrape_date=")
+        )
+    except FileNotFoundError:
+        return None
+    for partition in reversed(partitions):
+        path = os.path.join(snapshot_dir, partition, "flats.parquet")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def get_data_version(csv_path, snapshot_dir):
     """
-    Load the data from a CSV file.
+    Build a cheap version key for the data from file metadata (path, mtime, size),
+    so cached data is reused until the scraper writes new output.
+
+    Parameters:
+    csv_path (str): The path to the CSV file.
+    snapshot_dir (str): The root directory of the Parquet snapshots.
+
+    Returns:
+    tuple: ((path, mtime_ns, size), ...) for the CSV and the latest snapshot that exist.
+    """
+    version = []
+    for path in (csv_path, latest_snapshot_path(snapshot_dir)):
+        if path and os.path.exists(path):
+            stat = os.stat(path)
+            version.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(version)
+
+
+@st.cache_data  # Cached per data version: reloads only after the scraper writes new output
+def load_data(path, data_version=()):
+    """
+    Load the data, preferring the typed Parquet snapshot over the CSV.
 
     Parameters:
     path (str): The path to the CSV file.
+    data_version (tuple): Version key from get_data_version(). Part of the cache key;
+                          a snapshot listed in it is read if it is at least as new as the CSV.
 
     Returns:
     pd.DataFrame: The loaded DataFrame with normalized column names.
     """
+    files = {file_path: mtime for file_path, mtime, _ in data_version}
+    snapshot_path = next(
+        (file_path for file_path in files if file_path.endswith(".parquet")), None
+    )
+    if snapshot_path and files[snapshot_path] >= files.get(path, 0):
+        try:
+            # Already typed with snake_case columns: no normalization or coercion needed
+            return pd.read_parquet(snapshot_path, memory_map=True)
+        except Exception as e:
+            st.warning(
+                f"Could not read snapshot {snapshot_path} ({e}). Falling back to the CSV file."
+            )
+
     try:
         # Add decimal=',' if the CSV uses commas for decimals (e.g., 123,45)
         df = pd.read_csv(path, decimal=",")
@@ -69,16 +140,124 @@ def load_data(path):
         return pd.DataFrame()
 
 
+# --- Historical Queries (DuckDB over Parquet snapshots) ---
+@st.cache_resource
+def get_history(snapshot_dir):
+    """
+    Open the DuckDB query layer once per process. New snapshot partitions are
+    picked up automatically because the view is defined over a file glob.
+
+    Parameters:
+    snapshot_dir (str): The root directory of the Parquet snapshots.
+
+    Returns:
+    SnapshotHistory: The query layer.
+    """
+    return SnapshotHistory(snapshot_dir)
+
+
+@st.cache_data
+def history_filter_options(snapshot_dir, data_version=()):
+    """
+    Values available for the sidebar filters, cached per data version.
+    """
+    return get_history(snapshot_dir).filter_options()
+
+
+@st.cache_data
+def query_history(snapshot_dir, query, filters, data_version=()):
+    """
+    Run one of the SnapshotHistory aggregations, cached per filters and data version.
+
+    Parameters:
+    snapshot_dir (str): The root directory of the Parquet snapshots.
+    query (str): Name of the SnapshotHistory method (e.g. "room_counts").
+    filters (dict): Filters from build_filters().
+    data_version (tuple): Version key from get_data_version() (cache key only).
+
+    Returns:
+    pd.DataFrame: The (small) aggregated result set.
+    """
+    return getattr(get_history(snapshot_dir), query)(filters)
+
+
+# --- Large-Data Rendering (server-side reduction) ---
+@st.cache_data
+def binned_histogram(_df, column, nbins, data_version=()):
+    """
+    Bin a column on the server, cached per data version
+    (the DataFrame itself is not hashed; it is determined by data_version).
+    """
+    return histogram_bins(_df[column], nbins)
+
+
+@st.cache_data
+def thinned_scatter(_df, x, y, max_points, data_version=()):
+    """
+    Drop rows without x/y and thin the rest to the point budget, cached per data version.
+    """
+    return thin_scatter(_df.dropna(subset=[x, y]), x, y, max_points)
+
+
 # --- Streamlit App Layout ---
 st.set_page_config(layout="wide", page_title="Ceresne Flats Scraper Dashboard")
 st.title("🏡 Ceresne Flats Data Dashboard")
 
 
-df = load_data(CSV_FILE_PATH)
+data_version = get_data_version(CSV_FILE_PATH, SNAPSHOT_DIR)
+df = load_data(CSV_FILE_PATH, data_version)
+
+# Sidebar filters apply to the whole page; they need the DuckDB query layer over the snapshots
+use_history = SnapshotHistory is not None and SnapshotHistory.available(SNAPSHOT_DIR)
+filters = None
+# Cache key of the charts drawn from df (it changes with the data and with the filters)
+df_version = data_version
+if use_history:
+    options = history_filter_options(SNAPSHOT_DIR, data_version)
+    st.sidebar.header("Filters")
+    date_range = st.sidebar.date_input(
+        "Scrape date range",
+        value=(options["date_min"], options["date_max"]),
+        min_value=options["date_min"],
+        max_value=options["date_max"],
+    )
+    # While a range is being picked only the start date is returned
+    date_from = date_range[0] if date_range else None
+    date_to = date_range[1] if len(date_range) > 1 else date_from
+    filters = build_filters(
+        date_from=date_from,
+        date_to=date_to,
+        stages=st.sidebar.multiselect("Stage", options["stages"]),
+        statuses=st.sidebar.multiselect("Status", options["statuses"]),
+        rooms=st.sidebar.multiselect("Rooms", options["rooms"]),
+    )
+    # The table and the per-listing charts show the same rows as the DuckDB aggregates:
+    # the latest scrape date within the filters
+    df = query_history(SNAPSHOT_DIR, "latest_rows", filters, data_version)
+    df_version = (data_version, tuple(filters.items()))
+
+# Rendering mode: "Auto" switches to large-data rendering above LARGE_DATA_ROWS rows
+render_mode = st.sidebar.radio(
+    "Rendering mode",
+    ["Auto", "Standard", "Large data"],
+    help=f"Large-data mode bins/thins chart data and pages the table on the server (Auto: above {LARGE_DATA_ROWS} rows).",
+)
+large_data = render_mode == "Large data" or (
+    render_mode == "Auto" and len(df) > LARGE_DATA_ROWS
+)
 
 if not df.empty:
     st.subheader("Raw Scraped Data")
-    st.dataframe(df)
+    if large_data:
+        # Only the selected page is sent to the browser
+        pages = page_count(len(df), TABLE_PAGE_SIZE)
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1)
+        st.dataframe(table_page(df, page, TABLE_PAGE_SIZE))
+        first_row = (page - 1) * TABLE_PAGE_SIZE + 1
+        last_row = min(page * TABLE_PAGE_SIZE, len(df))
+        st.caption(f"Rows {first_row}–{last_row} of {len(df)} (page {page} of {pages})")
+    else:
+        st.dataframe(df)
 
     # You can remove this line after confirming it works, or keep for debugging
     # st.write("Normalized Columns for Plotting:", df.columns.tolist())
@@ -91,13 +270,27 @@ if not df.empty:
     st.markdown("### 📊 Price Distribution")
     # Use the normalized column name 'price_with_vat'
     if "price_with_vat" in df.columns:
-        fig_price_dist = px.histogram(
-            df,
-            x="price_with_vat",  # Use normalized name here
-            nbins=30,
-            title="Distribution of Prices with VAT",
-            template="plotly_white",
-        )
+        if large_data:
+            # Binned on the server: the browser receives 30 bars instead of every price
+            price_bins = binned_histogram(df, "price_with_vat", 30, df_version)
+            fig_price_dist = px.bar(
+                price_bins,
+                x="bin_center",
+                y="count",
+                hover_data=["bin_start", "bin_end"],
+                title="Distribution of Prices with VAT",
+                template="plotly_white",
+            )
+            fig_price_dist.update_traces(width=price_bins["bin_width"])
+            fig_price_dist.update_layout(bargap=0)
+        else:
+            fig_price_dist = px.histogram(
+                df,
+                x="price_with_vat",  # Use normalized name here
+                nbins=30,
+                title="Distribution of Prices with VAT",
+                template="plotly_white",
+            )
         fig_price_dist.update_layout(
             xaxis_title="Price with VAT (€)", yaxis_title="Number of Flats"
         )
@@ -113,11 +306,17 @@ if not df.empty:
     if "rooms" in df.columns:
         # Ensure the column exists and is not entirely NaN before value_counts
         if not df["rooms"].dropna().empty:
-            room_counts = df["rooms"].value_counts().sort_index().reset_index()
-            room_counts.columns = [
-                "rooms",
-                "Count",
-            ]  # Update column name for the new df too
+            if use_history:
+                # Aggregated by DuckDB for the latest scrape date in the filters
+                room_counts = query_history(
+                    SNAPSHOT_DIR, "room_counts", filters, data_version
+                ).dropna()
+            else:
+                room_counts = df["rooms"].value_counts().sort_index().reset_index()
+                room_counts.columns = [
+                    "rooms",
+                    "Count",
+                ]  # Update column name for the new df too
             fig_rooms = px.bar(
                 room_counts,
                 x="rooms",  # Use normalized name here
@@ -144,14 +343,24 @@ if not df.empty:
     if "total_area" in df.columns and "price_with_vat" in df.columns:
         # Filter out NaN values for plotting in both relevant columns
         plot_df = df.dropna(subset=["total_area", "price_with_vat"])
+        scatter_title = "Price with VAT vs. Total Area"
+        if large_data:
+            # Thinned to a point budget on the server and drawn with WebGL
+            total_points = len(plot_df)
+            plot_df = thinned_scatter(
+                df, "total_area", "price_with_vat", MAX_SCATTER_POINTS, df_version
+            )
+            if len(plot_df) < total_points:
+                scatter_title += f" ({len(plot_df)} of {total_points} points shown)"
         fig_area_price = px.scatter(
             plot_df,
             x="total_area",  # Use normalized name here
             y="price_with_vat",  # Use normalized name here
             # Update hover_data to normalized names as well
             hover_data=["apartment_number", "floor", "rooms"],
-            title="Price with VAT vs. Total Area",
+            title=scatter_title,
             template="plotly_white",
+            render_mode="webgl" if large_data else "auto",
         )
         fig_area_price.update_layout(
             xaxis_title="Total Area (m²)", yaxis_title="Price with VAT (€)"
@@ -166,11 +375,17 @@ if not df.empty:
     st.markdown("### 📈 Flats by Status")
     # Use normalized column name 'status'
     if "status" in df.columns:
-        status_counts = df["status"].value_counts().reset_index()
-        status_counts.columns = [
-            "status",
-            "Count",
-        ]  # Update column name for the new df too
+        if use_history:
+            # Aggregated by DuckDB for the latest scrape date in the filters
+            status_counts = query_history(
+                SNAPSHOT_DIR, "status_counts", filters, data_version
+            ).dropna()
+        else:
+            status_counts = df["status"].value_counts().reset_index()
+            status_counts.columns = [
+                "status",
+                "Count",
+            ]  # Update column name for the new df too
         fig_status = px.pie(
             status_counts,
             values="Count",
@@ -185,8 +400,59 @@ if not df.empty:
             "`status` column not found for flats by status chart after normalization."
         )
 
+    # --- Historical Analysis (DuckDB over all snapshots) ---
+    if use_history:
+        st.markdown("---")
+        st.subheader("Historical Analysis")
+
+        # --- Chart 5: Price per m² over Time (Line Chart) ---
+        st.markdown("### 💶 Price per m² over Time")
+        price_per_m2 = query_history(
+            SNAPSHOT_DIR, "price_per_m2_over_time", filters, data_version
+        )
+        if not price_per_m2.empty:
+            fig_price_per_m2 = px.line(
+                price_per_m2,
+                x="scrape_date",
+                y="price_per_m2",
+                color="stage",
+                markers=True,
+                hover_data=["listings"],
+                title="Median Price with VAT per m² by Stage",
+                template="plotly_white",
+            )
+            fig_price_per_m2.update_layout(
+                xaxis_title="Scrape Date", yaxis_title="Price per m² (€)"
+            )
+            st.plotly_chart(fig_price_per_m2, use_container_width=True)
+        else:
+            st.info("No prices with a total area match the selected filters.")
+
+        # --- Chart 6: Days on Market (Bar Chart) ---
+        st.markdown("### ⏳ Days on Market")
+        days_on_market = query_history(
+            SNAPSHOT_DIR, "days_on_market", filters, data_version
+        )
+        if not days_on_market.empty:
+            fig_days = px.bar(
+                days_on_market,
+                x="days_on_market",
+                y="flats",
+                color="last_status",
+                title="Days Between First and Last Sighting, by Latest Status",
+                template="plotly_white",
+            )
+            fig_days.update_layout(
+                xaxis_title="Days on Market", yaxis_title="Number of Flats"
+            )
+            st.plotly_chart(fig_days, use_container_width=True)
+        else:
+            st.info("No listings match the selected filters.")
+
     # You can add more charts here based on your data and interests!
 
+elif use_history:
+    st.info("No listings match the selected filters.")
 else:
     st.info(
         "No data available to display charts. Please run the scraper to generate 'ceresne_flats.csv'."
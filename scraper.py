@@ -4,55 +4,679 @@ It uses Selenium for dynamic content and pagination, Requests for detail page fe
 BeautifulSoup for HTML parsing, and CSV for data storage.
 The script extracts all flat detail URLs, parses relevant data fields, and saves the results to a CSV file.
 Robust error handling and pagination logic ensure all listings are captured reliably.
+Selenium, BeautifulSoup and pyarrow are imported only by the stages that use them, to keep cold starts fast.
 """
 
+import time
+
+# Taken before the remaining imports, for the startup timing breakdown
+_PROCESS_STARTED = time.perf_counter()
+
 import os
+import sys
+import signal
+import argparse
+import subprocess
 import requests
-from bs4 import BeautifulSoup
-import csv
+import dataclasses
 import re
-import time
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from urllib.parse import urljoin
 
-from webdriver import get_chrome_driver, quit_driver
-
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import (
-    TimeoutException,
-    NoSuchElementException,
-    StaleElementReferenceException,
-    WebDriverException,
-)
 import logging
-from utils.logging_config import setup_logging
+from utils.logging_config import (
+    setup_logging,
+    new_run_id,
+    current_run_id,
+    process_log_file,
+)
+from utils.fetcher import PoliteFetcher
+from utils.http_cache import HttpCache, body_hash
+from utils.html_extract import parse_html, element_text, iter_label_value_blocks
+from utils.pipeline import StreamingPipeline
+from utils.output import CheckpointedCsvWriter
+from utils.change_log import record_changes
+from utils.records import CSV_FIELDNAMES, FlatRecord, read_csv_records
+from utils.sites import (
+    SiteAdapter,
+    get_sites,
+    load_site_modules,
+    register_site,
+    site_path,
+)
+from utils.site_scheduler import SharedResources, SiteScheduler, overall_status
+from utils.snapshots import write_snapshot
+from utils.state_store import ListingStateStore, flat_id_from_url, text_hash
+from utils.startup import StartupTimer
+from utils.driver_pool import DriverPool
+from utils.daemon import RunScheduler, send_command
+from utils.work_queue import WorkQueue
+from utils.parse_pool import ParsePool, then
+from utils.metrics import metrics, write_run_report
 
 
 BASE = "https://www.ceresne.sk"
 LIST_URL = BASE + "/ponuka-byvania/"
 HEADERS = {"User-Agent": "Mozilla/5.0"}
 
+OUTPUT_FILENAME = "/app/output/ceresne_flats.csv"
+FIELDNAMES = CSV_FIELDNAMES
+
+# --- Detail page fetching (overridable via environment variables) ---
+# Number of worker threads fetching detail pages in parallel
+FETCH_WORKERS = int(os.environ.get("FETCH_WORKERS", "8"))
+# Maximum number of simultaneous requests to a single host (be polite to ceresne.sk)
+PER_HOST_CONCURRENCY = int(os.environ.get("PER_HOST_CONCURRENCY", "4"))
+# Global request rate in requests per second (0 disables the limit)
+REQUESTS_PER_SECOND = float(os.environ.get("REQUESTS_PER_SECOND", "5"))
+# Upper bound for the adaptive per-host limit, which starts at PER_HOST_CONCURRENCY, grows
+# while the site responds quickly and is halved on 429/5xx/timeouts (set equal to disable)
+MAX_PER_HOST_CONCURRENCY = int(
+    os.environ.get("MAX_PER_HOST_CONCURRENCY", str(FETCH_WORKERS))
+)
+# Retries per URL after a 429/5xx response, timeout or connection error, with jittered
+# exponential backoff (base and cap in seconds; Retry-After is honored up to the cap)
+FETCH_MAX_RETRIES = int(os.environ.get("FETCH_MAX_RETRIES", "3"))
+FETCH_BACKOFF_SECONDS = float(os.environ.get("FETCH_BACKOFF_SECONDS", "1"))
+FETCH_MAX_BACKOFF_SECONDS = float(os.environ.get("FETCH_MAX_BACKOFF_SECONDS", "60"))
+# URLs that could not be fetched are listed here after each run (empty string disables)
+FAILED_URLS_FILE = os.environ.get("FAILED_URLS_FILE", "/app/output/failed_urls.txt")
+
+# --- Run metrics (set to an empty string to disable) ---
+# JSON run report (stage timings, latency histograms, throughput, error counts)
+RUN_REPORT_FILE = os.environ.get("RUN_REPORT_FILE", "/app/output/run_report.json")
+# Prometheus textfile-collector file (point node_exporter's textfile directory at its folder)
+METRICS_TEXTFILE = os.environ.get(
+    "METRICS_TEXTFILE", "/app/output/metrics/ceresne_scraper.prom"
+)
+# Maximum number of discovered links waiting for a worker before pagination pauses (backpressure)
+PIPELINE_QUEUE_SIZE = int(os.environ.get("PIPELINE_QUEUE_SIZE", "64"))
+# Parse stage: number of processes parsing detail pages off the network threads
+# (0 = parse in the fetch threads; empty = one per CPU)
+PARSE_PROCESSES = os.environ.get("PARSE_PROCESSES", "0")
+# Pages sent to a parse process together, and how long a partial batch waits for more pages
+PARSE_BATCH_SIZE = int(os.environ.get("PARSE_BATCH_SIZE", "8"))
+PARSE_BATCH_DELAY_MS = float(os.environ.get("PARSE_BATCH_DELAY_MS", "20"))
+# How often the pipeline logs its per-stage queue depths (0 disables it)
+PIPELINE_REPORT_SECONDS = float(os.environ.get("PIPELINE_REPORT_SECONDS", "30"))
+
+# --- Detail page HTTP cache (set HTTP_CACHE_DIR to an empty string to disable) ---
+HTTP_CACHE_DIR = os.environ.get("HTTP_CACHE_DIR", "/app/output/.http_cache")
+HTTP_CACHE_MAX_AGE_DAYS = float(os.environ.get("HTTP_CACHE_MAX_AGE_DAYS", "7"))
+HTTP_CACHE_MAX_MB = float(os.environ.get("HTTP_CACHE_MAX_MB", "50"))
+
+# Typed Parquet snapshots partitioned by scrape date (set to an empty string to disable)
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR", "/app/output/snapshots")
+# Append-only log of new/delisted flats and price/status changes (set to an empty string to disable)
+CHANGE_LOG_FILE = os.environ.get(
+    "CHANGE_LOG_FILE", "/app/output/changes/flat_changes.jsonl"
+)
+
+# --- Output checkpoints (used by --resume after an interrupted run) ---
+CHECKPOINT_EVERY_ROWS = int(os.environ.get("CHECKPOINT_EVERY_ROWS", "50"))
+CHECKPOINT_EVERY_SECONDS = float(os.environ.get("CHECKPOINT_EVERY_SECONDS", "10"))
+
+# --- Incremental scraping (set STATE_DB_PATH to an empty string to fetch every listing) ---
+STATE_DB_PATH = os.environ.get("STATE_DB_PATH", "/app/output/listing_state.sqlite3")
+# Detail pages of unchanged listings are re-fetched once their stored data is older than this
+STATE_MAX_AGE_HOURS = float(os.environ.get("STATE_MAX_AGE_HOURS", "72"))
+
+# Listing discovery: "auto" (plain HTTP first, Selenium as fallback), "http" or "selenium"
+LISTING_DISCOVERY = os.environ.get("LISTING_DISCOVERY", "auto")
+# Optional JSON endpoint feeding the listing table (if known); scanned for flat detail URLs
+LISTING_DATA_URL = os.environ.get("LISTING_DATA_URL", "")
+
+# Selenium pagination: "batch" (one injected script per page) or "classic" (per-element WebDriver calls)
+PAGINATION_MODE = os.environ.get("PAGINATION_MODE", "batch")
+# How pagination detects the next page: "observer" (a MutationObserver inside the browser
+# reports the new rows as soon as the table changes) or "poll" (WebDriver polling plus a 1 s buffer)
+PAGE_CHANGE_WAIT = os.environ.get("PAGE_CHANGE_WAIT", "observer")
+# The observer reports a page once the DOM has been quiet this long (rows are rendered in bursts)
+PAGE_SETTLE_MS = int(os.environ.get("PAGE_SETTLE_MS", "50"))
+# Maximum wait for a page change before falling back to polling
+PAGE_CHANGE_TIMEOUT_SECONDS = float(os.environ.get("PAGE_CHANGE_TIMEOUT_SECONDS", "25"))
+
+# Detail page parser: "lxml" (fast single-pass extractor) or "html.parser" (original BeautifulSoup path)
+DETAIL_PARSER = os.environ.get("DETAIL_PARSER", "lxml")
+
+# --- Daemon mode (--daemon): resident process with an internal scheduler and warm browsers ---
+# Minutes between the end of one run and the start of the next (0 = only run on triggers)
+DAEMON_INTERVAL_MINUTES = float(os.environ.get("DAEMON_INTERVAL_MINUTES", "60"))
+# Creating this file requests a run (e.g. `touch output/.run-now` on the host)
+DAEMON_TRIGGER_FILE = os.environ.get("DAEMON_TRIGGER_FILE", "/app/output/.run-now")
+# Unix socket accepting "run" and "status" commands (see --trigger and --status)
+DAEMON_SOCKET = os.environ.get("DAEMON_SOCKET", "/tmp/ceresne-scraper.sock")
+# Warm WebDriver instances kept between runs, and uses before a browser is replaced
+DRIVER_POOL_SIZE = int(os.environ.get("DRIVER_POOL_SIZE", "1"))
+DRIVER_MAX_USES = int(os.environ.get("DRIVER_MAX_USES", "20"))
+
+# --- Multi-site crawling ---
+# Comma-separated sites to crawl (see utils/sites.py); several sites are crawled concurrently
+SITES = os.environ.get("SITES", "ceresne")
+# Comma-separated modules that register further site adapters (imported at startup)
+SITE_MODULES = os.environ.get("SITE_MODULES", "")
+# Maximum number of sites crawled at the same time
+MAX_PARALLEL_SITES = int(os.environ.get("MAX_PARALLEL_SITES", "4"))
+# Global connection budget: requests in flight across all sites together
+GLOBAL_MAX_CONNECTIONS = int(os.environ.get("GLOBAL_MAX_CONNECTIONS", "16"))
+
+# --- Coordinator/worker mode (--workers N): detail pages are processed by N worker processes ---
+WORK_QUEUE_PATH = os.environ.get("WORK_QUEUE_PATH", "/app/output/work_queue.sqlite3")
+# URLs leased to a worker at a time, and how long before an unfinished lease is handed out again
+WORK_BATCH_SIZE = int(os.environ.get("WORK_BATCH_SIZE", "16"))
+WORK_LEASE_SECONDS = float(os.environ.get("WORK_LEASE_SECONDS", "300"))
+# A URL that failed this many times is given up on
+WORK_MAX_ATTEMPTS = int(os.environ.get("WORK_MAX_ATTEMPTS", "3"))
+# How often idle workers and the coordinator poll the queue
+WORK_POLL_SECONDS = float(os.environ.get("WORK_POLL_SECONDS", "1"))
+
 
 # Obtain a logger for this module AFTER the logging setup
 logger = logging.getLogger(__name__)
 
+# Flat detail URLs as they appear in onclick handlers, x-data payloads and JSON (possibly with "\/" escapes)
+GO_TO_FLAT_PATTERN = re.compile(r"goToFlat\('([^']+)'")
+DETAIL_URL_PATTERN = re.compile(
+    r"(?:https?://[^\s\"'<>,()]*?)?/ponuka-bytov/byt/[^\s\"'<>,()\\]+"
+)
+
+
+def _unique_detail_links(candidates):
+    """
+    Normalizes candidate detail URLs to absolute URLs and de-duplicates them, keeping order.
+    """
+    links = {}
+    for candidate in candidates:
+        full_link = urljoin(BASE, candidate.replace("\\/", "/"))
+        if "/ponuka-bytov/byt/" in full_link:
+            links[full_link] = None
+    return list(links)
+
+
+def _links_from_json(payload):
+    """
+    Recursively collects flat detail URLs from any string value of a decoded JSON payload.
+    """
+    if isinstance(payload, dict):
+        payload = list(payload.values())
+    if isinstance(payload, list):
+        links = []
+        for item in payload:
+            links.extend(_links_from_json(item))
+        return links
+    if isinstance(payload, str):
+        return DETAIL_URL_PATTERN.findall(payload)
+    return []
+
+
+def _embedded_json(text):
+    """
+    Decodes the JSON object or array embedded in an x-data expression or an inline script
+    (e.g. `flatsTable({"flats": [...]})`). Returns None if there is none.
+    """
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        return None
+    end = max(text.rfind("}"), text.rfind("]"))
+    try:
+        return json.loads(text[min(starts) : end + 1])
+    except ValueError:
+        return None
+
+
+def _json_texts(payload):
+    """
+    Flattens the scalar values of a decoded JSON payload into strings, in order.
+    """
+    if isinstance(payload, dict):
+        payload = list(payload.values())
+    if isinstance(payload, list):
+        texts = []
+        for item in payload:
+            texts.extend(_json_texts(item))
+        return texts
+    return [] if payload is None else [str(payload)]
+
+
+def _summaries_from_json(payload, summaries):
+    """
+    Fills `summaries` from the flat entries of a decoded listing payload. An entry is an object
+    (or array) with exactly one detail URL among its own values; its summary is the text of its
+    other values (price, status, ...), like the cells of a listing-table row.
+    """
+    if isinstance(payload, dict):
+        values = list(payload.values())
+    elif isinstance(payload, list):
+        values = payload
+    else:
+        return
+    own_links = {
+        link
+        for value in values
+        if isinstance(value, str)
+        for link in DETAIL_URL_PATTERN.findall(value.replace("\\/", "/"))
+    }
+    if len(own_links) == 1:
+        text = " ".join(
+            _json_texts(
+                [
+                    value
+                    for value in values
+                    if not (isinstance(value, str) and DETAIL_URL_PATTERN.search(value))
+                ]
+            )
+        )
+        if text.strip():
+            summaries[urljoin(BASE, own_links.pop())] = text
+        return
+    for value in values:
+        _summaries_from_json(value, summaries)
+
+
+def get_all_listing_links_http(fetcher, summaries=None):
+    """
+    Extracts all flat detail URLs without a browser, from the data that feeds the
+    Alpine.js listing table: the JSON endpoint configured in LISTING_DATA_URL (if any),
+    the embedded x-data payloads and inline scripts, and any server-rendered goToFlat rows.
+
+    Parameters:
+    fetcher (PoliteFetcher): Shared fetcher used for the listing request(s).
+    summaries (dict): Optional dict filled with {url: listing-table row text}, from the
+                      entries of the data payload and the rows rendered server-side.
+
+    Returns:
+    list: A list of unique flat detail URLs in page order. Empty if none could be found,
+          in which case the caller should fall back to Selenium.
+    """
+    candidates = []
+
+    if LISTING_DATA_URL:
+        logger.info(f"Fetching listing data from {LISTING_DATA_URL}...")
+        try:
+            resp = fetcher.get(LISTING_DATA_URL)
+            resp.raise_for_status()
+            payload = resp.json()
+            candidates.extend(_links_from_json(payload))
+            if summaries is not None:
+                _summaries_from_json(payload, summaries)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning(f"Could not read listing data from {LISTING_DATA_URL}: {e}")
+
+    if not candidates:
+        logger.info(f"Fetching {LIST_URL} over plain HTTP for listing discovery...")
+        try:
+            resp = fetcher.get(LIST_URL)
+            resp.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Could not fetch {LIST_URL} over plain HTTP: {e}")
+            return []
+
+        root = parse_html(resp.text)
+        if root is not None:
+            # x-data attributes hold the Alpine component state (entities already decoded)
+            for payload in root.xpath("//@x-data") + root.xpath("//script/text()"):
+                links = DETAIL_URL_PATTERN.findall(payload.replace("\\/", "/"))
+                candidates.extend(links)
+                if links and summaries is not None:
+                    # The price and status cells of each flat, so changed rows are re-fetched
+                    _summaries_from_json(_embedded_json(payload), summaries)
+
+        rendered_links = GO_TO_FLAT_PATTERN.findall(resp.text)
+        if summaries is not None and root is not None:
+            for tr in root.iter("tr"):
+                match = GO_TO_FLAT_PATTERN.search(tr.get("x-on:click") or "")
+                if match:
+                    summaries[urljoin(BASE, match.group(1))] = " ".join(tr.itertext())
+        if not candidates and rendered_links and root is not None:
+            # Only server-rendered rows were found. If the table is paginated they cover
+            # the first page only, so let the caller fall back to Selenium pagination.
+            page_buttons = root.xpath(
+                "//div[contains(concat(' ', @class, ' '), ' pagination ')]//li/button"
+            )
+            if (
+                sum(
+                    1
+                    for button in page_buttons
+                    if button.text and button.text.strip().isdigit()
+                )
+                > 1
+            ):
+                logger.info(
+                    "Only the first page of listings is rendered server-side; no data payload found."
+                )
+                return []
+        candidates.extend(rendered_links)
+
+    links = _unique_detail_links(candidates)
+    logger.info(f"Plain HTTP discovery found {len(links)} unique flat listing links.")
+    return links
+
+
+# Reads the whole pagination state of the listing page in a single WebDriver round-trip:
+# listing links, active page number and which button (if any) leads to the next page.
+# When called with `true` as its argument it also clicks that button.
+PAGE_STATE_FUNCTION = r"""
+function readPageState(click) {
+const links = [];
+const summaries = [];
+for (const tr of document.querySelectorAll("tr[x-on\\:click*='goToFlat']")) {
+    const match = /goToFlat\('([^']+)'/.exec(tr.getAttribute("x-on:click") || "");
+    if (match) {
+        links.push(match[1]);
+        summaries.push(tr.innerText);
+    }
+}
+let activePage = null;
+let next = null;
+let nextButton = null;
+const pagination = document.querySelector("div.pagination");
+if (pagination) {
+    for (const button of pagination.querySelectorAll("li > button")) {
+        const li = button.parentElement;
+        if (li.classList.contains("active")) {
+            const text = button.textContent.trim();
+            if (/^\d+$/.test(text)) activePage = parseInt(text, 10);
+            break;
+        }
+    }
+    const current = activePage || 1;
+    const nextCandidate = pagination.querySelector("li.pagination-next button");
+    if (nextCandidate) {
+        const onclick = nextCandidate.getAttribute("x-on:click") || nextCandidate.getAttribute("@click") || "";
+        if (onclick.includes("setPage(page + 1)") && !nextCandidate.hasAttribute("disabled")) {
+            nextButton = nextCandidate;
+            next = "next";
+        }
+    }
+    if (!nextButton) {
+        for (const button of pagination.querySelectorAll("li > button")) {
+            if (button.textContent.trim() === String(current + 1)
+                    && !button.parentElement.classList.contains("active")) {
+                nextButton = button;
+                next = "number";
+                break;
+            }
+        }
+    }
+}
+if (click && nextButton) nextButton.click();
+return {links: links, summaries: summaries, activePage: activePage, hasPagination: !!pagination, next: next};
+}
+"""
+PAGE_STATE_SCRIPT = PAGE_STATE_FUNCTION + "return readPageState(arguments[0]);"
+
+# Waits inside the browser for the listing to change (execute_async_script). A MutationObserver
+# watches the document; once the first listing link differs from `previousFirst` and the DOM has
+# been quiet for `settleMs`, the new page state is returned in the same call. With `click` set,
+# the next-page button is clicked after the observer is installed, so no change can be missed.
+# Resolves to null after `timeoutMs` (keep it below the driver's script timeout, 30 s by default).
+WAIT_FOR_PAGE_CHANGE_SCRIPT = (
+    PAGE_STATE_FUNCTION
+    + r"""
+const [click, previousFirst, timeoutMs, settleMs, done] = arguments;
+let finished = false;
+let settleTimer = null;
+function firstLink() {
+    const tr = document.querySelector("tr[x-on\\:click*='goToFlat']");
+    const match = tr && /goToFlat\('([^']+)'/.exec(tr.getAttribute("x-on:click") || "");
+    return match ? match[1] : null;
+}
+function finish(result) {
+    if (finished) return;
+    finished = true;
+    observer.disconnect();
+    clearTimeout(timeoutTimer);
+    clearTimeout(settleTimer);
+    done(result);
+}
+function check() {
+    const first = firstLink();
+    if (first && first !== previousFirst) {
+        clearTimeout(settleTimer);
+        settleTimer = setTimeout(() => finish(readPageState(false)), settleMs);
+    }
+}
+const observer = new MutationObserver(check);
+observer.observe(document.body, {childList: true, subtree: true, attributes: true});
+const timeoutTimer = setTimeout(() => finish(null), timeoutMs);
+if (click) readPageState(true);
+check();  // The listing may already have changed (e.g. after a WebDriver click)
+"""
+)
+
 
 def get_all_listing_links_with_pagination(driver):
     """
     Extracts all flat detail URLs across all paginated pages using Selenium.
+    Collects everything from iter_listing_links_with_pagination() into one list.
+
+    Parameters:
+    driver (selenium.webdriver.Chrome): The initialized Chrome WebDriver object.
+
+    Returns:
+    list: A list of unique flat detail URLs, in the order they were discovered.
+    """
+    return [
+        link
+        for page_links in iter_listing_links_with_pagination(driver)
+        for link in page_links
+    ]
+
+
+def iter_listing_links_with_pagination(driver, summaries=None):
+    """
+    Walks all paginated pages using Selenium and yields the new flat detail URLs of each page
+    as soon as the page is read, so detail fetching can start before pagination finishes.
+    In "batch" PAGINATION_MODE each page is read with a single injected script;
+    if that fails the classic per-element implementation is used instead.
+
+    Parameters:
+    driver (selenium.webdriver.Chrome): The initialized Chrome WebDriver object.
+    summaries (dict): Optional dict filled with {url: listing-table row text}.
+
+    Yields:
+    list: The flat detail URLs first seen on each page, in page order.
+
+    Returns:
+    bool: True if pagination reached the last page, False if it stopped before it.
+    """
+    if PAGINATION_MODE == "batch":
+        complete = yield from _timed_pages(
+            _iter_listing_links_batched(driver, summaries), "batch"
+        )
+        if complete is not None:
+            return complete
+        logger.warning(
+            "Batched pagination failed. Falling back to classic Selenium pagination."
+        )
+    return (
+        yield from _timed_pages(
+            _iter_listing_links_classic(driver, summaries), "classic"
+        )
+    )
+
+
+def _timed_pages(pages, mode):
+    # Records the time spent reading each page (not the time the consumer holds the generator)
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                page_links = next(pages)
+            except StopIteration as stop:
+                return stop.value
+            metrics.observe(
+                "pagination_page_seconds", time.perf_counter() - started, mode=mode
+            )
+            yield page_links
+    finally:
+        pages.close()
+
+
+def _wait_for_page_change(driver, previous_first_link, click=False):
+    """
+    Waits inside the browser (WAIT_FOR_PAGE_CHANGE_SCRIPT) until the listing shows a new page.
+
+    Parameters:
+    driver (selenium.webdriver.Chrome): The initialized Chrome WebDriver object.
+    previous_first_link (str): The first listing link of the current page.
+    click (bool): Whether to click the next-page button first.
+
+    Returns:
+    dict or None: The page state of the new page (as PAGE_STATE_SCRIPT returns it),
+                  or None if no change was seen in time (callers fall back to polling).
+    """
+    from selenium.common.exceptions import WebDriverException
+
+    try:
+        state = driver.execute_async_script(
+            WAIT_FOR_PAGE_CHANGE_SCRIPT,
+            click,
+            previous_first_link,
+            int(PAGE_CHANGE_TIMEOUT_SECONDS * 1000),
+            PAGE_SETTLE_MS,
+        )
+    except WebDriverException as e:
+        logger.warning("Page change observer failed: %s", e)
+        state = None
+    metrics.inc("page_change_waits_total", result="changed" if state else "timeout")
+    return state
+
+
+def _iter_listing_links_batched(driver, summaries=None):
+    """
+    Walks all pages using one WebDriver call per page: the next-page click and the wait for the
+    new rows happen in the same async script (PAGE_CHANGE_WAIT=poll falls back to polling).
+
+    Parameters:
+    driver (selenium.webdriver.Chrome): The initialized Chrome WebDriver object.
+    summaries (dict): Optional dict filled with {url: listing-table row text}.
+
+    Yields:
+    list: The flat detail URLs first seen on each page.
+
+    Returns:
+    bool: True once the last page was read, False if pagination stopped before it,
+          None if the first page could not be read (nothing is yielded in that case).
+    """
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import TimeoutException, WebDriverException
+
+    logger.info(f"Navigating to {LIST_URL} with Selenium for batched pagination...")
+    driver.get(LIST_URL)
+
+    wait = WebDriverWait(driver, 30)
+    all_links = {}
+    complete = True
+
+    def page_state(d):
+        state = d.execute_script(PAGE_STATE_SCRIPT, False)
+        return state if state["links"] else False
+
+    try:
+        state = wait.until(page_state)
+    except (TimeoutException, WebDriverException) as e:
+        logger.warning(f"Could not read the listing page with an injected script: {e}")
+        return None
+
+    while True:
+        page_new_links = []
+        if summaries is not None:
+            summaries.update(zip(state["links"], state["summaries"]))
+        for full_link in state["links"]:
+            if "/ponuka-bytov/byt/" in full_link and full_link not in all_links:
+                all_links[full_link] = None
+                page_new_links.append(full_link)
+        current_page = state["activePage"] or 1
+        logger.info(
+            f"Page {current_page}: found {len(page_new_links)} new links. Total unique links found so far: {len(all_links)}"
+        )
+        if page_new_links:
+            yield page_new_links
+
+        if not state["next"]:
+            logger.info("No suitable pagination button found. Reached last page.")
+            break
+
+        first_link_before_click = state["links"][0]
+        try:
+            logger.info(
+                f"Clicking '{state['next']}' button for page {current_page + 1}. Waiting for listings to change..."
+            )
+            if PAGE_CHANGE_WAIT == "observer":
+                new_state = _wait_for_page_change(
+                    driver, first_link_before_click, click=True
+                )
+            else:
+                driver.execute_script(PAGE_STATE_SCRIPT, True)
+                new_state = None
+            if new_state is None:
+                wait.until(
+                    lambda d: (page := page_state(d))
+                    and page["links"][0] != first_link_before_click
+                )
+                time.sleep(1)  # Small buffer after confirmation
+                metrics.inc("pagination_sleep_seconds_total", 1)
+                new_state = wait.until(page_state)
+            state = new_state
+        except (TimeoutException, WebDriverException) as e:
+            logger.error(
+                f"Error during page navigation or waiting for new content after click (expected page {current_page + 1}): {e}"
+            )
+            complete = False
+            break
+
+        if state["activePage"] and state["activePage"] <= current_page:
+            logger.warning(
+                f"Active page did not advance past {current_page}. Exiting pagination loop."
+            )
+            complete = False
+            break
+
+    logger.info(
+        f"Finished pagination. Collected {len(all_links)} unique flat listing links."
+    )
+    return complete
+
+
+def _iter_listing_links_classic(driver, summaries=None):
+    """
+    Walks all paginated pages using Selenium, inspecting the pagination buttons
+    and listing rows element by element.
 
     Parameters:
     driver (selenium.webdriver.Chrome): The initialized Chrome WebDriver object.
+    summaries (dict): Optional dict filled with {url: listing-table row text}.
+
+    Yields:
+    list: The flat detail URLs first seen on each page, in page order.
 
     Returns:
-    list: A list of unique flat detail URLs.
+    bool: True if pagination reached the last page, False if it stopped before it.
     """
+    from bs4 import BeautifulSoup
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import (
+        TimeoutException,
+        NoSuchElementException,
+        StaleElementReferenceException,
+        WebDriverException,
+    )
+
     logger.info(f"Navigating to {LIST_URL} with Selenium for pagination...")
     driver.get(LIST_URL)
 
     wait = WebDriverWait(driver, 30)
 
-    all_links = set()
+    # Dict used as an insertion-ordered set so the output order is deterministic
+    all_links = {}
+    # Set at the normal end conditions; any other exit means listings may be missing
+    complete = False
 
     # Loop indefinitely until explicit break condition is met
     while True:
@@ -66,9 +690,13 @@ def get_all_listing_links_with_pagination(driver):
                 )
             )
             logger.info("Listings content loaded.")
-            logger.debug(
-                f"First listing element found: {first_listing_element.tag_name} with text: {first_listing_element.text[:50]}..."
-            )
+            if logger.isEnabledFor(logging.DEBUG):
+                # tag_name and text are WebDriver round trips; only pay for them when logged
+                logger.debug(
+                    "First listing element found: %s with text: %s...",
+                    first_listing_element.tag_name,
+                    first_listing_element.text[:50],
+                )
         except TimeoutException:
             logger.warning(
                 "Timeout waiting for listings to appear on the current page. Exiting pagination loop."
@@ -88,7 +716,7 @@ def get_all_listing_links_with_pagination(driver):
 
         # 1. Scrape links from the current page
         logger.info("Extracting links from current page...")
-        current_page_links_count = 0
+        page_new_links = []
         # Variable to store IDs/identifiers of listings on the current page
         current_page_listing_ids = set()
 
@@ -99,6 +727,8 @@ def get_all_listing_links_with_pagination(driver):
             match = re.search(r"goToFlat\('([^']+)'", onclick_value)
             if match and "/ponuka-bytov/byt/" in match.group(1):
                 full_link = match.group(1)
+                if summaries is not None:
+                    summaries[full_link] = tr.get_text(" ", strip=True)
                 # Extract a unique identifier from the link for staleness check
                 listing_id_match = re.search(
                     r"byt/(\d+)/", full_link
@@ -107,18 +737,26 @@ def get_all_listing_links_with_pagination(driver):
                     current_page_listing_ids.add(listing_id_match.group(1))
 
                 if full_link not in all_links:
-                    all_links.add(full_link)
-                    current_page_links_count += 1
+                    all_links[full_link] = None
+                    page_new_links.append(full_link)
                     logger.debug(
-                        f"Added new link: {full_link}. Total unique: {len(all_links)}"
+                        "Added new link: %s. Total unique: %d",
+                        full_link,
+                        len(all_links),
                     )
                 else:
-                    logger.debug(f"Link already seen: {full_link}")
+                    logger.debug("Link already seen: %s", full_link)
 
         logger.info(
-            f"Found {current_page_links_count} new links on this page. Total unique links found so far: {len(all_links)}"
+            f"Found {len(page_new_links)} new links on this page. Total unique links found so far: {len(all_links)}"
+        )
+        logger.debug(
+            "Current page listing IDs collected: %d (%s)",
+            len(current_page_listing_ids),
+            current_page_listing_ids,
         )
-        logger.debug(f"Current page listing IDs collected: {current_page_listing_ids}")
+        if page_new_links:
+            yield page_new_links
 
         # 2. Determine current page number and find the next page button
         pagination_div = None
@@ -132,18 +770,20 @@ def get_all_listing_links_with_pagination(driver):
             logger.info(  # Info level because it's a normal end condition or minor issue
                 "Timeout waiting for pagination div. Assuming single page or end of pagination."
             )
+            complete = True
             break
         except NoSuchElementException:
             logger.info(
                 "Pagination div not found. Assuming single page or end of pagination."
             )
+            complete = True
             break
 
         all_pagination_buttons_elements = pagination_div.find_elements(
             By.CSS_SELECTOR, "li > button"
         )
         logger.debug(
-            f"Found {len(all_pagination_buttons_elements)} pagination buttons."
+            "Found %d pagination buttons.", len(all_pagination_buttons_elements)
         )
 
         current_active_page_num = 1
@@ -169,12 +809,13 @@ def get_all_listing_links_with_pagination(driver):
                         or "pagination-next" in parent_li_class
                     ):
                         logger.debug(
-                            f"Active class found on 'Previous' or 'Next' button's parent LI."
+                            "Active class found on 'Previous' or 'Next' button's parent LI."
                         )
                     break
-            except (NoSuchElementException, StaleElementReferenceException):
+            except (NoSuchElementException, StaleElementReferenceException) as e:
                 logger.debug(
-                    f"Skipping pagination button due to stale element or not found parent LI: {e}"
+                    "Skipping pagination button due to stale element or not found parent LI: %s",
+                    e,
                 )
                 continue
 
@@ -202,9 +843,11 @@ def get_all_listing_links_with_pagination(driver):
                         "The 'Next' button is disabled. Likely on the last page."
                     )
 
-        except (NoSuchElementException, StaleElementReferenceException):
+        except (NoSuchElementException, StaleElementReferenceException) as e:
             logger.debug(
-                f"No 'Next' navigation button (li.pagination-next) found or accessible: {e}. Trying numerical page button."
+                "No 'Next' navigation button (li.pagination-next) found or accessible: %s. "
+                "Trying numerical page button.",
+                e,
             )
 
         # If no 'Next' button was found, try to find the next numerical page button
@@ -221,13 +864,14 @@ def get_all_listing_links_with_pagination(driver):
                         if "active" not in parent_li_class:
                             next_page_button_to_click = button_el
                             logger.info(
-                                f"Identified numerical button for page {expected_next_page_num}."
+                                f"Identified numerical button for page {current_active_page_num + 1}."
                             )
                             break
                     except (NoSuchElementException, StaleElementReferenceException):
                         next_page_button_to_click = button_el
                         logger.debug(
-                            f"Identified numerical button for page {current_active_page_num + 1}, parent LI check failed."
+                            "Identified numerical button for page %d, parent LI check failed.",
+                            current_active_page_num + 1,
                         )
                         break
 
@@ -246,7 +890,8 @@ def get_all_listing_links_with_pagination(driver):
                     first_listing_link_before_click = match.group(1)
 
                 logger.debug(
-                    f"First listing link before click: {first_listing_link_before_click}"
+                    "First listing link before click: %s",
+                    first_listing_link_before_click,
                 )
 
                 driver.execute_script(
@@ -256,63 +901,74 @@ def get_all_listing_links_with_pagination(driver):
                     f"Clicked navigation button for page {current_active_page_num + 1}. Waiting for listings to change..."
                 )
 
-                # Wait conditions - robust enough for SPA (Single Page Application) content change:
-                # Wait until the first listing element is *stale* (meaning it's been replaced)
-                # or wait until the first listing's "onclick" value changes.
-                try:
-                    # Method 1: Wait for Staleness of the *old* first listing element
-                    wait.until(EC.staleness_of(first_tr_element_on_page))
-                    logger.info(
-                        "First listing element from previous page became stale."
-                    )
-                except TimeoutException:
-                    logger.info(
-                        "First listing element did not become stale. Trying to detect new content by ID."
-                    )
-                    # Method 2: If staleness times out (sometimes elements are only updated, not replaced)
-                    # Poll for a new listing to appear that is NOT one of the current page's IDs
-                    if (
-                        current_page_listing_ids
-                    ):  # Only if IDs have been actually extracted
-                        wait.until(
-                            lambda d: any(
-                                re.search(
-                                    r"byt/(\d+)/", tr.get_attribute("x-on:click")
-                                ).group(1)
-                                not in current_page_listing_ids
-                                for tr in d.find_elements(
-                                    By.CSS_SELECTOR, "tr[x-on\\:click*='goToFlat']"
-                                )
-                                if re.search(
-                                    r"byt/(\d+)/", tr.get_attribute("x-on:click")
-                                )
-                            )
+                # Let the browser report the change as soon as the table is re-rendered
+                page_changed = (
+                    PAGE_CHANGE_WAIT == "observer"
+                    and first_listing_link_before_click
+                    and _wait_for_page_change(driver, first_listing_link_before_click)
+                    is not None
+                )
+                if page_changed:
+                    logger.info("New listing content detected.")
+                else:
+                    # Wait conditions - robust enough for SPA (Single Page Application) content change:
+                    # Wait until the first listing element is *stale* (meaning it's been replaced)
+                    # or wait until the first listing's "onclick" value changes.
+                    try:
+                        # Method 1: Wait for Staleness of the *old* first listing element
+                        wait.until(EC.staleness_of(first_tr_element_on_page))
+                        logger.info(
+                            "First listing element from previous page became stale."
                         )
-                        logger.info("New listing content detected.")
-                    else:
-                        logger.warning(
-                            "No listing IDs extracted for current page to check for new content. Falling back to active button change."
+                    except TimeoutException:
+                        logger.info(
+                            "First listing element did not become stale. Trying to detect new content by ID."
                         )
-                        # As a last resort, wait for the new active button (if the other waits fail)
-                        # Note: "current_active_page_num" here refers to the *previous* page's number
-                        expected_next_page_num = current_active_page_num + 1
-                        wait.until(
-                            EC.presence_of_element_located(
-                                (
-                                    By.XPATH,
-                                    f"//div[@class='pagination']//li[contains(@class, 'active')]/button[text()='{expected_next_page_num}']",
+                        # Method 2: If staleness times out (sometimes elements are only updated, not replaced)
+                        # Poll for a new listing to appear that is NOT one of the current page's IDs
+                        if (
+                            current_page_listing_ids
+                        ):  # Only if IDs have been actually extracted
+                            wait.until(
+                                lambda d: any(
+                                    re.search(
+                                        r"byt/(\d+)/", tr.get_attribute("x-on:click")
+                                    ).group(1)
+                                    not in current_page_listing_ids
+                                    for tr in d.find_elements(
+                                        By.CSS_SELECTOR, "tr[x-on\\:click*='goToFlat']"
+                                    )
+                                    if re.search(
+                                        r"byt/(\d+)/", tr.get_attribute("x-on:click")
+                                    )
                                 )
                             )
-                            # EC.presence_of_element_located((By.XPATH, f"//div[@class='pagination pdt-20']//li[contains(@class, 'active')]/button[text()='{expected_next_page_num}']"))
-                        )
-                        logger.info(
-                            f"New active page button for page {expected_next_page_num} found (fallback)."
-                        )
+                            logger.info("New listing content detected.")
+                        else:
+                            logger.warning(
+                                "No listing IDs extracted for current page to check for new content. Falling back to active button change."
+                            )
+                            # As a last resort, wait for the new active button (if the other waits fail)
+                            # Note: "current_active_page_num" here refers to the *previous* page's number
+                            expected_next_page_num = current_active_page_num + 1
+                            wait.until(
+                                EC.presence_of_element_located(
+                                    (
+                                        By.XPATH,
+                                        f"//div[@class='pagination']//li[contains(@class, 'active')]/button[text()='{expected_next_page_num}']",
+                                    )
+                                )
+                                # EC.presence_of_element_located((By.XPATH, f"//div[@class='pagination pdt-20']//li[contains(@class, 'active')]/button[text()='{expected_next_page_num}']"))
+                            )
+                            logger.info(
+                                f"New active page button for page {expected_next_page_num} found (fallback)."
+                            )
 
-                logger.info(
-                    f"Navigation confirmed. Proceeding to scrape data for current page (now effectively page {current_active_page_num + 1})."
-                )
-                time.sleep(1)  # Small buffer after confirmation
+                    logger.info(
+                        f"Navigation confirmed. Proceeding to scrape data for current page (now effectively page {current_active_page_num + 1})."
+                    )
+                    time.sleep(1)  # Small buffer after confirmation
+                    metrics.inc("pagination_sleep_seconds_total", 1)
 
             except (
                 TimeoutException,
@@ -330,38 +986,57 @@ def get_all_listing_links_with_pagination(driver):
             logger.info(
                 "No suitable pagination button found to click (no next page number or 'Next' button available/non-active). Reached last page."
             )
+            complete = True
             break
 
     logger.info(
         f"Finished pagination. Collected {len(all_links)} unique flat listing links."
     )
-    return list(all_links)
+    return complete
 
 
-def parse_flat_detail_requests(url):
-    """
-    Parses flat detail from a URL using requests (assuming static content).
+def _strip_area(value):
+    return value.replace("m²", "").strip()
 
-    Parameters:
-    url (str): The URL of the flat detail page.
 
-    Returns:
-    dict: A dictionary containing parsed flat details.
-    Returns None if parsing fails or page is not found.
+def _strip_price(value):
+    return value.replace("€", "").replace(" ", "").strip()
+
+
+# Label -> (field, normalizer) dispatch tables for the detail page.
+# Entries are checked in order and the first label fragment contained in the label wins,
+# exactly like the original if/elif chains.
+SPAN_LABEL_FIELDS = (
+    ("Etapa", "stage", None),
+    ("Označenie", "apartment number", None),
+    ("Podlažie", "floor", None),
+    ("Celková výmera", "total area", _strip_area),
+    ("Počet izieb", "rooms", None),
+)
+ROW_LABEL_FIELDS = (
+    ("Výmera interiéru", "internal area", _strip_area),
+    ("Výmera exteriéru", "external area", _strip_area),
+    ("Stav", "status", None),
+    ("Cenníková cena s DPH", "price with VAT", _strip_price),
+    ("Zvýhodnená cena", "discounted price", _strip_price),
+)
+_LABEL_FIELDS = {"span": SPAN_LABEL_FIELDS, "row": ROW_LABEL_FIELDS}
+
+
+@lru_cache(maxsize=4096)
+def _match_label(kind, label):
     """
-    logger.info(f"Parsing detail for: {url} with requests...")
-    try:
-        resp = requests.get(url, headers=HEADERS, timeout=10)
-        resp.raise_for_status()
-        logger.debug(f"Successfully fetched {url} with status {resp.status_code}")
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error fetching detail page {url}: {e}", exc_info=True)
-        return None
+    Resolves a label to its (field, normalizer) pair, or None.
+    Memoized: the same few labels repeat on every detail page.
+    """
+    for fragment, field, normalizer in _LABEL_FIELDS[kind]:
+        if fragment in label:
+            return field, normalizer
+    return None
 
-    soup = BeautifulSoup(resp.text, "html.parser")
-    logger.debug(f"Page content for {url} parsed with BeautifulSoup.")
 
-    data = {
+def _empty_flat_details(url):
+    return {
         "url": url,
         "stage": None,
         "apartment number": None,
@@ -375,6 +1050,55 @@ def parse_flat_detail_requests(url):
         "discounted price": None,
     }
 
+
+def extract_flat_details(html, url):
+    """
+    Extracts the flat detail fields from the HTML of a detail page.
+    Uses the single-pass lxml extractor unless DETAIL_PARSER is set to "html.parser".
+
+    Parameters:
+    html (str): The HTML of the flat detail page.
+    url (str): The URL of the page (stored in the result).
+
+    Returns:
+    dict: A dictionary containing parsed flat details.
+    """
+    if DETAIL_PARSER == "html.parser":
+        return extract_flat_details_bs4(html, url)
+
+    data = _empty_flat_details(url)
+
+    # One traversal over all divs; labels are dispatched through the tables above and
+    # values normalized in the same pass. Later matches overwrite earlier ones, as before.
+    for kind, label_el, value_el in iter_label_value_blocks(parse_html(html)):
+        match = _match_label(kind, element_text(label_el))
+        if match:
+            field, normalizer = match
+            value = element_text(value_el)
+            data[field] = normalizer(value) if normalizer else value
+
+    return data
+
+
+def extract_flat_details_bs4(html, url):
+    """
+    Extracts the flat detail fields using BeautifulSoup with html.parser.
+    This is the original (slower) implementation, kept as a reference and fallback.
+
+    Parameters:
+    html (str): The HTML of the flat detail page.
+    url (str): The URL of the page (stored in the result).
+
+    Returns:
+    dict: A dictionary containing parsed flat details.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    logger.debug("Page content for %s parsed with BeautifulSoup.", url)
+
+    data = _empty_flat_details(url)
+
     # Pattern 1: Vertical label–value blocks
     for div in soup.find_all("div"):
         spans = div.find_all("span", recursive=False)
@@ -413,81 +1137,1043 @@ def parse_flat_detail_requests(url):
         elif "Zvýhodnená cena" in label:
             data["discounted price"] = value.replace("€", "").replace(" ", "").strip()
 
-    logger.info(f"Finished parsing detail for {url}.")
     return data
 
 
-def run_scraper():
+def parse_flat_detail_requests(
+    url, fetcher=None, cache=None, parse_pool=None, site=None
+):
     """
-    Main function to orchestrate the scraping process.
-    Uses Selenium to get listing links with pagination and requests to parse details.
+    Parses flat detail from a URL using requests (assuming static content).
+
+    When a cache is given, a conditional request is sent using the stored ETag / Last-Modified
+    validators. On a 304 Not Modified response, or when the downloaded body hashes to the same
+    value as last time, the previously parsed data is returned without parsing the HTML again.
 
     Parameters:
-    None
+    url (str): The URL of the flat detail page.
+    fetcher (PoliteFetcher): Optional shared fetcher (connection pool, rate limit).
+                             If None, a plain requests.get call is made.
+    cache (HttpCache): Optional on-disk response cache.
+    parse_pool (ParsePool): Optional process pool for the parse stage. The calling thread
+                            only fetches the page and gets a future of the parsed data back.
+    site (SiteAdapter): The site the page belongs to (defaults to ceresne.sk).
 
     Returns:
-    None
+    FlatRecord: The typed flat details (a Future of it when a parse pool is used).
+    Returns None if parsing fails or page is not found.
     """
-    driver = None
-    all_rows = []
+    logger.info("Parsing detail for: %s with requests...", url)
+    site = site or CERESNE
+    cached = cache.lookup(url) if cache else None
+    conditional_headers = HttpCache.conditional_headers(cached)
 
-    # Ensure the WebDriver is initialized and ready
     try:
-        logger.info("Starting WebDriver...")
-        driver = get_chrome_driver(headless=True)
+        if fetcher:
+            resp = fetcher.get(url, headers=conditional_headers)
+        else:
+            resp = requests.get(
+                url, headers={**HEADERS, **conditional_headers}, timeout=10
+            )
 
-        links = get_all_listing_links_with_pagination(driver)
+        if resp.status_code == 304 and cached:
+            cache.touch(url)
+            metrics.inc("detail_pages_total", result="not_modified")
+            logger.info("Detail page %s not modified, reusing cached data.", url)
+            return FlatRecord.from_dict(cached["data"])
 
-        logger.info("Parsing detail pages using requests...")
-        # ... (inside run_scraper function) ...
+        resp.raise_for_status()
+        logger.debug("Successfully fetched %s with status %s", url, resp.status_code)
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Error fetching detail page {url}: {e}", exc_info=True)
+        return None
+
+    content_hash = body_hash(resp.content)
+    if cached and cached.get("body_hash") == content_hash:
+        logger.info(
+            "Detail page %s unchanged (same body hash), reusing cached data.", url
+        )
+        metrics.inc("detail_pages_total", result="unchanged")
+        data = FlatRecord.from_dict(cached["data"])
+    elif parse_pool:
+        metrics.inc("detail_pages_total", result="parsed")
+        data = parse_pool.submit(resp.text, url)
+    else:
+        metrics.inc("detail_pages_total", result="parsed")
+        with metrics.timer("parse_seconds", mode="thread"):
+            data = site.extract(resp.text, url)
+
+    etag, last_modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+
+    def _finish(data):
+        # Typed here rather than in the extractor, so parse failures are reported in this process
+        record = data if isinstance(data, FlatRecord) else site.to_record(data)
+        if cache:
+            cache.store(url, etag, last_modified, content_hash, record.to_dict())
+        logger.info("Finished parsing detail for %s.", url)
+        return record
+
+    return then(data, _finish)
+
+
+def parse_flat_details_concurrently(
+    links, fetcher, max_workers=FETCH_WORKERS, cache=None
+):
+    """
+    Fetches and parses many detail pages in parallel using a bounded thread pool.
+    Politeness (per-host concurrency and request rate) is enforced by the fetcher.
+
+    Parameters:
+    links (list): Flat detail URLs to parse.
+    fetcher (PoliteFetcher): Shared fetcher used by all worker threads.
+    max_workers (int): Size of the thread pool.
+    cache (HttpCache): Optional on-disk response cache shared by all workers.
+
+    Returns:
+    list: Parsed FlatRecord objects, in the same order as `links`.
+          Links that failed to parse are left out.
+    """
+    logger.info(
+        f"Parsing {len(links)} detail pages with {max_workers} workers "
+        f"(per-host limit {fetcher.per_host_limit}-{fetcher.max_per_host_limit}, "
+        f"{fetcher.bucket.rate} req/s)..."
+    )
+    with ThreadPoolExecutor(
+        max_workers=max(1, max_workers), thread_name_prefix="detail"
+    ) as executor:
+        # executor.map yields results in input order, keeping the output deterministic
+        results = executor.map(
+            lambda url: parse_flat_detail_requests(url, fetcher=fetcher, cache=cache),
+            links,
+        )
+        return [row for row in results if row]
+
+
+def process_listing(
+    url,
+    fetcher=None,
+    cache=None,
+    state=None,
+    summaries=None,
+    parse_pool=None,
+    site=None,
+):
+    """
+    Returns the detail data of one listing, fetching its detail page only when needed.
+    Without a state store every page is fetched. With one, the stored data is reused unless the
+    listing is new, its listing-table summary row changed or its data is older than STATE_MAX_AGE_HOURS.
+
+    Parameters:
+    url (str): The URL of the flat detail page.
+    fetcher (PoliteFetcher): Optional shared fetcher.
+    cache (HttpCache): Optional on-disk response cache.
+    state (ListingStateStore): Optional persistent listing state.
+    summaries (dict): Optional {url: listing-table row text} collected during discovery.
+    parse_pool (ParsePool): Optional process pool for the parse stage.
+    site (SiteAdapter): The site the listing belongs to (defaults to ceresne.sk).
+
+    Returns:
+    FlatRecord: The typed flat details, or None if parsing failed
+                (a Future of it when the page is parsed in the parse pool).
+    """
+    if state is None:
+        return parse_flat_detail_requests(
+            url, fetcher=fetcher, cache=cache, parse_pool=parse_pool, site=site
+        )
+
+    flat_id = flat_id_from_url(url)
+    summary_hash = text_hash(summaries.get(url)) if summaries else None
+    stored = state.get(flat_id)
+    reason = ListingStateStore.fetch_reason(
+        stored, summary_hash, STATE_MAX_AGE_HOURS * 3600
+    )
+
+    if reason is None:
+        metrics.inc("detail_pages_total", result="stored")
+        logger.debug("Listing %s unchanged, reusing stored data.", flat_id)
+        state.mark_seen(flat_id, url, summary_hash)
+        return dataclasses.replace(FlatRecord.from_dict(stored["data"]), url=url)
 
-        logger.info("\nParsing detail pages using requests...")
+    logger.debug("Fetching listing %s (%s).", flat_id, reason)
 
-        # Loop through all collected links and parse details
-        for full_url in links:
-            detail_data = parse_flat_detail_requests(full_url)
-            if detail_data:
-                all_rows.append(detail_data)
+    def _record(data):
+        if data:
+            state.record(flat_id, url, summary_hash, data.to_dict())
+        return data
+
+    return then(
+        parse_flat_detail_requests(
+            url, fetcher=fetcher, cache=cache, parse_pool=parse_pool, site=site
+        ),
+        _record,
+    )
+
+
+def iter_listing_link_batches(fetcher, summaries=None, timer=None, driver_pool=None):
+    """
+    Yields batches of flat detail URLs from the configured discovery method.
+    Plain HTTP discovery yields a single batch; the Selenium fallback yields one batch per page
+    and starts Chrome only when needed (the browser is quit when the generator finishes or is closed).
+
+    Parameters:
+    fetcher (PoliteFetcher): Shared fetcher used for plain HTTP discovery.
+    summaries (dict): Optional dict filled with {url: listing-table row text}.
+    timer (StartupTimer): Optional startup timer; reported when the first batch is ready.
+    driver_pool (DriverPool): Optional pool of warm browsers (daemon mode). Without it a browser
+                              is started for this run and quit afterwards.
+
+    Yields:
+    list: Flat detail URLs, in discovery order.
+
+    Returns:
+    bool: False if Selenium pagination stopped before the last page, otherwise True.
+    """
+    timer = timer or StartupTimer()
+
+    if LISTING_DISCOVERY in ("auto", "http"):
+        links = get_all_listing_links_http(fetcher, summaries)
+        timer.mark("http discovery")
+        if links:
+            timer.report()
+            yield links
+            return True
+
+    if LISTING_DISCOVERY in ("auto", "selenium"):
+        if LISTING_DISCOVERY == "auto":
+            logger.info(
+                "Plain HTTP discovery found no links. Falling back to Selenium pagination."
+            )
+        if driver_pool:
+            from webdriver import report_network_stats
+
+            with driver_pool.driver() as driver:
+                timer.mark("warm browser")
+                try:
+                    return (
+                        yield from _report_first_page(
+                            iter_listing_links_with_pagination(driver, summaries), timer
+                        )
+                    )
+                finally:
+                    # The pooled driver outlives the run: report this run's network usage now
+                    report_network_stats(driver)
+
+        # Selenium (and webdriver-manager, if needed) are only imported on this path
+        from webdriver import get_chrome_driver, quit_driver
+
+        timer.mark("selenium import")
+        driver = None
+        try:
+            # Ensure the WebDriver is initialized and ready
+            logger.info("Starting WebDriver...")
+            driver = get_chrome_driver(headless=True, timer=timer)
+            return (
+                yield from _report_first_page(
+                    iter_listing_links_with_pagination(driver, summaries), timer
+                )
+            )
+        finally:
+            logger.info("Quitting WebDriver...")
+            if driver:
+                quit_driver(driver)
+
+
+def _report_first_page(pages, timer):
+    # Reports the startup timer once the first listing page is read; returns what `pages` returns
+    try:
+        while True:
+            try:
+                page_links = next(pages)
+            except StopIteration as stop:
+                return stop.value
+            if not timer.reported:
+                timer.mark("first listing page")
+                timer.report()
+            yield page_links
+    finally:
+        pages.close()
+
+
+def _skip_completed(batches, completed):
+    """
+    Filters already written URLs out of the discovered batches (used when resuming).
+    Closes the underlying generator when done so the browser is released.
+    Returns what `batches` returns.
+    """
+    try:
+        while True:
+            try:
+                batch = next(batches)
+            except StopIteration as stop:
+                return stop.value
+            remaining = [url for url in batch if url not in completed]
+            if remaining:
+                yield remaining
+    finally:
+        batches.close()
+
+
+class CeresneSite(SiteAdapter):
+    """
+    ceresne.sk, the first site adapter: listing discovery over plain HTTP with the Selenium
+    pagination fallback, and detail pages extracted with the label tables above. The URLs and the
+    output file are read from the module settings when used.
+    """
+
+    name = "ceresne"
+
+    @property
+    def base_url(self):
+        return BASE
+
+    @property
+    def list_url(self):
+        return LIST_URL
+
+    @property
+    def output_filename(self):
+        return OUTPUT_FILENAME
+
+    def iter_link_batches(self, fetcher, summaries=None, timer=None, driver_pool=None):
+        return iter_listing_link_batches(fetcher, summaries, timer, driver_pool)
+
+    def extract(self, html, url):
+        return extract_flat_details(html, url)
+
+
+CERESNE = register_site(CeresneSite())
+
+
+def _make_fetcher(site=None, shared=None):
+    # Each site gets its own rate and per-host limits; with shared resources the session
+    # and the global connection budget are shared with the other sites
+    per_host_limit = PER_HOST_CONCURRENCY
+    requests_per_second = REQUESTS_PER_SECOND
+    if site and site.per_host_concurrency is not None:
+        per_host_limit = site.per_host_concurrency
+    if site and site.requests_per_second is not None:
+        requests_per_second = site.requests_per_second
+    return PoliteFetcher(
+        headers=HEADERS,
+        per_host_limit=per_host_limit,
+        requests_per_second=requests_per_second,
+        max_per_host_limit=max(MAX_PER_HOST_CONCURRENCY, per_host_limit),
+        max_retries=FETCH_MAX_RETRIES,
+        backoff_seconds=FETCH_BACKOFF_SECONDS,
+        max_backoff_seconds=FETCH_MAX_BACKOFF_SECONDS,
+        session=shared.session if shared else None,
+        connection_budget=shared.connection_budget if shared else None,
+    )
+
+
+def report_failed_urls(failures, path=None):
+    """
+    Logs the URLs that could not be fetched and writes them to FAILED_URLS_FILE
+    (one "url<TAB>reason" line each), so no listing is lost silently. A list left by an
+    earlier run is removed when nothing failed.
+
+    Parameters:
+    failures (dict): {url: reason}
+    path (str): The list to write (defaults to FAILED_URLS_FILE).
+    """
+    path = FAILED_URLS_FILE if path is None else path
+    if failures:
+        logger.warning(f"{len(failures)} URLs could not be fetched:")
+        for url, reason in failures.items():
+            logger.warning(f"  {url}: {reason}")
+    if not path:
+        return
+    try:
+        if failures:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, "w", encoding="utf8") as f:
+                for url, reason in failures.items():
+                    f.write(f"{url}\t{reason}\n")
+            logger.info(f"Failed URLs written to {path}")
+        elif os.path.exists(path):
+            os.remove(path)
+    except OSError as e:
+        logger.error(f"Could not write the failed URL list {path}: {e}")
+
+
+def write_run_metrics(status, rows, failed, **summary):
+    """
+    Adds the run totals to the metrics and writes the JSON run report and the Prometheus
+    textfile (RUN_REPORT_FILE / METRICS_TEXTFILE).
+
+    Parameters:
+    status (str): "success", "empty" or "failed".
+    rows (int): Rows written.
+    failed (int): Listings that produced no row.
+    **summary: Extra fields for the JSON run report (e.g. per-site summaries).
+    """
+    duration = time.time() - metrics.started
+    rows_per_second = rows / duration if duration > 0 else 0.0
+    metrics.set_gauge("run_duration_seconds", round(duration, 3))
+    metrics.set_gauge("rows_written", rows)
+    metrics.set_gauge("listings_failed", failed)
+    metrics.set_gauge("rows_per_second", round(rows_per_second, 3))
+    metrics.set_gauge("run_success", int(status != "failed"))
+    metrics.set_gauge("last_run_timestamp_seconds", round(time.time()))
+    logger.info(
+        f"Run {status}: {rows} rows in {duration:.1f}s ({rows_per_second:.2f} rows/s), "
+        f"{failed} listings failed."
+    )
+    write_run_report(
+        metrics,
+        report_path=RUN_REPORT_FILE,
+        prometheus_path=METRICS_TEXTFILE,
+        status=status,
+        duration_seconds=round(duration, 3),
+        rows=rows,
+        rows_per_second=round(rows_per_second, 3),
+        listings_failed=failed,
+        **summary,
+    )
+
+
+def record_run_changes(records, failures, site=None, discovery_complete=True):
+    """
+    Appends the changes of a successful run (compared with the previous runs) to the change log.
+    Flats that produced no record are still listed, so they are not reported as delisted; when
+    discovery stopped before the end of the listing, no flat is.
+
+    Parameters:
+    records (iterable): The FlatRecord objects of the run.
+    failures (iterable): URLs that were discovered but produced no record.
+    site (SiteAdapter): The crawled site (defaults to ceresne.sk); each site has its own log.
+    discovery_complete (bool): Whether discovery covered the whole listing.
+
+    Returns:
+    None
+    """
+    site = site or CERESNE
+    log_path = site_path(CHANGE_LOG_FILE, site.name)
+    if not log_path:
+        return
+    if not discovery_complete:
+        logger.warning(
+            "Listing discovery stopped early; flats not seen this run are not reported as delisted."
+        )
+    try:
+        events = record_changes(
+            records,
+            log_path,
+            failures,
+            run_id=current_run_id(),
+            delist=discovery_complete,
+        )
+    except (OSError, ValueError, sqlite3.Error) as e:
+        logger.error(f"Could not update the change log {log_path}: {e}")
+        metrics.inc("errors_total", type=type(e).__name__)
+        return
+    for event in events:
+        metrics.inc("change_events_total", type=event["type"])
+
+
+def _tracking_completion(batches, discovery):
+    """
+    Passes the discovered batches through and sets discovery["complete"] once they are exhausted:
+    False if discovery returned False (it stopped before the end of the listing), else True.
+    """
+    discovery["complete"] = (yield from batches) is not False
+
+
+def _make_cache():
+    if not HTTP_CACHE_DIR:
+        return None
+    return HttpCache(
+        HTTP_CACHE_DIR,
+        max_age_days=HTTP_CACHE_MAX_AGE_DAYS,
+        max_size_mb=HTTP_CACHE_MAX_MB,
+    )
+
+
+def _open_detail_resources(site=None, shared=None):
+    """
+    Creates the shared fetcher, the HTTP cache and the listing state store (each optional
+    according to the configuration) used to process detail pages.
+
+    Parameters:
+    site (SiteAdapter): The crawled site (defaults to ceresne.sk); each site has its own state store.
+    shared (SharedResources): Resources shared with other sites (session, budget, cache).
+
+    Returns:
+    tuple: (PoliteFetcher, HttpCache or None, ListingStateStore or None)
+    """
+    site = site or CERESNE
+    fetcher = _make_fetcher(site, shared)
+    try:
+        cache = shared.cache if shared else _make_cache()
+        state_path = site_path(STATE_DB_PATH, site.name)
+        state = ListingStateStore(state_path) if state_path else None
+    except BaseException:
+        fetcher.close()
+        raise
+    return fetcher, cache, state
+
+
+def run_scraper(resume=False, timer=None, driver_pool=None, site=None, shared=None):
+    """
+    Main function to orchestrate the scraping process.
+    Discovers listing links over plain HTTP (falling back to Selenium pagination)
+    and uses requests to parse details. Discovery, detail parsing and CSV writing
+    run as a streaming pipeline, so detail pages are fetched while pagination continues.
+    Rows are streamed to a temporary file with periodic checkpoints, which replaces the
+    previous output only when the run succeeds.
+
+    Parameters:
+    resume (bool): If True, continue an interrupted run from its last checkpoint,
+                   skipping links that were already written.
+    timer (StartupTimer): Optional startup timer (marks the setup and discovery phases).
+    driver_pool (DriverPool): Optional pool of warm browsers for the Selenium fallback (daemon mode).
+    site (SiteAdapter): The site to crawl (defaults to ceresne.sk).
+    shared (SharedResources): Resources shared with sites crawled at the same time (run_sites()).
+                              The caller then owns the metrics, the run report and the cache.
+
+    Returns:
+    dict: The run summary: {"status": "success"/"empty"/"failed", "rows": ..., "failed": ...}.
+    """
+    site = site or CERESNE
+    if shared:
+        driver_pool = shared.driver_pool
+    fetcher = None
+    state = None
+    output = None
+    parse_pool = None
+    pipeline = None
+    status = "failed"
+    if not shared:
+        metrics.reset()
+
+    try:
+        fetcher, cache, state = _open_detail_resources(site, shared)
+        if PARSE_PROCESSES != "0":
+            parse_pool = ParsePool(
+                site.extract,
+                processes=int(PARSE_PROCESSES) if PARSE_PROCESSES else None,
+                batch_size=PARSE_BATCH_SIZE,
+                max_delay=PARSE_BATCH_DELAY_MS / 1000,
+            )
+            logger.info(
+                f"Parsing detail pages in {parse_pool.processes} processes "
+                f"(batches of up to {PARSE_BATCH_SIZE})."
+            )
+        # Listing-table row text per URL, filled in by discovery and read by the workers
+        summaries = {}
+
+        output = CheckpointedCsvWriter(
+            site.output_filename,
+            FIELDNAMES,
+            resume=resume,
+            checkpoint_every=CHECKPOINT_EVERY_ROWS,
+            checkpoint_seconds=CHECKPOINT_EVERY_SECONDS,
+        )
+        if timer:
+            timer.mark("setup")
+        batches = site.iter_link_batches(fetcher, summaries, timer, driver_pool)
+        if output.completed:
+            batches = _skip_completed(batches, output.completed)
+        discovery = {"complete": False}
+        batches = _tracking_completion(batches, discovery)
+
+        logger.info("Discovering listings and parsing detail pages using requests...")
+        extra_depths = {}
+        if parse_pool:
+            extra_depths = {
+                "parse_queue": lambda: parse_pool.queued,
+                "parse_in_flight": lambda: parse_pool.in_flight,
+            }
+        pipeline = StreamingPipeline(
+            process=lambda url: process_listing(
+                url,
+                fetcher=fetcher,
+                cache=cache,
+                state=state,
+                summaries=summaries,
+                parse_pool=parse_pool,
+                site=site,
+            ),
+            write_row=lambda record: output.write_row(record.to_row()),
+            workers=FETCH_WORKERS,
+            queue_size=PIPELINE_QUEUE_SIZE,
+            report_seconds=PIPELINE_REPORT_SECONDS,
+            extra_depths=extra_depths,
+        )
+        pipeline.run(batches)
+        report_failed_urls(
+            dict(fetcher.failed_urls), site_path(FAILED_URLS_FILE, site.name)
+        )
+
+        if cache and not shared:
+            cache.evict()
 
         # Check if any rows were collected
-        if all_rows:
-            logger.info(f"Successfully scraped {len(all_rows)} flat details.")
-            output_filename = "/app/output/ceresne_flats.csv"
-
-            # Save the results to a CSV file
-            with open(output_filename, "w", newline="", encoding="utf8") as f:
-                fieldnames = [
-                    "url",
-                    "stage",
-                    "apartment number",
-                    "floor",
-                    "total area",
-                    "rooms",
-                    "internal area",
-                    "external area",
-                    "status",
-                    "price with VAT",
-                    "discounted price",
-                ]
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(all_rows)
-            logger.info(f"Data saved to {output_filename}")
+        if output.total_rows:
+            logger.info(f"Successfully scraped {output.total_rows} flat details.")
+            output.commit()
+            # Read back from the committed CSV (which also holds the rows of a resumed run),
+            # so memory doesn't grow with the number of listings
+            if SNAPSHOT_DIR:
+                write_snapshot(
+                    read_csv_records(site.output_filename),
+                    site_path(SNAPSHOT_DIR, site.name),
+                )
+            # Flats that failed to fetch, parse or process are still listed
+            record_run_changes(
+                read_csv_records(site.output_filename),
+                set(fetcher.failed_urls) | set(pipeline.failed_links),
+                site,
+                discovery_complete=discovery["complete"],
+            )
+            status = "success"
         else:
             logger.info("No data found or scraped.")
+            output.discard()
+            status = "empty"
+        output = None
 
     except Exception as e:
         logger.critical(f"An unexpected error occurred in run_scraper: {e}")
+        metrics.inc("errors_total", type=type(e).__name__)
+    finally:
+        logger.info("Cleaning up...")
+        summary = {
+            "status": status,
+            "rows": pipeline.rows_written if pipeline else 0,
+            "failed": pipeline.failed_urls if pipeline else 0,
+        }
+        if not shared:
+            write_run_metrics(status, rows=summary["rows"], failed=summary["failed"])
+        if output:
+            # The run failed part-way: keep what was written for --resume
+            output.abort()
+        if parse_pool:
+            parse_pool.close()
+        if fetcher:
+            fetcher.close()
+        if state:
+            state.close()
+    return summary
+
+
+def run_sites(resume=False, timer=None, driver_pool=None):
+    """
+    Crawls the sites configured in SITES. A single site runs as before (run_scraper()); several
+    sites are crawled concurrently (at most MAX_PARALLEL_SITES at a time) by a SiteScheduler.
+    They share one HTTP session whose requests in flight are capped at GLOBAL_MAX_CONNECTIONS,
+    the HTTP cache and a browser pool, while each keeps its own rate limits, output, state store,
+    change log and failed-URL list. The run report covers all sites, with a summary per site.
+
+    Parameters:
+    resume (bool): If True, each site continues its interrupted run from its last checkpoint.
+    timer (StartupTimer): Optional startup timer (single-site runs only).
+    driver_pool (DriverPool): Optional pool of warm browsers (daemon mode). Without it, a pool
+                              is created for a multi-site run and closed afterwards.
+
+    Returns:
+    dict: {site name: run summary}
+    """
+    sites = get_sites(SITES)
+    if len(sites) == 1:
+        return {
+            sites[0].name: run_scraper(
+                resume=resume, timer=timer, driver_pool=driver_pool, site=sites[0]
+            )
+        }
+
+    metrics.reset()
+    own_pool = driver_pool is None
+    if own_pool:
+        driver_pool = DriverPool(
+            _start_pooled_driver,
+            _quit_pooled_driver,
+            size=DRIVER_POOL_SIZE,
+            max_uses=DRIVER_MAX_USES,
+        )
+    shared = SharedResources(
+        headers=HEADERS,
+        max_connections=GLOBAL_MAX_CONNECTIONS,
+        cache=_make_cache(),
+        driver_pool=driver_pool,
+        hosts=len(sites),
+    )
+    summaries = {}
+    try:
+        scheduler = SiteScheduler(
+            lambda site: run_scraper(resume=resume, site=site, shared=shared),
+            max_parallel=MAX_PARALLEL_SITES,
+        )
+        summaries = scheduler.run(sites)
+        if shared.cache:
+            shared.cache.evict()
+    finally:
+        for name, summary in summaries.items():
+            metrics.set_gauge("site_rows_written", summary.get("rows", 0), site=name)
+            metrics.set_gauge(
+                "site_run_success", int(summary["status"] != "failed"), site=name
+            )
+        write_run_metrics(
+            overall_status(summaries),
+            rows=sum(summary.get("rows", 0) for summary in summaries.values()),
+            failed=sum(summary.get("failed", 0) for summary in summaries.values()),
+            sites=summaries,
+        )
+        shared.close()
+        if own_pool:
+            driver_pool.close()
+    return summaries
+
+
+def _spawn_worker(worker_id):
+    # Workers are plain scraper processes, so they could equally be started on other nodes
+    # that share WORK_QUEUE_PATH and the output volume
+    return subprocess.Popen(
+        [
+            sys.executable,
+            os.path.abspath(__file__),
+            "--worker",
+            "--worker-id",
+            worker_id,
+        ],
+        # Worker log lines carry the coordinator's run ID
+        env={**os.environ, "RUN_ID": current_run_id()},
+    )
+
+
+def run_coordinator(workers, resume=False):
+    """
+    Coordinator/worker mode: discovers the listing links and enqueues them in a durable
+    SQLite work queue, while `workers` worker processes lease batches of URLs and process them.
+    Leases of a crashed worker expire and are handed to the remaining workers. When the queue
+    is drained, the results are written to the output in discovery order.
+
+    Parameters:
+    workers (int): Number of worker processes to start.
+    resume (bool): If True, keep the queue of an interrupted run: finished URLs are not
+                   processed again and unfinished ones are picked up.
+
+    Returns:
+    None
+    """
+    if get_sites(SITES) != [CERESNE]:
+        logger.warning(
+            "Coordinator/worker mode crawls ceresne.sk only; SITES is ignored."
+        )
+    work_queue = WorkQueue(WORK_QUEUE_PATH, max_attempts=WORK_MAX_ATTEMPTS)
+    if resume:
+        work_queue.set_flag("discovery_done", False)
+        # The report covers this run; metrics of the interrupted run's workers are dropped
+        work_queue.clear_metrics()
+        logger.info(f"Resuming work queue: {work_queue.counts()}")
+    else:
+        work_queue.reset()
+
+    fetcher = None
+    processes = []
+    status, rows, failed = "failed", 0, 0
+    metrics.reset()
+    try:
+        processes = [_spawn_worker(f"worker-{i + 1}") for i in range(workers)]
+        logger.info(f"Started {len(processes)} worker processes.")
+
+        fetcher = _make_fetcher()
+        summaries = {}
+        discovery = {"complete": False}
+        for batch in _tracking_completion(
+            iter_listing_link_batches(fetcher, summaries), discovery
+        ):
+            added = work_queue.enqueue(batch, summaries)
+            logger.info(f"Enqueued {added} of {len(batch)} discovered links.")
+        work_queue.set_flag("discovery_done", True)
+        logger.info("Discovery finished. Waiting for the workers...")
+
+        last_progress = 0
+        while work_queue.remaining():
+            if all(process.poll() is not None for process in processes):
+                logger.error(
+                    f"All workers exited with work remaining ({work_queue.counts()}). "
+                    "Rerun with --resume to continue."
+                )
+                return
+            if time.monotonic() - last_progress >= 30:
+                logger.info(f"Work queue: {work_queue.counts()}")
+                last_progress = time.monotonic()
+            time.sleep(WORK_POLL_SECONDS)
+
+        for process in processes:
+            process.wait()
+
+        counts = work_queue.counts()
+        failed = counts["failed"]
+        logger.info(f"Work queue drained: {counts}")
+        if counts["failed"]:
+            logger.warning(
+                f"{counts['failed']} URLs failed after {WORK_MAX_ATTEMPTS} attempts."
+            )
+        report_failed_urls(dict(work_queue.failed()))
+        if not counts["done"]:
+            logger.info("No data found or scraped.")
+            status = "empty"
+            return
+
+        output = CheckpointedCsvWriter(OUTPUT_FILENAME, FIELDNAMES)
+        try:
+            for row in work_queue.iter_results():
+                output.write_row(FlatRecord.from_dict(row).to_row())
+        except BaseException:
+            output.abort()
+            raise
+        logger.info(f"Successfully scraped {output.total_rows} flat details.")
+        output.commit()
+        if SNAPSHOT_DIR:
+            write_snapshot(read_csv_records(OUTPUT_FILENAME), SNAPSHOT_DIR)
+        record_run_changes(
+            read_csv_records(OUTPUT_FILENAME),
+            dict(work_queue.failed()),
+            discovery_complete=discovery["complete"],
+        )
+        status, rows = "success", output.total_rows
+
+    except Exception as e:
+        logger.critical(f"An unexpected error occurred in run_coordinator: {e}")
+        metrics.inc("errors_total", type=type(e).__name__)
+    finally:
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+        for process in processes:
+            process.wait()
+        # Detail fetching and parsing happen in the workers: add their metrics to discovery's
+        try:
+            for dumped in work_queue.worker_metrics():
+                metrics.merge(dumped)
+        except Exception as e:
+            logger.error(f"Could not read the worker metrics: {e}")
+        write_run_metrics(status, rows=rows, failed=failed)
+        if fetcher:
+            fetcher.close()
+        work_queue.close()
+
+
+def _process_leased(url, fetcher, cache, state, summaries):
+    try:
+        return (
+            process_listing(
+                url, fetcher=fetcher, cache=cache, state=state, summaries=summaries
+            ),
+            None,
+        )
+    except Exception as e:
+        logger.error(f"Unexpected error while processing {url}: {e}", exc_info=True)
+        return None, str(e)
+
+
+def run_worker(worker_id):
+    """
+    Worker process of the coordinator/worker mode: leases batches of URLs from the work queue,
+    processes them with FETCH_WORKERS threads and reports each result, until discovery is
+    finished and no work is left. Its metrics are stored in the queue for the coordinator's
+    run report.
+
+    Parameters:
+    worker_id (str): Identifier recorded with the leases.
+
+    Returns:
+    None
+    """
+    work_queue = WorkQueue(WORK_QUEUE_PATH, max_attempts=WORK_MAX_ATTEMPTS)
+    fetcher = state = None
+    processed = 0
+    try:
+        fetcher, cache, state = _open_detail_resources()
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+            while True:
+                leased = work_queue.lease(
+                    worker_id, WORK_BATCH_SIZE, WORK_LEASE_SECONDS
+                )
+                if not leased:
+                    if (
+                        work_queue.get_flag("discovery_done")
+                        and not work_queue.remaining()
+                    ):
+                        break
+                    time.sleep(WORK_POLL_SECONDS)
+                    continue
+
+                summaries = dict(leased)
+                urls = [url for url, _ in leased]
+                results = executor.map(
+                    lambda url: _process_leased(url, fetcher, cache, state, summaries),
+                    urls,
+                )
+                for url, (row, error) in zip(urls, results):
+                    if row:
+                        work_queue.complete(url, row.to_dict())
+                        processed += 1
+                    else:
+                        work_queue.fail(url, error or "no data extracted")
+                # After every batch, so a crashed worker loses at most one batch of metrics
+                work_queue.save_metrics(worker_id, metrics.dump())
+        logger.info("%s: finished after processing %d URLs.", worker_id, processed)
     finally:
-        logger.info("Quitting WebDriver and cleaning up...")
-        if driver:
-            quit_driver(driver)
+        if fetcher:
+            fetcher.close()
+        if state:
+            state.close()
+        work_queue.close()
+
+
+def _start_pooled_driver():
+    from webdriver import get_chrome_driver
+
+    return get_chrome_driver(headless=True)
+
+
+def _quit_pooled_driver(driver):
+    from webdriver import quit_driver
+
+    quit_driver(driver)
+
+
+def run_daemon(resume=False):
+    """
+    Runs the scraper as a resident process instead of one container per run.
+    Runs start on the interval timer, when DAEMON_TRIGGER_FILE appears or on a "run" command
+    sent to DAEMON_SOCKET. Browsers for the Selenium fallback are kept warm between runs,
+    health-checked before each use and replaced after DRIVER_MAX_USES runs.
+
+    Parameters:
+    resume (bool): If True, the first run continues an interrupted run from its last checkpoint.
+
+    Returns:
+    None
+    """
+    scheduler = RunScheduler(
+        DAEMON_INTERVAL_MINUTES * 60,
+        trigger_file=DAEMON_TRIGGER_FILE or None,
+        socket_path=DAEMON_SOCKET or None,
+    )
+    driver_pool = DriverPool(
+        _start_pooled_driver,
+        _quit_pooled_driver,
+        size=DRIVER_POOL_SIZE,
+        max_uses=DRIVER_MAX_USES,
+    )
+    try:
+        scheduler.start()
+        if LISTING_DISCOVERY == "selenium":
+            # Every run needs a browser: pay for the launch before the first trigger
+            driver_pool.warm()
+
+        while True:
+            reason = scheduler.wait()
+            # Each run gets its own correlation ID in the log
+            run_id = new_run_id()
+            logger.info(
+                f"Daemon: starting run #{scheduler.runs + 1} ({reason}), run ID {run_id}."
+            )
+            started = time.perf_counter()
+            scheduler.run_started()
+            try:
+                run_sites(resume=resume, timer=StartupTimer(), driver_pool=driver_pool)
+            finally:
+                scheduler.run_finished()
+            resume = False  # Only the first run picks up an interrupted checkpoint
+
+            next_run = (
+                f"next timer run in {DAEMON_INTERVAL_MINUTES:g} min"
+                if DAEMON_INTERVAL_MINUTES
+                else "waiting for a trigger"
+            )
+            logger.info(
+                f"Daemon: run finished in {time.perf_counter() - started:.1f}s "
+                f"(browsers started so far: {driver_pool.created}); {next_run}."
+            )
+    finally:
+        logger.info("Daemon: shutting down...")
+        scheduler.close()
+        driver_pool.close()
+
+
+def parse_args():
+    """
+    Parses the command line arguments.
+
+    Returns:
+    argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Scrape flat listings from ceresne.sk (and other registered sites)."
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted run from its last checkpoint instead of starting over.",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Stay resident and run on a schedule or on triggers, keeping browsers warm between runs.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Process detail pages in this many worker processes fed by a durable work queue.",
+    )
+    parser.add_argument(
+        "--worker",
+        action="store_true",
+        help="Run as a worker of the coordinator/worker mode (started by --workers).",
+    )
+    parser.add_argument(
+        "--worker-id", default=f"worker-{os.getpid()}", help=argparse.SUPPRESS
+    )
+    parser.add_argument(
+        "--trigger",
+        action="store_true",
+        help="Ask a running daemon (via DAEMON_SOCKET) to start a run now, then exit.",
+    )
+    parser.add_argument(
+        "--status",
+        action="store_true",
+        help="Print the status of a running daemon (via DAEMON_SOCKET), then exit.",
+    )
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    # 1. Setup logging first
-    setup_logging()
+    startup = StartupTimer(_PROCESS_STARTED)
+    startup.mark("imports")
+    args = parse_args()
+
+    if args.trigger or args.status:
+        # Client mode: talk to the running daemon and exit
+        try:
+            print(send_command(DAEMON_SOCKET, "run" if args.trigger else "status"))
+        except OSError as e:
+            sys.exit(f"Could not reach the scraper daemon at {DAEMON_SOCKET}: {e}")
+        sys.exit(0)
+
+    # Treat `docker stop` (SIGTERM) like an interruption so partial output is checkpointed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+
+    # 1. Setup logging first (worker processes write their own file)
+    setup_logging(process_log_file(args.worker_id) if args.worker else None)
     logger.info("Application started. Initiating web scraping process...")
+    startup.mark("logging setup")
+    # Modules with further site adapters register them on import
+    load_site_modules(SITE_MODULES)
 
-    # 2. Run the scraper itself
-    run_scraper()
+    # 2. Run the scraper itself (once, or resident in daemon mode)
+    if args.worker:
+        run_worker(args.worker_id)
+    elif args.workers > 0:
+        run_coordinator(args.workers, resume=args.resume)
+    elif args.daemon:
+        run_daemon(resume=args.resume)
+    else:
+        run_sites(resume=args.resume, timer=startup)
@@ -0,0 +1,372 @@
+"""
+utils/change_log.py
+
+This module keeps an append-only log of listing changes between runs. After a run, each scraped record
+is compared (by flat ID) with the last known state of that flat, and only typed change events are
+appended: a new listing, a delisted flat, and changes of the price with VAT, the discounted price or the
+status. Values are compared as typed by the record model (prices in cents, the status in its base form),
+so a change in how the CSV formats a value is not a change of the flat. The log is JSON Lines (one compact
+event per line), so downstream alerting can tail it instead of diffing full snapshots.
+
+A SQLite index next to the log stores the byte offset of every event by flat ID (for fast per-listing
+history lookups) and the last known values of each flat (for the next comparison). The index is derived
+from the log alone: events the index is missing (e.g. after a crash between the two writes, or when the
+index file was deleted) are replayed from the log when it is opened.
+"""
+
+import datetime
+import json
+import os
+import sqlite3
+
+import logging
+
+from utils.records import FlatStatus, parse_fixed
+from utils.state_store import flat_id_from_url
+
+logger = logging.getLogger(__name__)
+
+# Tracked record fields and the event type emitted when they change
+TRACKED_FIELDS = {
+    "price_cents": "price_change",
+    "discounted_price_cents": "discount_change",
+    "status": "status_change",
+}
+EVENT_TYPES = ("new", "delisted") + tuple(TRACKED_FIELDS.values())
+# Earlier versions stored the CSV text, keyed by CSV column
+_LEGACY_FIELDS = {
+    "price with VAT": "price_cents",
+    "discounted price": "discounted_price_cents",
+}
+
+
+def tracked_values(record):
+    """
+    Returns the tracked values of a record: prices in cents and the status in its base form.
+    A value that couldn't be parsed is tracked by its text.
+
+    Parameters:
+    record (FlatRecord): The record.
+
+    Returns:
+    dict: {field: value or None}
+    """
+    unparsed = record.unparsed or {}
+    return {
+        "price_cents": (
+            record.price_cents
+            if record.price_cents is not None
+            else unparsed.get("price with VAT")
+        ),
+        "discounted_price_cents": (
+            record.discounted_price_cents
+            if record.discounted_price_cents is not None
+            else unparsed.get("discounted price")
+        ),
+        "status": record.status.value if record.status else record.status_text,
+    }
+
+
+def _typed_data(data):
+    """
+    Converts stored values to the tracked form: CSV text stored by earlier versions is parsed
+    like a scraped value, and statuses are reduced to their base form.
+    """
+    typed = {}
+    for column, field in _LEGACY_FIELDS.items():
+        text = data.get(column)
+        if text:
+            cents = parse_fixed(text)
+            typed[field] = text if cents is None else cents
+        elif column in data:
+            typed[field] = None
+    typed.update((field, data[field]) for field in TRACKED_FIELDS if field in data)
+    status = typed.get("status")
+    if isinstance(status, str):
+        parsed = FlatStatus.parse(status)
+        typed["status"] = parsed.value if parsed else (status or None)
+    return typed
+
+
+def _timestamp(now=None):
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    return now.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class ChangeLog:
+    """
+    An append-only JSON Lines change log with a SQLite index by flat ID.
+    Used by one writer at a time (the end of a scraper run).
+
+    Parameters:
+    log_path (str): Path of the log file (created if missing).
+    index_path (str): Path of the index database (defaults to `<log_path>.idx.sqlite3`).
+    """
+
+    def __init__(self, log_path, index_path=None):
+        self.log_path = log_path
+        self.index_path = index_path or log_path + ".idx.sqlite3"
+        directory = os.path.dirname(log_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.index_path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS events (
+                flat_id TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS events_by_flat ON events (flat_id, offset);
+            CREATE TABLE IF NOT EXISTS flats (
+                flat_id TEXT PRIMARY KEY,
+                url TEXT,
+                listed INTEGER NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER);
+            """
+        )
+        self._conn.commit()
+        self._catch_up()
+
+    def _indexed_bytes(self):
+        row = self._conn.execute(
+            "SELECT value FROM meta WHERE key = 'indexed_bytes'"
+        ).fetchone()
+        return row[0] if row else 0
+
+    def _catch_up(self):
+        """
+        Indexes events that are in the log but not yet in the index.
+        A trailing partial line (from an interrupted append) is cut off.
+        """
+        if not os.path.exists(self.log_path):
+            with open(self.log_path, "ab"):
+                pass
+        size = os.path.getsize(self.log_path)
+        start = self._indexed_bytes()
+        if start > size:
+            logger.warning(
+                f"Change log {self.log_path} is shorter than its index; rebuilding the index."
+            )
+            with self._conn:
+                self._conn.execute("DELETE FROM events")
+                self._conn.execute("DELETE FROM flats")
+            start = 0
+        if start == size:
+            return
+
+        entries = []
+        with open(self.log_path, "r+b") as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b"\n"):
+                    logger.warning(
+                        f"Dropping a partial event at the end of {self.log_path}."
+                    )
+                    f.truncate(offset)
+                    break
+                entries.append((offset, len(line), json.loads(line)))
+                offset += len(line)
+        self._index(entries, end=offset)
+        if entries:
+            logger.info(f"Indexed {len(entries)} change events from {self.log_path}.")
+
+    def _index(self, entries, end):
+        """
+        Adds (offset, length, event) entries to the index and applies them to the flat state.
+        """
+        with self._conn:
+            for offset, length, event in entries:
+                self._conn.execute(
+                    "INSERT INTO events (flat_id, offset, length) VALUES (?, ?, ?)",
+                    (event["flat_id"], offset, length),
+                )
+                self._apply(event)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('indexed_bytes', ?)",
+                (end,),
+            )
+
+    def _apply(self, event):
+        flat_id = event["flat_id"]
+        if event["type"] == "new":
+            self._conn.execute(
+                "INSERT OR REPLACE INTO flats (flat_id, url, listed, data) VALUES (?, ?, 1, ?)",
+                (
+                    flat_id,
+                    event.get("url"),
+                    json.dumps(event["data"], ensure_ascii=False),
+                ),
+            )
+        elif event["type"] == "delisted":
+            self._conn.execute(
+                "UPDATE flats SET listed = 0 WHERE flat_id = ?", (flat_id,)
+            )
+        else:
+            row = self._conn.execute(
+                "SELECT data FROM flats WHERE flat_id = ?", (flat_id,)
+            ).fetchone()
+            data = json.loads(row[0]) if row else {}
+            data[event["field"]] = event["new"]
+            self._conn.execute(
+                "UPDATE flats SET data = ? WHERE flat_id = ?",
+                (json.dumps(data, ensure_ascii=False), flat_id),
+            )
+
+    def known_flats(self):
+        """
+        Returns the last known state of every flat in the log.
+
+        Returns:
+        dict: {flat_id: {"url": ..., "listed": bool, "data": {field: value}}}, with the values
+              in the tracked form (see tracked_values())
+        """
+        return {
+            flat_id: {
+                "url": url,
+                "listed": bool(listed),
+                "data": _typed_data(json.loads(data)),
+            }
+            for flat_id, url, listed, data in self._conn.execute(
+                "SELECT flat_id, url, listed, data FROM flats"
+            )
+        }
+
+    def diff(self, records, keep_urls=(), run_id=None, now=None, delist=True):
+        """
+        Compares the records of a run with the last known state.
+
+        Parameters:
+        records (iterable): The FlatRecord objects of the run.
+        keep_urls (iterable): URLs that are still listed but produced no record this run;
+                              they are not reported as delisted.
+        run_id (str): Optional run ID stored with every event.
+        now (datetime.datetime): Event time (defaults to now, UTC).
+        delist (bool): Whether flats missing from the run are reported as delisted. Pass False
+                       when discovery didn't cover the whole listing.
+
+        Returns:
+        list: The change events, in record order followed by the delisted flats.
+        """
+        ts = _timestamp(now)
+        known = self.known_flats()
+        keep = {flat_id_from_url(url) for url in keep_urls}
+        seen = set()
+        events = []
+
+        def event(flat_id, event_type, **fields):
+            entry = {"ts": ts, "flat_id": flat_id, "type": event_type}
+            if run_id:
+                entry["run"] = run_id
+            entry.update(fields)
+            events.append(entry)
+
+        for record in records:
+            flat_id = flat_id_from_url(record.url)
+            if flat_id in seen:
+                continue
+            seen.add(flat_id)
+            data = tracked_values(record)
+            previous = known.get(flat_id)
+            if previous is None or not previous["listed"]:
+                event(flat_id, "new", url=record.url, data=data)
+                continue
+            for field, event_type in TRACKED_FIELDS.items():
+                old = previous["data"].get(field)
+                if data[field] != old:
+                    event(flat_id, event_type, field=field, old=old, new=data[field])
+
+        if not delist:
+            return events
+        for flat_id in sorted(known):
+            if known[flat_id]["listed"] and flat_id not in seen and flat_id not in keep:
+                event(flat_id, "delisted", url=known[flat_id]["url"])
+        return events
+
+    def append(self, events):
+        """
+        Appends events to the log (flushed to disk) and indexes them.
+
+        Parameters:
+        events (list): Events as returned by diff().
+        """
+        if not events:
+            return
+        lines = [
+            (json.dumps(e, ensure_ascii=False, separators=(",", ":")) + "\n").encode(
+                "utf8"
+            )
+            for e in events
+        ]
+        with open(self.log_path, "ab") as f:
+            start = f.tell()
+            f.write(b"".join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+
+        entries = []
+        offset = start
+        for line, event in zip(lines, events):
+            entries.append((offset, len(line), event))
+            offset += len(line)
+        self._index(entries, end=offset)
+
+    def history(self, flat_id):
+        """
+        Returns every event of one flat, oldest first (read through the index).
+
+        Parameters:
+        flat_id (str): The flat ID.
+
+        Returns:
+        list: The events.
+        """
+        rows = self._conn.execute(
+            "SELECT offset, length FROM events WHERE flat_id = ? ORDER BY offset",
+            (str(flat_id),),
+        ).fetchall()
+        events = []
+        with open(self.log_path, "rb") as f:
+            for offset, length in rows:
+                f.seek(offset)
+                events.append(json.loads(f.read(length)))
+        return events
+
+    def close(self):
+        """
+        Closes the index database.
+        """
+        self._conn.close()
+
+
+def record_changes(records, log_path, keep_urls=(), run_id=None, delist=True):
+    """
+    Compares the records of a finished run with the change log and appends the changes.
+
+    Parameters:
+    records (iterable): The FlatRecord objects of the run.
+    log_path (str): Path of the change log.
+    keep_urls (iterable): URLs that produced no record this run (not reported as delisted).
+    run_id (str): Optional run ID stored with every event.
+    delist (bool): Whether flats missing from the run are reported as delisted.
+
+    Returns:
+    list: The appended events.
+    """
+    change_log = ChangeLog(log_path)
+    try:
+        events = change_log.diff(records, keep_urls, run_id, delist=delist)
+        change_log.append(events)
+    finally:
+        change_log.close()
+
+    counts = {}
+    for e in events:
+        counts[e["type"]] = counts.get(e["type"], 0) + 1
+    logger.info(f"Change log: appended {len(events)} events to {log_path} {counts}")
+    return events
@@ -0,0 +1,104 @@
+"""
+utils/chart_data.py
+
+This module reduces large DataFrames on the server before they are sent to the browser:
+histograms are binned with numpy, scatter data is thinned to a point budget that keeps outliers
+and the overall density, and tables are sliced into pages. Page weight then depends on the
+number of bins/points/rows shown, not on the size of the dataset.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+
+def histogram_bins(values, nbins=30):
+    """
+    Bins numeric values into equal-width bins.
+
+    Parameters:
+    values (pd.Series): The values to bin (NaNs are ignored).
+    nbins (int): Number of bins.
+
+    Returns:
+    pd.DataFrame: Columns 'bin_start', 'bin_end', 'bin_center', 'bin_width' and 'count'.
+    """
+    values = pd.to_numeric(values, errors="coerce").dropna().to_numpy()
+    if values.size == 0:
+        return pd.DataFrame(
+            columns=["bin_start", "bin_end", "bin_center", "bin_width", "count"]
+        )
+    counts, edges = np.histogram(values, bins=nbins)
+    return pd.DataFrame(
+        {
+            "bin_start": edges[:-1],
+            "bin_end": edges[1:],
+            "bin_center": (edges[:-1] + edges[1:]) / 2,
+            "bin_width": np.diff(edges),
+            "count": counts,
+        }
+    )
+
+
+def _grid_cells(values, cells):
+    low, high = values.min(), values.max()
+    span = (high - low) or 1
+    return ((values - low) / span * (cells - 1)).round().astype(int)
+
+
+def thin_scatter(df, x, y, max_points=5000, seed=0):
+    """
+    Reduces scatter data to at most max_points rows.
+    One point is kept from every occupied cell of a grid over the (x, y) range, so sparse regions
+    and outliers stay visible; the rest of the budget is a random sample, so dense regions stay dense.
+    The result is deterministic for a given input.
+
+    Parameters:
+    df (pd.DataFrame): The data, without NaNs in x and y.
+    x (str): Column on the x axis.
+    y (str): Column on the y axis.
+    max_points (int): Maximum number of rows to return.
+    seed (int): Random seed for the sample.
+
+    Returns:
+    pd.DataFrame: The thinned data (df itself if it is already small enough).
+    """
+    if len(df) <= max_points:
+        return df
+
+    # A grid with about half the budget in cells leaves room for the density sample
+    cells = max(2, int(math.sqrt(max_points / 2)))
+    representatives = df.groupby(
+        [_grid_cells(df[x], cells), _grid_cells(df[y], cells)], sort=False
+    ).head(1)
+    if len(representatives) >= max_points:
+        return representatives.sample(n=max_points, random_state=seed).sort_index()
+
+    rest = df.drop(index=representatives.index)
+    sample = rest.sample(n=max_points - len(representatives), random_state=seed)
+    return pd.concat([representatives, sample]).sort_index()
+
+
+def page_count(total_rows, page_size):
+    """
+    Returns the number of pages needed for total_rows rows (at least 1).
+    """
+    return max(1, math.ceil(total_rows / page_size))
+
+
+def table_page(df, page, page_size):
+    """
+    Returns one page of a DataFrame.
+
+    Parameters:
+    df (pd.DataFrame): The full table.
+    page (int): 1-based page number (clamped to the valid range).
+    page_size (int): Rows per page.
+
+    Returns:
+    pd.DataFrame: The rows of that page.
+    """
+    page = min(max(1, int(page)), page_count(len(df), page_size))
+    start = (page - 1) * page_size
+    return df.iloc[start : start + page_size]
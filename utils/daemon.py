@@ -0,0 +1,190 @@
+"""
+utils/daemon.py
+
+This module provides the run scheduler of the resident daemon mode. A run is due when the
+interval timer expires (measured from the end of the previous run), when a trigger file appears,
+or when a "run" command arrives on a local Unix socket. Triggers that arrive during a run are
+coalesced into a single follow-up run.
+"""
+
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _TriggerHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        command = self.rfile.readline().decode("utf8", "replace").strip().lower()
+        scheduler = self.server.scheduler
+        if command == "run":
+            scheduler.trigger("socket")
+            reply = "queued"
+        elif command == "status":
+            reply = json.dumps(scheduler.status())
+        else:
+            reply = f"unknown command: {command!r} (expected 'run' or 'status')"
+        self.wfile.write((reply + "\n").encode("utf8"))
+
+
+class _TriggerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class RunScheduler:
+    """
+    Decides when the daemon starts the next run.
+
+    Parameters:
+    interval_seconds (float): Time between the end of a run and the next timer run (0 disables the timer).
+    trigger_file (str): Optional path; creating this file requests a run (it is removed when consumed).
+    socket_path (str): Optional Unix socket path accepting "run" and "status" commands.
+    poll_seconds (float): How often the trigger file is checked.
+    """
+
+    def __init__(
+        self, interval_seconds, trigger_file=None, socket_path=None, poll_seconds=1.0
+    ):
+        self.interval_seconds = interval_seconds
+        self.trigger_file = trigger_file
+        self.socket_path = socket_path
+        self.poll_seconds = poll_seconds
+
+        self.runs = 0
+        self.last_run_started = None
+        self.last_run_finished = None
+        self.running = False
+
+        self._event = threading.Event()
+        self._reason = None
+        self._lock = threading.Lock()
+        self._server = None
+        self._next_run = time.monotonic()  # The first run starts immediately
+
+    def start(self):
+        """
+        Starts listening on the trigger socket (if configured).
+        """
+        if not self.socket_path:
+            return
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)  # Left behind by a previous daemon
+        self._server = _TriggerServer(self.socket_path, _TriggerHandler)
+        self._server.scheduler = self
+        threading.Thread(
+            target=self._server.serve_forever, name="trigger-socket", daemon=True
+        ).start()
+        logger.info(f"Listening for run triggers on {self.socket_path}")
+
+    def trigger(self, reason):
+        """
+        Requests a run as soon as possible.
+
+        Parameters:
+        reason (str): Why the run was requested (logged).
+        """
+        with self._lock:
+            self._reason = self._reason or reason
+        self._event.set()
+
+    def status(self):
+        """
+        Returns the scheduler state for the status command.
+        """
+        return {
+            "running": self.running,
+            "runs": self.runs,
+            "last_run_started": self.last_run_started,
+            "last_run_finished": self.last_run_finished,
+            "next_timer_run_in_seconds": (
+                round(max(0.0, self._next_run - time.monotonic()))
+                if self.interval_seconds
+                else None
+            ),
+        }
+
+    def _consume_trigger_file(self):
+        if not self.trigger_file or not os.path.exists(self.trigger_file):
+            return False
+        try:
+            os.remove(self.trigger_file)
+        except FileNotFoundError:
+            pass
+        return True
+
+    def wait(self):
+        """
+        Blocks until the next run is due.
+
+        Returns:
+        str: What started the run ("timer", "file" or "socket").
+        """
+        while True:
+            if self._consume_trigger_file():
+                return "file"
+            if self.interval_seconds and time.monotonic() >= self._next_run:
+                return "timer"
+            if self.runs == 0 and not self.interval_seconds:
+                # Without a timer the first run still starts immediately
+                return "startup"
+
+            timeout = self.poll_seconds
+            if self.interval_seconds:
+                timeout = min(timeout, max(0.0, self._next_run - time.monotonic()))
+            if self._event.wait(timeout):
+                with self._lock:
+                    reason, self._reason = self._reason, None
+                    self._event.clear()
+                return reason
+
+    def run_started(self):
+        """
+        Records the start of a run.
+        """
+        self.running = True
+        self.last_run_started = time.time()
+
+    def run_finished(self):
+        """
+        Records the end of a run and schedules the next timer run.
+        """
+        self.running = False
+        self.runs += 1
+        self.last_run_finished = time.time()
+        self._next_run = time.monotonic() + self.interval_seconds
+
+    def close(self):
+        """
+        Stops the trigger socket.
+        """
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+
+def send_command(socket_path, command="run", timeout=10):
+    """
+    Sends a command to a running daemon.
+
+    Parameters:
+    socket_path (str): The daemon's trigger socket.
+    command (str): "run" or "status".
+    timeout (float): Socket timeout in seconds.
+
+    Returns:
+    str: The daemon's reply.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(socket_path)
+        client.sendall((command + "\n").encode("utf8"))
+        return client.makefile("r", encoding="utf8").readline().strip()
@@ -0,0 +1,149 @@
+"""
+utils/driver_pool.py
+
+This module provides a small pool of warm WebDriver instances for the resident daemon mode.
+Browsers are created on demand (or up front with warm()), health-checked before each use,
+and quit and replaced after a fixed number of uses to bound Chrome's memory growth.
+"""
+
+import threading
+from contextlib import contextmanager
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def driver_is_healthy(driver):
+    """
+    Checks that a browser session still responds.
+
+    Parameters:
+    driver (selenium.webdriver.Chrome): The WebDriver object.
+
+    Returns:
+    bool: True if the browser answered a trivial script.
+    """
+    try:
+        return driver.execute_script("return 1") == 1
+    except Exception as e:
+        logger.warning(f"WebDriver health check failed: {e}")
+        return False
+
+
+class DriverPool:
+    """
+    Thread-safe pool of reusable WebDriver instances.
+
+    Parameters:
+    factory (callable): Creates a new driver (e.g. get_chrome_driver).
+    closer (callable): Quits a driver (e.g. quit_driver).
+    size (int): Maximum number of idle drivers kept warm.
+    max_uses (int): A driver is recycled after this many uses.
+    health_check (callable): Called with an idle driver before reuse; False discards it.
+    """
+
+    def __init__(
+        self, factory, closer, size=1, max_uses=20, health_check=driver_is_healthy
+    ):
+        self.factory = factory
+        self.closer = closer
+        self.size = max(1, int(size))
+        self.max_uses = max(1, int(max_uses))
+        self.health_check = health_check
+
+        self.created = 0
+        self.recycled = 0
+
+        self._lock = threading.Lock()
+        self._idle = []  # [(driver, uses)]
+        self._closed = False
+
+    def _discard(self, driver, reason):
+        logger.info(f"Quitting pooled WebDriver ({reason}).")
+        try:
+            self.closer(driver)
+        except Exception as e:
+            logger.warning(f"Error while quitting pooled WebDriver: {e}")
+
+    def _create(self):
+        driver = self.factory()
+        with self._lock:
+            self.created += 1
+        return driver
+
+    def warm(self, count=None):
+        """
+        Starts drivers up front so the next runs don't pay for the browser launch.
+
+        Parameters:
+        count (int): Number of idle drivers to have ready (defaults to the pool size).
+        """
+        count = min(self.size, count or self.size)
+        while True:
+            with self._lock:
+                if self._closed or len(self._idle) >= count:
+                    return
+            driver = self._create()
+            with self._lock:
+                self._idle.append((driver, 0))
+            logger.info("Warm WebDriver ready.")
+
+    @contextmanager
+    def driver(self):
+        """
+        Lends a healthy driver for the duration of the with-block.
+
+        Yields:
+        selenium.webdriver.Chrome: The WebDriver object.
+        """
+        driver, uses = self._checkout()
+        broken = False
+        try:
+            yield driver
+        except Exception:
+            # The session may be in an unknown state; don't hand it out again
+            broken = True
+            raise
+        finally:
+            self._checkin(driver, uses + 1, broken)
+
+    def _checkout(self):
+        while True:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("The driver pool is closed.")
+                if not self._idle:
+                    break
+                driver, uses = self._idle.pop()
+            if self.health_check is None or self.health_check(driver):
+                return driver, uses
+            with self._lock:
+                self.recycled += 1
+            self._discard(driver, "failed health check")
+        return self._create(), 0
+
+    def _checkin(self, driver, uses, broken):
+        reason = None
+        with self._lock:
+            if broken:
+                reason = "error during use"
+            elif uses >= self.max_uses:
+                reason = f"recycled after {uses} uses"
+            elif self._closed or len(self._idle) >= self.size:
+                reason = "pool full or closed"
+            else:
+                self._idle.append((driver, uses))
+                return
+            self.recycled += 1
+        self._discard(driver, reason)
+
+    def close(self):
+        """
+        Quits all idle drivers. Drivers in use are quit when they are returned.
+        """
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for driver, _ in idle:
+            self._discard(driver, "pool closed")
@@ -0,0 +1,407 @@
+"""
+utils/fetcher.py
+
+This module provides a polite, thread-safe HTTP client for fetching many pages concurrently.
+It combines a shared requests.Session (connection pooling), a per-host concurrency limit and a
+token-bucket request rate, so a pool of worker threads can fetch detail pages in parallel
+without hammering the target site.
+
+The per-host limit adapts (AIMD): it grows slowly while responses are fast and successful and is
+halved when the server pushes back (429, 5xx, timeouts). Such requests are retried with jittered
+exponential backoff, honoring Retry-After, up to a per-URL retry budget. URLs that still fail
+are remembered so the caller can report them.
+
+Several fetchers (e.g. one per crawled site, each with its own rate limit) can share one session and
+a connection budget capping their requests in flight together.
+"""
+
+import random
+import threading
+import time
+from contextlib import nullcontext
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import logging
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket used to cap the overall request rate.
+
+    Parameters:
+    rate (float): Tokens added per second. A rate of 0 or less disables rate limiting.
+    capacity (float): Maximum number of tokens the bucket can hold (burst size).
+                      Defaults to the rate (one second worth of burst), minimum 1.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until a single token is available and consumes it.
+        """
+        if self.rate <= 0:
+            return
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                elapsed = now - self._last_refill
+                self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+                self._last_refill = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                # Time until the next whole token becomes available
+                wait_seconds = (1 - self._tokens) / self.rate
+
+            time.sleep(wait_seconds)
+
+
+# Responses that signal server pressure (retried, and the host's concurrency limit is cut)
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def parse_retry_after(value, now=None):
+    """
+    Parses a Retry-After header value.
+
+    Parameters:
+    value (str): Either a number of seconds or an HTTP date.
+    now (float): Current timestamp (defaults to time.time()).
+
+    Returns:
+    float: Seconds to wait (0 or more), or None if the header is missing or invalid.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at - (now or time.time()))
+
+
+class AdaptiveLimit:
+    """
+    A concurrency limit adjusted with additive increase / multiplicative decrease (AIMD).
+
+    Each successful request whose latency stays within latency_tolerance times the best recent
+    latency grows the limit by 1/limit (about +1 per round of requests); a congestion signal
+    halves it, at most once per cooldown so one burst of errors counts as one signal.
+    With minimum == maximum the limit is fixed and this behaves like a semaphore.
+
+    Parameters:
+    initial (int): Starting limit.
+    minimum (int): Lowest limit.
+    maximum (int): Highest limit (defaults to initial).
+    latency_tolerance (float): Latency factor above which the limit stops growing.
+    cooldown (float): Minimum seconds between two decreases.
+    """
+
+    def __init__(
+        self, initial, minimum=1, maximum=None, latency_tolerance=2.0, cooldown=1.0
+    ):
+        self.minimum = max(1, int(minimum))
+        self.maximum = max(self.minimum, int(maximum or initial))
+        self.limit = float(min(self.maximum, max(self.minimum, int(initial))))
+        self.latency_tolerance = latency_tolerance
+        self.cooldown = cooldown
+
+        self.in_flight = 0
+        self.decreases = 0
+        self._latency = None  # Exponentially weighted moving average
+        self._baseline = None  # Best recent average latency
+        self._last_decrease = float("-inf")
+        self._condition = threading.Condition()
+
+    def __enter__(self):
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+    def on_success(self, latency):
+        """
+        Records a successful request and grows the limit if the latency is healthy.
+
+        Parameters:
+        latency (float): Duration of the request in seconds.
+        """
+        with self._condition:
+            if self._latency is None:
+                self._latency = self._baseline = latency
+            else:
+                self._latency = 0.8 * self._latency + 0.2 * latency
+                # Let the baseline drift up slowly so one very fast response doesn't pin it
+                self._baseline = min(self._baseline * 1.01, self._latency)
+            if latency > self.latency_tolerance * self._baseline:
+                return
+            previous = int(self.limit)
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            if int(self.limit) > previous:
+                self._condition.notify_all()
+
+    def on_congestion(self):
+        """
+        Records a congestion signal (429, 5xx or timeout) and halves the limit.
+        """
+        with self._condition:
+            now = time.monotonic()
+            if now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            previous = self.limit
+            self.limit = max(self.minimum, self.limit / 2)
+            if self.limit < previous:
+                self.decreases += 1
+
+
+def make_session(headers=None, pool_size=10, hosts=None):
+    """
+    Creates a requests.Session whose connection pool is sized for concurrent use.
+
+    Parameters:
+    headers (dict): Default headers sent with every request.
+    pool_size (int): Connections kept per host (concurrent workers beyond it discard connections).
+    hosts (int): Number of per-host pools kept (defaults to pool_size).
+
+    Returns:
+    requests.Session: The session.
+    """
+    session = requests.Session()
+    if headers:
+        session.headers.update(headers)
+    adapter = HTTPAdapter(pool_connections=hosts or pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class PoliteFetcher:
+    """
+    A shared HTTP client enforcing a per-host concurrency limit and a global request rate.
+
+    Parameters:
+    headers (dict): Default headers sent with every request.
+    per_host_limit (int): Maximum number of in-flight requests per host.
+    requests_per_second (float): Global request rate (token bucket). 0 disables the limit.
+    timeout (int): Default timeout in seconds for each request.
+    max_per_host_limit (int): Upper bound of the adaptive per-host limit. When it equals
+                              per_host_limit (the default), the limit is fixed.
+    max_retries (int): Retries per URL after a 429/5xx response, timeout or connection error.
+    backoff_seconds (float): Base delay of the exponential backoff between retries.
+    max_backoff_seconds (float): Cap of the backoff delay (and of honored Retry-After values).
+    session (requests.Session): Optional session shared with other fetchers (not closed by close()).
+    connection_budget (threading.Semaphore): Optional budget of requests in flight shared with
+                                             other fetchers.
+    """
+
+    def __init__(
+        self,
+        headers=None,
+        per_host_limit=4,
+        requests_per_second=5.0,
+        timeout=10,
+        max_per_host_limit=None,
+        max_retries=3,
+        backoff_seconds=1.0,
+        max_backoff_seconds=60.0,
+        session=None,
+        connection_budget=None,
+    ):
+        self.per_host_limit = max(1, int(per_host_limit))
+        self.max_per_host_limit = max(
+            self.per_host_limit, int(max_per_host_limit or self.per_host_limit)
+        )
+        self.timeout = timeout
+        self.bucket = TokenBucket(requests_per_second)
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+
+        self.requests = 0
+        self.retries = 0
+        self.failed_urls = {}  # {url: reason} of URLs that could not be fetched
+        self._stats_lock = threading.Lock()
+
+        self._owns_session = session is None
+        # Size the connection pool so concurrent workers don't discard connections
+        self.session = session or make_session(headers, self.max_per_host_limit)
+        self.connection_budget = connection_budget or nullcontext()
+
+        self._host_limits = {}
+        self._paused_until = {}  # {host: monotonic time} set from Retry-After
+        self._host_lock = threading.Lock()
+
+    def _host_limit(self, host):
+        with self._host_lock:
+            limit = self._host_limits.get(host)
+            if limit is None:
+                limit = AdaptiveLimit(
+                    self.per_host_limit, maximum=self.max_per_host_limit
+                )
+                self._host_limits[host] = limit
+            return limit
+
+    def _wait_until_resumed(self, host):
+        while True:
+            with self._host_lock:
+                remaining = self._paused_until.get(host, 0) - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+    def _pause_host(self, host, seconds):
+        with self._host_lock:
+            until = time.monotonic() + seconds
+            self._paused_until[host] = max(self._paused_until.get(host, 0), until)
+
+    def _backoff(self, attempt):
+        # Exponential backoff with "equal jitter": half fixed, half random
+        delay = min(self.max_backoff_seconds, self.backoff_seconds * 2**attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _record_outcome(self, url, reason=None):
+        with self._stats_lock:
+            if reason:
+                self.failed_urls[url] = reason
+            else:
+                self.failed_urls.pop(url, None)
+
+    def get(self, url, **kwargs):
+        """
+        Performs a GET request once a host slot and a rate token are available.
+        Requests answered with 429/5xx, timeouts and connection errors are retried with
+        backoff (honoring Retry-After) until the retry budget of the URL is used up.
+
+        Parameters:
+        url (str): The URL to fetch.
+        **kwargs: Extra keyword arguments passed to requests.Session.get.
+
+        Returns:
+        requests.Response: The HTTP response (the last one if all retries were used up).
+
+        Raises:
+        requests.exceptions.RequestException: If the last attempt failed without a response.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        host = urlsplit(url).netloc
+        limit = self._host_limit(host)
+        attempt = 0
+        while True:
+            self._wait_until_resumed(host)
+            resp = error = None
+            with limit:
+                self.bucket.acquire()
+                # Taken after the rate token, so waiting for this site's rate holds no shared slot
+                with self.connection_budget:
+                    started = time.monotonic()
+                    try:
+                        resp = self.session.get(url, **kwargs)
+                    except (
+                        requests.exceptions.Timeout,
+                        requests.exceptions.ConnectionError,
+                    ) as e:
+                        error = e
+                    except requests.exceptions.RequestException as e:
+                        metrics.inc("errors_total", type=type(e).__name__)
+                        self._record_outcome(url, str(e))
+                        raise
+                    finally:
+                        with self._stats_lock:
+                            self.requests += 1
+                    latency = time.monotonic() - started
+
+            if error:
+                metrics.observe("fetch_seconds", latency, outcome=type(error).__name__)
+                metrics.inc("errors_total", type=type(error).__name__)
+            else:
+                metrics.observe("fetch_seconds", latency, outcome=resp.status_code)
+                metrics.inc("fetch_bytes_total", len(resp.content))
+                if resp.status_code >= 400:
+                    metrics.inc("errors_total", type=f"http_{resp.status_code}")
+
+            if error is None and resp.status_code not in RETRY_STATUSES:
+                limit.on_success(latency)
+                reason = f"HTTP {resp.status_code}" if resp.status_code >= 400 else None
+                self._record_outcome(url, reason)
+                return resp
+
+            limit.on_congestion()
+            reason = str(error) if error else f"HTTP {resp.status_code}"
+            retry_after = None
+            if resp is not None:
+                retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+            if retry_after is not None:
+                retry_after = min(retry_after, self.max_backoff_seconds)
+                self._pause_host(host, retry_after)
+
+            if attempt >= self.max_retries:
+                logger.warning(
+                    f"Giving up on {url} after {attempt + 1} attempts: {reason}"
+                )
+                self._record_outcome(url, reason)
+                if error:
+                    raise error
+                return resp
+
+            delay = max(self._backoff(attempt), retry_after or 0)
+            logger.warning(
+                f"{reason} for {url}; retry {attempt + 1}/{self.max_retries} in {delay:.1f}s "
+                f"(concurrency limit for {host} now {int(limit.limit)})."
+            )
+            with self._stats_lock:
+                self.retries += 1
+            metrics.inc("fetch_retries_total")
+            time.sleep(delay)
+            attempt += 1
+
+    def host_limits(self):
+        """
+        Returns the current concurrency limit of each host.
+
+        Returns:
+        dict: {host: limit}
+        """
+        with self._host_lock:
+            return {host: int(limit.limit) for host, limit in self._host_limits.items()}
+
+    def close(self):
+        """
+        Closes the underlying session and its pooled connections (unless the session is shared).
+        """
+        if self.requests:
+            logger.info(
+                f"Fetcher made {self.requests} requests ({self.retries} retries, "
+                f"{len(self.failed_urls)} failed URLs); final concurrency limits: "
+                f"{self.host_limits()}."
+            )
+        if self._owns_session:
+            self.session.close()
@@ -0,0 +1,253 @@
+"""
+utils/history_queries.py
+
+This module provides a DuckDB query layer over the scraper's date-partitioned Parquet snapshots.
+Filters (date range, stage, status, rooms) and aggregations are pushed down to DuckDB, so only the
+small result sets are materialized in pandas, even over years of daily history.
+"""
+
+import os
+
+import duckdb
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def build_filters(date_from=None, date_to=None, stages=None, statuses=None, rooms=None):
+    """
+    Builds the filter dict accepted by SnapshotHistory queries.
+    Empty selections mean "no filter" for that column.
+
+    Parameters:
+    date_from (datetime.date): First scrape date to include.
+    date_to (datetime.date): Last scrape date to include.
+    stages (list): Stages to include.
+    statuses (list): Statuses to include.
+    rooms (list): Room counts to include.
+
+    Returns:
+    dict: The filters.
+    """
+    return {
+        "date_from": date_from,
+        "date_to": date_to,
+        "stages": tuple(stages or ()),
+        "statuses": tuple(statuses or ()),
+        "rooms": tuple(rooms or ()),
+    }
+
+
+def _where(filters):
+    """
+    Translates a filter dict into a SQL WHERE clause with positional parameters.
+    """
+    clauses = ["TRUE"]
+    params = []
+    filters = filters or {}
+    if filters.get("date_from"):
+        clauses.append("scrape_date >= ?")
+        params.append(filters["date_from"])
+    if filters.get("date_to"):
+        clauses.append("scrape_date <= ?")
+        params.append(filters["date_to"])
+    for column, key in (
+        ("stage", "stages"),
+        ("status", "statuses"),
+        ("rooms", "rooms"),
+    ):
+        values = filters.get(key)
+        if values:
+            clauses.append(f"{column} IN ({', '.join('?' for _ in values)})")
+            params.extend(values)
+    return " AND ".join(clauses), params
+
+
+class SnapshotHistory:
+    """
+    Read-only SQL access to all Parquet snapshots as one `snapshots` view
+    (one row per flat and scrape date).
+
+    Parameters:
+    snapshot_dir (str): Root directory of the snapshots (scrape_date=YYYY-MM-DD/flats.parquet).
+    """
+
+    def __init__(self, snapshot_dir):
+        self.snapshot_dir = snapshot_dir
+        pattern = os.path.join(snapshot_dir, "scrape_date=*", "flats.parquet")
+        self._conn = duckdb.connect(database=":memory:")
+        self._conn.execute(
+            f"""
+            CREATE VIEW snapshots AS
+            SELECT * REPLACE (CAST(scrape_date AS DATE) AS scrape_date)
+            FROM read_parquet('{pattern.replace("'", "''")}', hive_partitioning = true)
+            """
+        )
+
+    @staticmethod
+    def available(snapshot_dir):
+        """
+        Tells whether there is at least one snapshot to query.
+
+        Parameters:
+        snapshot_dir (str): Root directory of the snapshots.
+
+        Returns:
+        bool: True if a snapshot file exists.
+        """
+        try:
+            return any(
+                os.path.exists(os.path.join(snapshot_dir, name, "flats.parquet"))
+                for name in os.listdir(snapshot_dir)
+                if name.startswith("scrape_date=")
+            )
+        except FileNotFoundError:
+            return False
+
+    def _query(self, sql, params=()):
+        # A cursor per query: the dashboard may run queries from several sessions/threads
+        return self._conn.cursor().execute(sql, list(params)).df()
+
+    def filter_options(self):
+        """
+        Returns the values available for the dashboard filters.
+
+        Returns:
+        dict: 'date_min', 'date_max', 'stages', 'statuses' and 'rooms'.
+        """
+        cursor = self._conn.cursor()
+        date_min, date_max = cursor.execute(
+            "SELECT min(scrape_date), max(scrape_date) FROM snapshots"
+        ).fetchone()
+
+        def distinct(column):
+            rows = cursor.execute(
+                f"SELECT DISTINCT {column} FROM snapshots WHERE {column} IS NOT NULL ORDER BY 1"
+            ).fetchall()
+            return [row[0] for row in rows]
+
+        return {
+            "date_min": date_min,
+            "date_max": date_max,
+            "stages": distinct("stage"),
+            "statuses": distinct("status"),
+            "rooms": distinct("rooms"),
+        }
+
+    @staticmethod
+    def _latest_where(filters):
+        # Rows of the most recent scrape date within the filters (not summed over history)
+        where, params = _where(filters)
+        return (
+            f"{where} AND scrape_date = (SELECT max(scrape_date) FROM snapshots WHERE {where})",
+            params + params,
+        )
+
+    def _latest_counts(self, column, filters):
+        where, params = self._latest_where(filters)
+        return self._query(
+            f"""
+            SELECT {column}, count(*) AS "Count"
+            FROM snapshots
+            WHERE {where}
+            GROUP BY {column}
+            ORDER BY {column}
+            """,
+            params,
+        )
+
+    def latest_rows(self, filters=None):
+        """
+        The listings of the latest scrape date in the filters: the rows room_counts() and
+        status_counts() count, for the table and the charts drawn from individual listings.
+
+        Parameters:
+        filters (dict): See build_filters().
+
+        Returns:
+        pd.DataFrame: One row per listing, with the snapshot columns.
+        """
+        where, params = self._latest_where(filters)
+        return self._query(
+            f"SELECT * EXCLUDE (scrape_date) FROM snapshots WHERE {where}", params
+        )
+
+    def room_counts(self, filters=None):
+        """
+        Number of listings per room count on the latest scrape date in the filters.
+
+        Parameters:
+        filters (dict): See build_filters().
+
+        Returns:
+        pd.DataFrame: Columns 'rooms' and 'Count'.
+        """
+        return self._latest_counts("rooms", filters)
+
+    def status_counts(self, filters=None):
+        """
+        Number of listings per status on the latest scrape date in the filters.
+
+        Parameters:
+        filters (dict): See build_filters().
+
+        Returns:
+        pd.DataFrame: Columns 'status' and 'Count'.
+        """
+        return self._latest_counts("status", filters)
+
+    def price_per_m2_over_time(self, filters=None):
+        """
+        Median price with VAT per m² of total area, per scrape date and stage.
+
+        Parameters:
+        filters (dict): See build_filters().
+
+        Returns:
+        pd.DataFrame: Columns 'scrape_date', 'stage', 'price_per_m2' and 'listings'.
+        """
+        where, params = _where(filters)
+        return self._query(
+            f"""
+            SELECT scrape_date,
+                   coalesce(stage, 'unknown') AS stage,
+                   median(price_with_vat / total_area) AS price_per_m2,
+                   count(*) AS listings
+            FROM snapshots
+            WHERE {where} AND total_area > 0 AND price_with_vat IS NOT NULL
+            GROUP BY ALL
+            ORDER BY scrape_date, stage
+            """,
+            params,
+        )
+
+    def days_on_market(self, filters=None):
+        """
+        Distribution of days on market: the span between the first and last scrape date
+        a flat appeared on, grouped by the flat's most recent status.
+
+        Parameters:
+        filters (dict): See build_filters().
+
+        Returns:
+        pd.DataFrame: Columns 'days_on_market', 'last_status' and 'flats'.
+        """
+        where, params = _where(filters)
+        return self._query(
+            f"""
+            WITH per_flat AS (
+                SELECT flat_id,
+                       date_diff('day', min(scrape_date), max(scrape_date)) + 1 AS days_on_market,
+                       arg_max(status, scrape_date) AS last_status
+                FROM snapshots
+                WHERE {where} AND flat_id IS NOT NULL
+                GROUP BY flat_id
+            )
+            SELECT days_on_market, coalesce(last_status, 'unknown') AS last_status, count(*) AS flats
+            FROM per_flat
+            GROUP BY ALL
+            ORDER BY days_on_market
+            """,
+            params,
+        )
@@ -0,0 +1,118 @@
+"""
+utils/html_extract.py
+
+This module provides fast lxml-based helpers for extracting label/value blocks from detail pages.
+The helpers reproduce the semantics of the original BeautifulSoup (html.parser) extraction,
+in particular Tag.get_text(strip=True), but walk the parsed tree only once.
+"""
+
+import threading
+
+from lxml import etree
+
+# Text inside these tags is not "main content" for BeautifulSoup's get_text()
+# (it is stored as Script / Stylesheet / TemplateString / Ruby strings), so it is skipped here too.
+NON_CONTENT_TAGS = frozenset(("script", "style", "template", "rt", "rp"))
+
+# lxml parser instances serialize concurrent use, so every worker thread gets its own
+_local = threading.local()
+
+
+def _parser():
+    parser = getattr(_local, "parser", None)
+    if parser is None:
+        parser = etree.HTMLParser()
+        _local.parser = parser
+    return parser
+
+
+def parse_html(html):
+    """
+    Parses an HTML document with lxml.
+
+    Parameters:
+    html (str or bytes): The HTML document.
+
+    Returns:
+    lxml.etree._Element: The root element, or None for an empty document.
+    """
+    try:
+        return etree.fromstring(html, _parser())
+    except ValueError:
+        # lxml refuses str input carrying an XML encoding declaration; hand it bytes instead
+        return etree.fromstring(html.encode("utf8"), etree.HTMLParser(encoding="utf8"))
+
+
+def element_text(element):
+    """
+    Returns the text of an element the way BeautifulSoup's get_text(strip=True) does:
+    every text node stripped, empty ones dropped, the rest concatenated.
+
+    Parameters:
+    element (lxml.etree._Element): The element.
+
+    Returns:
+    str: The concatenated, stripped text.
+    """
+    parts = []
+    _collect_text(element, parts)
+    return "".join(parts)
+
+
+def _collect_text(element, parts):
+    if element.text:
+        text = element.text.strip()
+        if text:
+            parts.append(text)
+    for child in element:
+        # Comments and processing instructions have a non-string tag; only their tail is text
+        if isinstance(child.tag, str) and child.tag not in NON_CONTENT_TAGS:
+            _collect_text(child, parts)
+        if child.tail:
+            text = child.tail.strip()
+            if text:
+                parts.append(text)
+
+
+def iter_label_value_blocks(root):
+    """
+    Walks every <div> once, in document order, and yields its label/value candidates:
+
+    - ("span", label, value) for a div with at least two direct <span> children
+      (the first two spans), i.e. vertical label–value blocks;
+    - ("row", label, value) for a div with exactly two direct <div> children,
+      i.e. horizontal rows.
+
+    A single div can yield both kinds. Divs inside non-content tags are skipped because
+    their text would be empty anyway.
+
+    Parameters:
+    root (lxml.etree._Element): The parsed document (see parse_html()).
+
+    Yields:
+    tuple: (kind, label_element, value_element)
+    """
+    if root is None:
+        return
+
+    skipped = set()
+    for container in root.iter(*NON_CONTENT_TAGS):
+        skipped.update(container.iter("div"))
+
+    for div in root.iter("div"):
+        if skipped and div in skipped:
+            continue
+
+        spans = []
+        child_divs = []
+        for child in div:
+            tag = child.tag
+            if tag == "span":
+                spans.append(child)
+            elif tag == "div":
+                child_divs.append(child)
+
+        if len(spans) >= 2:
+            yield "span", spans[0], spans[1]
+        if len(child_divs) == 2:
+            yield "row", child_divs[0], child_divs[1]
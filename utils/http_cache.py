@@ -0,0 +1,184 @@
+"""
+utils/http_cache.py
+
+This module provides a small persistent response cache for detail pages.
+Each entry is keyed by URL and stores the HTTP validators (ETag / Last-Modified), a hash of the
+response body and the data that was parsed from it. This lets the scraper send conditional
+requests and skip both the download and the HTML parsing when a page hasn't changed.
+Entries are evicted by age and the total cache size is capped.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def body_hash(content):
+    """
+    Returns a stable hash of a response body.
+
+    Parameters:
+    content (bytes): The raw response body.
+
+    Returns:
+    str: Hex SHA-256 digest of the body.
+    """
+    return hashlib.sha256(content).hexdigest()
+
+
+class HttpCache:
+    """
+    An on-disk cache of validators, body hashes and parsed data, one JSON file per URL.
+    Safe to use from multiple threads: every entry is written atomically to its own file.
+
+    Parameters:
+    cache_dir (str): Directory holding the cache entries (created if missing).
+    max_age_days (float): Entries not used for longer than this are evicted.
+    max_size_mb (float): Upper bound for the total size of the cache directory.
+    """
+
+    def __init__(self, cache_dir, max_age_days=7, max_size_mb=50):
+        self.cache_dir = cache_dir
+        self.max_age_seconds = max_age_days * 24 * 3600
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _entry_path(self, url):
+        key = hashlib.sha256(url.encode("utf8")).hexdigest()
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def lookup(self, url):
+        """
+        Returns the cached entry for a URL, or None if missing, expired or unreadable.
+
+        Parameters:
+        url (str): The cached URL.
+
+        Returns:
+        dict: The entry with keys 'url', 'etag', 'last_modified', 'body_hash', 'data', 'stored_at'.
+        """
+        path = self._entry_path(url)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age_seconds:
+                return None
+            with open(path, encoding="utf8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cache entry for {url}: {e}")
+            return None
+
+        # Guard against (very unlikely) hash collisions
+        if entry.get("url") != url:
+            return None
+        return entry
+
+    @staticmethod
+    def conditional_headers(entry):
+        """
+        Builds the conditional request headers for a cached entry.
+
+        Parameters:
+        entry (dict): A cache entry returned by lookup(), or None.
+
+        Returns:
+        dict: 'If-None-Match' / 'If-Modified-Since' headers (empty if nothing to revalidate).
+        """
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url, etag, last_modified, content_hash, data):
+        """
+        Writes (or replaces) the entry for a URL atomically.
+
+        Parameters:
+        url (str): The fetched URL.
+        etag (str): The response ETag header, if any.
+        last_modified (str): The response Last-Modified header, if any.
+        content_hash (str): Hash of the response body (see body_hash()).
+        data (dict): The data parsed from the response.
+        """
+        entry = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "body_hash": content_hash,
+            "data": data,
+            "stored_at": time.time(),
+        }
+        path = self._entry_path(url)
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write cache entry for {url}: {e}")
+
+    def touch(self, url):
+        """
+        Marks an entry as freshly used (e.g. after a 304 Not Modified response).
+
+        Parameters:
+        url (str): The cached URL.
+        """
+        try:
+            os.utime(self._entry_path(url))
+        except OSError:
+            pass
+
+    def evict(self):
+        """
+        Removes entries older than max_age_days, then the least recently used entries
+        until the cache fits in max_size_mb.
+
+        Returns:
+        int: The number of entries removed.
+        """
+        now = time.time()
+        entries = []
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            # Leftover temp files from interrupted writes are always removed
+            if name.endswith(".tmp") or now - stat.st_mtime > self.max_age_seconds:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        # Oldest (least recently used) first
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size_bytes:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+                total_size -= size
+            except OSError:
+                pass
+
+        logger.info(
+            f"HTTP cache eviction removed {removed} entries. Cache size: {total_size / 1024:.0f} KiB."
+        )
+        return removed
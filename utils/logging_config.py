@@ -1,45 +1,225 @@
 # utils/logging_config.py
+import atexit
+import json
 import logging
+import logging.handlers
 import os
+import queue
 import sys
+import time
+import uuid
 
-def setup_logging():
+# --- Logging configuration (overridable via environment variables) ---
+# Log file inside the Docker container
+LOG_FILE = os.environ.get('LOG_FILE', '/app/logs/scraper.log')
+# File log level (DEBUG adds a line per link and per pagination button)
+LOG_FILE_LEVEL = os.environ.get('LOG_FILE_LEVEL', 'INFO').upper()
+# "text" (human readable) or "json" (one object per line, for log shippers)
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text').lower()
+# Size-based rotation: the file is rotated at LOG_MAX_MB, keeping LOG_BACKUP_COUNT old files
+LOG_MAX_MB = float(os.environ.get('LOG_MAX_MB', '10'))
+LOG_BACKUP_COUNT = int(os.environ.get('LOG_BACKUP_COUNT', '5'))
+# Time-based rotation instead (e.g. "midnight" or "H"); empty keeps size-based rotation
+LOG_ROTATE_WHEN = os.environ.get('LOG_ROTATE_WHEN', '')
+
+# Correlation ID attached to every record; inherited from the environment by worker processes
+_run_id = os.environ.get('RUN_ID') or uuid.uuid4().hex[:12]
+_listener = None
+
+
+def new_run_id():
+    """
+    Starts a new correlation ID (called at the start of each run, e.g. by the daemon).
+
+    Returns:
+    str: The new run ID.
+    """
+    global _run_id
+    _run_id = uuid.uuid4().hex[:12]
+    return _run_id
+
+
+def current_run_id():
+    """
+    Returns the correlation ID of the current run.
+    """
+    return _run_id
+
+
+class RunIdFilter(logging.Filter):
+    """
+    Adds the current run ID to each record as `run_id`.
+    """
+
+    def filter(self, record):
+        record.run_id = _run_id
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats each record as a single-line JSON object.
+    """
+
+    def format(self, record):
+        entry = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(record.created)) + f'.{int(record.msecs):03d}',
+            'level': record.levelname,
+            'logger': record.name,
+            'run_id': getattr(record, 'run_id', None),
+            'thread': record.threadName,
+            'location': f'{record.pathname}:{record.lineno}',
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _LocalQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler for a listener in the same process. The message is merged with its
+    arguments on the calling thread (they may change later), but unlike the default
+    QueueHandler the exception info is kept for the listener's formatters.
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def _file_handler(log_file):
+    if LOG_ROTATE_WHEN:
+        return logging.handlers.TimedRotatingFileHandler(
+            log_file, when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUP_COUNT, encoding='utf8')
+    return logging.handlers.RotatingFileHandler(
+        log_file, maxBytes=int(LOG_MAX_MB * 1024 * 1024), backupCount=LOG_BACKUP_COUNT, encoding='utf8')
+
+
+def process_log_file(name):
+    """
+    Returns the log file of a separate process writing its own log (e.g. scraper.worker-1.log).
+    Rotating one file from several processes is unsafe, so each process gets its own.
+
+    Parameters:
+    name (str): The process name (e.g. the worker ID).
+
+    Returns:
+    str: The log file path.
+    """
+    root, ext = os.path.splitext(LOG_FILE)
+    return f'{root}.{name}{ext}'
+
+
+def setup_logging(log_file=None):
     """
     Configures the Python logging system for the application.
     Log level can be controlled via the LOG_LEVEL environment variable.
-    Logs will go to both console (stdout) and a file.
+    Logs will go to both console (stdout) and a rotating file.
+
+    The scraping threads only put records on an in-memory queue; a QueueListener thread
+    formats them and does the console and file I/O. The root logger level is the lowest
+    handler level, so disabled debug calls are dropped before a record is even created.
+
+    Parameters:
+    log_file (str): The log file (defaults to LOG_FILE). Every process must use its own file.
     """
+    global _listener
+
+    log_file = log_file or LOG_FILE
+
     log_level_str = os.environ.get('LOG_LEVEL', 'INFO').upper()
     log_level = getattr(logging, log_level_str, logging.INFO)
+    file_level = getattr(logging, LOG_FILE_LEVEL, logging.INFO)
 
-    # Define log file path
-    log_dir = "/app/logs" # Inside the Docker container
-    log_file = os.path.join(log_dir, "scraper.log")
-
-    # --- Handlers ---
+    # --- Handlers (run in the listener thread) ---
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(log_level) # Console logs can be INFO by default
-    console_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    console_handler.setFormatter(console_formatter)
 
     # File handler
-    file_handler = logging.FileHandler(log_file)
-    file_handler.setLevel(logging.DEBUG) # File logs can be more verbose (DEBUG)
-    file_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(pathname)s:%(lineno)d - %(message)s') # Added path and line number
-    file_handler.setFormatter(file_formatter)
+    os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
+    file_handler = _file_handler(log_file)
+    file_handler.setLevel(file_level)
+
+    if LOG_FORMAT == 'json':
+        console_handler.setFormatter(JsonFormatter())
+        file_handler.setFormatter(JsonFormatter())
+    else:
+        console_handler.setFormatter(logging.Formatter('%(asctime)s - %(run_id)s - %(name)s - %(levelname)s - %(message)s'))
+        file_handler.setFormatter(logging.Formatter('%(asctime)s - %(run_id)s - %(name)s - %(levelname)s - %(pathname)s:%(lineno)d - %(message)s')) # Added path and line number
 
     # --- Root Logger Configuration ---
-    # Get the root logger
     root_logger = logging.getLogger()
-    root_logger.setLevel(logging.DEBUG) # Set root logger to DEBUG to allow all messages to pass through to handlers
+    root_logger.setLevel(min(log_level, file_level))
 
     # Clear existing handlers to prevent duplicate logs if setup_logging is called multiple times
+    if _listener:
+        _listener.stop()
+    else:
+        # Flush the queue on exit so the last records (e.g. a crash) are not lost
+        atexit.register(_stop_listener)
     if root_logger.hasHandlers():
         root_logger.handlers.clear()
 
-    root_logger.addHandler(console_handler)
-    root_logger.addHandler(file_handler)
+    log_queue = queue.SimpleQueue()
+    queue_handler = _LocalQueueHandler(log_queue)
+    queue_handler.addFilter(RunIdFilter())
+    root_logger.addHandler(queue_handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+    _listener.start()
 
     logger = logging.getLogger(__name__) # Get a specific logger for this module to log the setup message
-    logger.info(f"Logging configured. Console level: {logging.getLevelName(console_handler.level)}, File level: {logging.getLevelName(file_handler.level)}. Log file: {log_file}")
\ No newline at end of file
+    logger.info(f"Logging configured. Console level: {logging.getLevelName(console_handler.level)}, File level: {logging.getLevelName(file_handler.level)}. Log file: {log_file} ({LOG_FORMAT}), run ID {_run_id}")
+
+
+def _stop_listener():
+    global _listener
+    if _listener:
+        _listener.stop()
+        _listener = None
+
+
+class _ForwardHandler(logging.Handler):
+    """
+    Hands records received from a child process to the logger they were created for,
+    so they reach this process's handlers.
+    """
+
+    def handle(self, record):
+        logging.getLogger(record.name).handle(record)
+        return True
+
+
+def start_child_log_listener(context):
+    """
+    Creates the queue that child processes send their log records through (see setup_child_logging())
+    and starts a listener thread that writes them with this process's handlers.
+
+    Parameters:
+    context (multiprocessing.context.BaseContext): The context the children are started with.
+
+    Returns:
+    tuple: (queue, QueueListener). Stop the listener once the children have exited.
+    """
+    log_queue = context.Queue()
+    listener = logging.handlers.QueueListener(log_queue, _ForwardHandler())
+    listener.start()
+    return log_queue, listener
+
+
+def setup_child_logging(log_queue, level):
+    """
+    Configures logging in a child process (e.g. a parse pool worker). Records are sent to the
+    parent through log_queue instead of opening the log file a second time.
+
+    Parameters:
+    log_queue (multiprocessing.Queue): The queue from start_child_log_listener().
+    level (int): The lowest level the parent writes.
+    """
+    root_logger = logging.getLogger()
+    root_logger.handlers.clear()
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    root_logger.setLevel(level)
@@ -0,0 +1,326 @@
+"""
+utils/metrics.py
+
+This module provides lightweight, thread-safe run instrumentation: counters, gauges and latency
+histograms with optional labels. The scraper records into the module-level `metrics` registry
+while it runs; at the end of a run the registry is written as a JSON run report and as a
+Prometheus textfile-collector file (node_exporter's --collector.textfile.directory).
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram in the Prometheus style.
+
+    Parameters:
+    buckets (tuple): Sorted bucket upper bounds (an implicit +Inf bucket is added).
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """
+        Returns the upper bound of the bucket holding the q-quantile (None if empty or +Inf).
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else None,
+            "max": round(self.max, 6),
+            "p50_le": self.quantile(0.5),
+            "p95_le": self.quantile(0.95),
+        }
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _prometheus_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Metrics:
+    """
+    Registry of counters, gauges and histograms, keyed by name and labels.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Clears all values (start of a run).
+        """
+        with self._lock:
+            self.started = time.time()
+            self._counters = {}
+            self._gauges = {}
+            self._histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        """
+        Adds to a counter (e.g. inc("errors_total", type="Timeout")).
+        """
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        """
+        Sets a gauge to the current value.
+        """
+        with self._lock:
+            self._gauges[_key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        """
+        Records one observation (usually seconds) in a histogram.
+        """
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """
+        Observes the duration of the with-block in the histogram `name`.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def counter_value(self, name, **labels):
+        """
+        Returns the current value of a counter (0 if it was never incremented).
+        """
+        with self._lock:
+            return self._counters.get(_key(name, labels), 0)
+
+    def snapshot(self):
+        """
+        Returns all values as plain data.
+
+        Returns:
+        dict: {"counters": [...], "gauges": [...], "histograms": [...]}, each entry holding
+              the metric name, its labels and its value (or histogram summary).
+        """
+        with self._lock:
+
+            def entries(values, render=lambda value: value):
+                return [
+                    {"name": name, "labels": dict(labels), "value": render(value)}
+                    for (name, labels), value in sorted(values.items())
+                ]
+
+            return {
+                "counters": entries(self._counters),
+                "gauges": entries(self._gauges),
+                "histograms": entries(self._histograms, Histogram.summary),
+            }
+
+    def dump(self):
+        """
+        Returns the raw values (including histogram buckets) as JSON-serializable data,
+        for merging into another process's registry with merge().
+
+        Returns:
+        dict: {"counters": [...], "gauges": [...], "histograms": [...]} of [name, labels, value]
+              entries.
+        """
+        with self._lock:
+            return {
+                "counters": [
+                    [name, list(labels), value]
+                    for (name, labels), value in self._counters.items()
+                ],
+                "gauges": [
+                    [name, list(labels), value]
+                    for (name, labels), value in self._gauges.items()
+                ],
+                "histograms": [
+                    [
+                        name,
+                        list(labels),
+                        {
+                            "buckets": list(histogram.buckets),
+                            "counts": histogram.counts,
+                            "sum": histogram.sum,
+                            "max": histogram.max,
+                        },
+                    ]
+                    for (name, labels), histogram in self._histograms.items()
+                ],
+            }
+
+    def merge(self, dumped):
+        """
+        Adds the values of another registry (e.g. a worker process) returned by dump().
+        Counters and histograms are summed; gauges take the merged value.
+
+        Parameters:
+        dumped (dict): The output of dump().
+        """
+        with self._lock:
+            for name, labels, value in dumped.get("counters", []):
+                key = (name, tuple(tuple(pair) for pair in labels))
+                self._counters[key] = self._counters.get(key, 0) + value
+            for name, labels, value in dumped.get("gauges", []):
+                self._gauges[(name, tuple(tuple(pair) for pair in labels))] = value
+            for name, labels, value in dumped.get("histograms", []):
+                key = (name, tuple(tuple(pair) for pair in labels))
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram(value["buckets"])
+                if list(histogram.buckets) != list(value["buckets"]):
+                    logger.warning(f"Not merging histogram {name}: different buckets.")
+                    continue
+                histogram.counts = [
+                    mine + theirs
+                    for mine, theirs in zip(histogram.counts, value["counts"])
+                ]
+                histogram.count = sum(histogram.counts)
+                histogram.sum += value["sum"]
+                histogram.max = max(histogram.max, value["max"])
+
+    def to_prometheus(self, prefix):
+        """
+        Renders all values in the Prometheus text exposition format.
+
+        Parameters:
+        prefix (str): Prepended to every metric name (e.g. "ceresne_scraper").
+
+        Returns:
+        str: The exposition text.
+        """
+        lines = []
+        with self._lock:
+            typed = set()
+
+            def declare(name, kind):
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# TYPE {name} {kind}")
+
+            for (name, labels), value in sorted(self._counters.items()):
+                declare(f"{prefix}_{name}", "counter")
+                lines.append(f"{prefix}_{name}{_prometheus_labels(labels)} {value}")
+            for (name, labels), value in sorted(self._gauges.items()):
+                declare(f"{prefix}_{name}", "gauge")
+                lines.append(f"{prefix}_{name}{_prometheus_labels(labels)} {value}")
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                full = f"{prefix}_{name}"
+                declare(full, "histogram")
+                cumulative = 0
+                for bound, count in zip(
+                    histogram.buckets + ("+Inf",), histogram.counts
+                ):
+                    cumulative += count
+                    bucket_labels = _prometheus_labels(labels, [("le", str(bound))])
+                    lines.append(f"{full}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"{full}_sum{_prometheus_labels(labels)} {histogram.sum}")
+                lines.append(
+                    f"{full}_count{_prometheus_labels(labels)} {histogram.count}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+def _write_atomically(path, text):
+    # The textfile collector may read at any moment; never expose a half-written file
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf8") as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
+
+def write_run_report(registry, report_path=None, prometheus_path=None, **summary):
+    """
+    Writes the JSON run report and/or the Prometheus textfile. Failures are logged, not raised,
+    so reporting can never fail a run.
+
+    Parameters:
+    registry (Metrics): The recorded metrics.
+    report_path (str): JSON report destination (None/empty skips it).
+    prometheus_path (str): Prometheus textfile destination, ending in ".prom" (None/empty skips it).
+    **summary: Top-level run facts for the JSON report (status, rows, ...).
+    """
+    if report_path:
+        report = {
+            "started_at": registry.started,
+            "finished_at": time.time(),
+            **summary,
+            **registry.snapshot(),
+        }
+        try:
+            _write_atomically(
+                report_path, json.dumps(report, indent=2, ensure_ascii=False)
+            )
+            logger.info(f"Run report written to {report_path}")
+        except OSError as e:
+            logger.error(f"Could not write the run report {report_path}: {e}")
+    if prometheus_path:
+        try:
+            _write_atomically(
+                prometheus_path, registry.to_prometheus("ceresne_scraper")
+            )
+            logger.info(f"Prometheus metrics written to {prometheus_path}")
+        except OSError as e:
+            logger.error(
+                f"Could not write the Prometheus metrics {prometheus_path}: {e}"
+            )
+
+
+# Registry shared by the scraper modules
+metrics = Metrics()
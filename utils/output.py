@@ -0,0 +1,202 @@
+"""
+utils/output.py
+
+This module provides a crash-safe, streaming CSV writer for the scraper output.
+Rows are appended to a temporary file as they complete. Periodically the file is fsync'd and a
+checkpoint (the durable byte offset and the URLs written so far) is atomically saved next to it.
+On success the temporary file is atomically renamed over the final output. After a crash the run
+can resume: the temporary file is truncated back to the last checkpoint and already written URLs
+are skipped.
+"""
+
+import csv
+import json
+import os
+import time
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _atomic_write_json(path, payload):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf8") as f:
+        json.dump(payload, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _fsync_directory(path):
+    # Make a rename durable; not supported on every platform, so failures are ignored
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class CheckpointedCsvWriter:
+    """
+    Streams rows into `<filename>.tmp` with periodic fsync'd checkpoints in `<filename>.checkpoint`.
+
+    Parameters:
+    filename (str): The final output path.
+    fieldnames (list): CSV column names. Each row must contain a "url" key.
+    resume (bool): If True, continue from the last checkpoint of an interrupted run.
+    checkpoint_every (int): Save a checkpoint after this many rows...
+    checkpoint_seconds (float): ...or after this many seconds, whichever comes first.
+    """
+
+    def __init__(
+        self,
+        filename,
+        fieldnames,
+        resume=False,
+        checkpoint_every=50,
+        checkpoint_seconds=10,
+    ):
+        self.filename = filename
+        self.fieldnames = fieldnames
+        self.tmp_filename = filename + ".tmp"
+        self.checkpoint_filename = filename + ".checkpoint"
+        self.checkpoint_every = max(1, int(checkpoint_every))
+        self.checkpoint_seconds = checkpoint_seconds
+
+        # URLs carried over from the interrupted run (skipped when resuming)
+        self.completed = set()
+        self.resumed_rows = 0
+        self.rows_written = 0
+
+        self._completed_order = []
+        self._uncheckpointed = 0
+        self._last_checkpoint = time.monotonic()
+
+        offset = self._load_checkpoint() if resume else None
+        if offset is None:
+            self._file = open(self.tmp_filename, "w", newline="", encoding="utf8")
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+            self._writer.writeheader()
+            self.checkpoint()
+        else:
+            # Drop rows written after the last checkpoint; they will be scraped again
+            os.truncate(self.tmp_filename, offset)
+            self._file = open(self.tmp_filename, "a", newline="", encoding="utf8")
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+            logger.info(
+                f"Resuming from checkpoint: {self.resumed_rows} rows already written to {self.tmp_filename}."
+            )
+
+    @property
+    def total_rows(self):
+        """
+        int: Rows in the output, including those carried over from a resumed run.
+        """
+        return self.resumed_rows + self.rows_written
+
+    def _load_checkpoint(self):
+        try:
+            with open(self.checkpoint_filename, encoding="utf8") as f:
+                checkpoint = json.load(f)
+            if checkpoint.get("fieldnames") != self.fieldnames:
+                logger.warning(
+                    "Checkpoint was written with different columns. Starting over."
+                )
+                return None
+            if os.path.getsize(self.tmp_filename) < checkpoint["offset"]:
+                logger.warning(
+                    "Temporary output is shorter than its checkpoint. Starting over."
+                )
+                return None
+        except FileNotFoundError:
+            logger.info("No checkpoint found. Starting a fresh run.")
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(
+                f"Could not read checkpoint {self.checkpoint_filename}: {e}. Starting over."
+            )
+            return None
+
+        self._completed_order = list(checkpoint["completed"])
+        self.completed = set(self._completed_order)
+        self.resumed_rows = len(self._completed_order)
+        return checkpoint["offset"]
+
+    def write_row(self, row):
+        """
+        Appends a row and saves a checkpoint when one is due. Not thread-safe:
+        call it from a single (writer) thread.
+
+        Parameters:
+        row (dict): The row to write.
+        """
+        self._writer.writerow(row)
+        self.rows_written += 1
+        self._completed_order.append(row["url"])
+        self._uncheckpointed += 1
+
+        if (
+            self._uncheckpointed >= self.checkpoint_every
+            or time.monotonic() - self._last_checkpoint >= self.checkpoint_seconds
+        ):
+            self.checkpoint()
+
+    def checkpoint(self):
+        """
+        Makes all rows written so far durable and records them in the checkpoint file.
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        _atomic_write_json(
+            self.checkpoint_filename,
+            {
+                "fieldnames": self.fieldnames,
+                "offset": self._file.tell(),
+                "completed": self._completed_order,
+            },
+        )
+        self._uncheckpointed = 0
+        self._last_checkpoint = time.monotonic()
+
+    def commit(self):
+        """
+        Finishes the run: makes the output durable and atomically replaces the final file.
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self.tmp_filename, self.filename)
+        _fsync_directory(self.filename)
+        if os.path.exists(self.checkpoint_filename):
+            os.remove(self.checkpoint_filename)
+        logger.info(f"Data saved to {self.filename}")
+
+    def abort(self):
+        """
+        Stops after a failure, keeping the temporary file and a final checkpoint for --resume.
+        """
+        if self._file.closed:
+            return
+        try:
+            self.checkpoint()
+        finally:
+            self._file.close()
+        logger.info(
+            f"Partial output kept in {self.tmp_filename} ({self.total_rows} rows). Rerun with --resume to continue."
+        )
+
+    def discard(self):
+        """
+        Removes the temporary file and checkpoint (e.g. when the run produced no data).
+        """
+        if not self._file.closed:
+            self._file.close()
+        for path in (self.tmp_filename, self.checkpoint_filename):
+            if os.path.exists(path):
+                os.remove(path)
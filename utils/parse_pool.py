@@ -0,0 +1,204 @@
+"""
+utils/parse_pool.py
+
+This module provides a process pool for CPU-bound HTML parsing, so parsing runs on all cores
+instead of competing with the network threads for the GIL. Parse calls are collected into
+batches (flushed when full or after a short delay) to amortize inter-process overhead, and each
+call returns a future. Log records of the worker processes are sent back to this process and written
+by its handlers. The `then` helper chains post-processing onto a result that may or may not
+be a future.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import logging
+
+from utils.logging_config import setup_child_logging, start_child_log_listener
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _run_batch(func, batch):
+    # Runs in a worker process; failures are returned per item so one bad page can't fail the batch
+    results = []
+    for args in batch:
+        started = time.perf_counter()
+        try:
+            ok, value = True, func(*args)
+        except Exception as e:
+            ok, value = False, e
+        results.append((ok, value, time.perf_counter() - started))
+    return results
+
+
+def then(value, func):
+    """
+    Applies func to a value, or to the result of a future once it is done.
+
+    Parameters:
+    value: A plain value or a concurrent.futures.Future.
+    func (callable): Called with the (resolved) value.
+
+    Returns:
+    The result of func, or a Future of it if value is a future.
+    """
+    if not isinstance(value, Future):
+        return func(value)
+
+    chained = Future()
+
+    def _done(future):
+        try:
+            chained.set_result(func(future.result()))
+        except Exception as e:
+            chained.set_exception(e)
+
+    value.add_done_callback(_done)
+    return chained
+
+
+class ParsePool:
+    """
+    Batching front end of a ProcessPoolExecutor for one parse function.
+
+    Parameters:
+    func (callable): Module-level (picklable) parse function.
+    processes (int): Number of worker processes (None = number of CPUs).
+    batch_size (int): Calls sent to a worker process together.
+    max_delay (float): Seconds a partial batch may wait for more calls before it is sent.
+    """
+
+    def __init__(self, func, processes=None, batch_size=8, max_delay=0.02):
+        self.func = func
+        self.batch_size = max(1, int(batch_size))
+        self.max_delay = max_delay
+        self.processes = processes or os.cpu_count() or 1
+        # "spawn": forking a process that already runs network threads can deadlock the child
+        context = multiprocessing.get_context("spawn")
+        self._log_queue, self._log_listener = start_child_log_listener(context)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=context,
+            initializer=setup_child_logging,
+            initargs=(self._log_queue, logging.getLogger().getEffectiveLevel()),
+        )
+
+        self.submitted = 0
+        self.batches_sent = 0
+        self._in_flight = 0
+
+        self._lock = threading.Condition()
+        self._batch = []  # [(args, future)]
+        self._batch_started = None
+        self._closed = False
+        self._flusher = threading.Thread(
+            target=self._flush_loop, name="parse-pool-flusher", daemon=True
+        )
+        self._flusher.start()
+
+    @property
+    def queued(self):
+        """
+        int: Calls waiting to be sent to a worker process.
+        """
+        with self._lock:
+            return len(self._batch)
+
+    @property
+    def in_flight(self):
+        """
+        int: Calls sent to worker processes and not finished yet.
+        """
+        with self._lock:
+            return self._in_flight
+
+    def submit(self, *args):
+        """
+        Schedules func(*args) in a worker process. Thread-safe.
+
+        Returns:
+        concurrent.futures.Future: The result of the call.
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The parse pool is closed.")
+            self._batch.append((args, future))
+            self.submitted += 1
+            if len(self._batch) == 1:
+                self._batch_started = time.monotonic()
+                self._lock.notify()
+            if len(self._batch) >= self.batch_size:
+                self._send_locked()
+        return future
+
+    def _send_locked(self):
+        batch, self._batch = self._batch, []
+        self._batch_started = None
+        if not batch:
+            return
+        self._in_flight += len(batch)
+        self.batches_sent += 1
+        futures = [future for _, future in batch]
+        try:
+            batch_future = self._executor.submit(
+                _run_batch, self.func, [args for args, _ in batch]
+            )
+        except Exception as e:
+            self._in_flight -= len(batch)
+            for future in futures:
+                future.set_exception(e)
+            return
+        batch_future.add_done_callback(lambda done: self._deliver(done, futures))
+
+    def _deliver(self, batch_future, futures):
+        with self._lock:
+            self._in_flight -= len(futures)
+        try:
+            results = batch_future.result()
+        except Exception as e:  # e.g. a worker process died
+            for future in futures:
+                future.set_exception(e)
+            return
+        for future, (ok, value, seconds) in zip(futures, results):
+            metrics.observe("parse_seconds", seconds, mode="process")
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def _flush_loop(self):
+        # Sends partial batches once they have waited max_delay
+        with self._lock:
+            while not self._closed:
+                if self._batch_started is None:
+                    self._lock.wait()
+                    continue
+                remaining = self._batch_started + self.max_delay - time.monotonic()
+                if remaining > 0:
+                    self._lock.wait(remaining)
+                    continue
+                self._send_locked()
+
+    def close(self):
+        """
+        Sends any partial batch, waits for running parses and shuts the worker processes down.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._send_locked()
+            self._closed = True
+            self._lock.notify_all()
+        self._flusher.join()
+        self._executor.shutdown(wait=True)
+        self._log_listener.stop()
+        logger.info(
+            f"Parse pool closed: {self.submitted} pages parsed in {self.batches_sent} batches "
+            f"by {self.processes} processes."
+        )
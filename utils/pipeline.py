@@ -0,0 +1,245 @@
+"""
+utils/pipeline.py
+
+This module provides a streaming producer/consumer pipeline for the scraper.
+The producer (listing discovery, e.g. Selenium pagination) runs in the calling thread and feeds
+URLs into a bounded queue as soon as each page yields them. A pool of worker threads fetches and
+parses the URLs, and a single writer thread emits finished rows in discovery order.
+The bounded queue provides backpressure, and any error in one stage shuts the others down cleanly.
+A worker may return a future instead of a row (e.g. when parsing is handed to a process pool);
+the writer then waits for it in discovery order, so the worker is free to fetch the next URL.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import logging
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Sentinel telling a stage that no more items will arrive
+_STOP = object()
+
+
+class PipelineAborted(Exception):
+    """
+    Raised inside the producer when another stage failed and the pipeline is shutting down.
+    """
+
+
+class StreamingPipeline:
+    """
+    Overlaps URL discovery, detail processing and output writing.
+
+    Parameters:
+    process (callable): Called with a URL in a worker thread. Returns a row (dict), None,
+                        or a concurrent.futures.Future of either.
+    write_row (callable): Called with each row from the writer thread, in discovery order.
+    workers (int): Number of worker threads running `process`.
+    queue_size (int): Maximum number of URLs waiting for a worker (backpressure on the producer).
+    report_seconds (float): Interval for logging the stage queue depths (0 disables it).
+    extra_depths (dict): Optional {name: callable} reporting the depth of additional stages
+                         (e.g. a parse pool), included in stage_depths().
+    """
+
+    def __init__(
+        self,
+        process,
+        write_row,
+        workers=8,
+        queue_size=64,
+        report_seconds=30,
+        extra_depths=None,
+    ):
+        self.process = process
+        self.write_row = write_row
+        self.workers = max(1, int(workers))
+        self.queue_size = max(1, int(queue_size))
+        self.report_seconds = report_seconds
+        self.extra_depths = extra_depths or {}
+
+        self.urls_queued = 0
+        self.rows_written = 0
+        self.failed_urls = 0
+        # The URLs that produced no row, in discovery order
+        self.failed_links = []
+
+        self._tasks = None
+        self._results = None
+        self._reorder_buffer = {}
+        self._failed = threading.Event()
+        self._writer_error = None
+        self._last_report = 0.0
+
+    def stage_depths(self):
+        """
+        Returns the current number of items waiting in each stage, for sizing the stages.
+
+        Returns:
+        dict: 'fetch_queue' (URLs waiting for a worker), any extra stages, 'write_queue'
+              (finished items waiting for the writer) and 'reorder_buffer' (items held back
+              until all earlier ones are written).
+        """
+        depths = {"fetch_queue": self._tasks.qsize() if self._tasks else 0}
+        for name, depth in self.extra_depths.items():
+            depths[name] = depth()
+        depths["write_queue"] = self._results.qsize() if self._results else 0
+        depths["reorder_buffer"] = len(self._reorder_buffer)
+        return depths
+
+    def _maybe_report(self):
+        if not self.report_seconds:
+            return
+        now = time.monotonic()
+        if now - self._last_report >= self.report_seconds:
+            self._last_report = now
+            depths = ", ".join(f"{k} {v}" for k, v in self.stage_depths().items())
+            logger.info(
+                f"Pipeline stage depths: {depths} ({self.rows_written} rows written)"
+            )
+
+    def _resolve(self, seq, row):
+        if not isinstance(row, Future):
+            return row
+        try:
+            return row.result()
+        except Exception as e:
+            metrics.inc("errors_total", type=type(e).__name__)
+            logger.error(
+                f"Unexpected error while finishing item {seq}: {e}", exc_info=True
+            )
+            return None
+
+    def _put_task(self, item):
+        # Block while the queue is full, but wake up regularly to notice failures elsewhere
+        while True:
+            if self._failed.is_set():
+                raise PipelineAborted("Pipeline stopped because another stage failed.")
+            try:
+                self._tasks.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _work(self):
+        while True:
+            item = self._tasks.get()
+            if item is _STOP:
+                return
+            seq, url = item
+            if self._failed.is_set():
+                # Drain remaining work without processing it
+                continue
+            try:
+                row = self.process(url)
+            except Exception as e:
+                metrics.inc("errors_total", type=type(e).__name__)
+                logger.error(
+                    f"Unexpected error while processing {url}: {e}", exc_info=True
+                )
+                row = None
+            self._results.put((seq, url, row))
+
+    def _write(self):
+        # Rows can finish out of order; hold them back until all earlier ones are written
+        pending = self._reorder_buffer
+        next_seq = 0
+        while True:
+            item = self._results.get()
+            if item is _STOP:
+                return
+            if self._writer_error:
+                continue
+            seq, url, row = item
+            pending[seq] = (url, row)
+            while next_seq in pending:
+                url, row = pending.pop(next_seq)
+                row = self._resolve(next_seq, row)
+                next_seq += 1
+                if row is None:
+                    self.failed_urls += 1
+                    self.failed_links.append(url)
+                    continue
+                try:
+                    self.write_row(row)
+                    self.rows_written += 1
+                except Exception as e:
+                    logger.critical(f"Error writing output row: {e}", exc_info=True)
+                    self._writer_error = e
+                    self._failed.set()
+                    break
+            self._maybe_report()
+
+    def run(self, batches):
+        """
+        Runs the pipeline until the producer is exhausted and all rows are written.
+
+        Parameters:
+        batches (iterable): Yields lists of URLs (for example one list per listing page).
+                            Consumed in the calling thread; closed if the pipeline fails.
+
+        Returns:
+        int: The number of rows written.
+
+        Raises:
+        Exception: The first error raised by the producer or the writer.
+        """
+        self._tasks = queue.Queue(maxsize=self.queue_size)
+        self._results = queue.Queue()
+        self._reorder_buffer.clear()
+        self.failed_links = []
+        self._failed.clear()
+        self._writer_error = None
+        self._last_report = time.monotonic()
+
+        worker_threads = [
+            threading.Thread(
+                target=self._work, name=f"pipeline-worker-{i}", daemon=True
+            )
+            for i in range(self.workers)
+        ]
+        writer_thread = threading.Thread(
+            target=self._write, name="pipeline-writer", daemon=True
+        )
+        for thread in worker_threads:
+            thread.start()
+        writer_thread.start()
+
+        producer_error = None
+        try:
+            for batch in batches:
+                for url in batch:
+                    self._put_task((self.urls_queued, url))
+                    self.urls_queued += 1
+        except PipelineAborted:
+            logger.error("Stopping listing discovery because the pipeline failed.")
+        except BaseException as e:
+            # Links already queued are still processed and written, so no finished work is lost
+            producer_error = e
+        finally:
+            # Let the producer release its resources (e.g. quit the browser)
+            close = getattr(batches, "close", None)
+            if close:
+                close()
+            # Workers consume tasks until they see a sentinel, so these puts cannot deadlock
+            for _ in worker_threads:
+                self._tasks.put(_STOP)
+            for thread in worker_threads:
+                thread.join()
+            self._results.put(_STOP)
+            writer_thread.join()
+
+        if producer_error:
+            raise producer_error
+        if self._writer_error:
+            raise self._writer_error
+
+        logger.info(
+            f"Pipeline finished: {self.urls_queued} URLs queued, {self.rows_written} rows written, "
+            f"{self.failed_urls} failed."
+        )
+        return self.rows_written
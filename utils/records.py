@@ -0,0 +1,302 @@
+"""
+utils/records.py
+
+This module provides the typed record of one flat. The detail page extractors collect raw text fields;
+FlatRecord.from_raw() parses them once, at scrape time: prices become integer cents, areas fixed-point
+hundredths of a square metre, floor and rooms integers and the status a FlatStatus. Values that can't be
+parsed are logged with their URL and counted (parse_failures_total) where they are scraped, instead of
+being coerced to NaN downstream. Their text is kept and written to the CSV unchanged, and so is the status
+wording, so typing loses nothing the page showed.
+
+Records use __slots__, so a run holding many of them (the pipeline's reorder buffer, coordinator results)
+stays small. They convert to CSV rows (the scraper's column names and number formats), to typed JSON
+dicts (HTTP cache, state store, work queue) and, in batches, to column arrays (Parquet snapshots).
+"""
+
+import csv
+import dataclasses
+import enum
+import re
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Optional
+
+import logging
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_INT_PATTERN = re.compile(r"-?\d+")
+
+
+class FlatStatus(enum.Enum):
+    """
+    Sales status of a flat. Values are the site's wording in its base form; the CSV keeps the
+    wording of the page (FlatRecord.status_text).
+    """
+
+    AVAILABLE = "voľný"
+    RESERVED = "rezervovaný"
+    SOLD = "predaný"
+
+    @classmethod
+    def parse(cls, text):
+        """
+        Parses the status text of a detail page ("Voľný", "rezervované", ...).
+
+        Returns:
+        FlatStatus: The status, or None if the text isn't a known status.
+        """
+        text = text.strip().lower()
+        for prefix, status in _STATUS_PREFIXES:
+            if text.startswith(prefix):
+                return status
+        return None
+
+
+# Matched by prefix, so grammatical gender and number ("voľná", "predané") don't matter
+_STATUS_PREFIXES = (
+    ("voľn", FlatStatus.AVAILABLE),
+    ("rezerv", FlatStatus.RESERVED),
+    ("predan", FlatStatus.SOLD),
+)
+
+
+def parse_fixed(text, places=2):
+    """
+    Parses a scraped number such as "55,3", "123456" or "123 456,50" into a fixed-point integer.
+
+    Parameters:
+    text (str): The scraped text (units such as "m²" or "€" must already be stripped).
+    places (int): Decimal places kept (2: "55,3" -> 5530). Further digits are rounded half up.
+
+    Returns:
+    int: The number times 10**places, or None if the text isn't a number.
+    """
+    cleaned = text.replace("\xa0", "").replace(" ", "").replace(",", ".")
+    try:
+        number = Decimal(cleaned)
+    except InvalidOperation:
+        return None
+    if not number.is_finite():
+        return None
+    return int(number.scaleb(places).to_integral_value(ROUND_HALF_UP))
+
+
+def parse_int(text):
+    """
+    Parses a scraped integer such as "3". Text that merely starts with a number ("4+kk", "2,5")
+    is not an integer; it isn't truncated.
+
+    Returns:
+    int: The integer, or None if the text isn't one.
+    """
+    text = text.strip()
+    return int(text) if _INT_PATTERN.fullmatch(text) else None
+
+
+def format_fixed(value, places=2):
+    """
+    Formats a fixed-point integer with a decimal comma and without trailing zeros
+    (5530 -> "55,3", 5900 -> "59"), as the CSV has always shown numbers.
+
+    Returns:
+    str: The formatted number, or "" for None.
+    """
+    if value is None:
+        return ""
+    sign = "-" if value < 0 else ""
+    whole, fraction = divmod(abs(value), 10**places)
+    fraction = str(fraction).rjust(places, "0").rstrip("0")
+    return f"{sign}{whole},{fraction}" if fraction else f"{sign}{whole}"
+
+
+def format_cents(value):
+    """
+    Formats a price in cents as whole euros ("123456") or with two decimals ("123456,50").
+
+    Returns:
+    str: The formatted price, or "" for None.
+    """
+    if value is None:
+        return ""
+    sign = "-" if value < 0 else ""
+    euros, cents = divmod(abs(value), 100)
+    return f"{sign}{euros},{cents:02d}" if cents else f"{sign}{euros}"
+
+
+# (record attribute, CSV column, parser) for every CSV field; None parsers keep the text
+_FIELDS = (
+    ("url", "url", None),
+    ("stage", "stage", None),
+    ("apartment_number", "apartment number", None),
+    ("floor", "floor", parse_int),
+    ("total_area", "total area", parse_fixed),
+    ("rooms", "rooms", parse_int),
+    ("internal_area", "internal area", parse_fixed),
+    ("external_area", "external area", parse_fixed),
+    ("status", "status", FlatStatus.parse),
+    ("price_cents", "price with VAT", parse_fixed),
+    ("discounted_price_cents", "discounted price", parse_fixed),
+)
+# Formatters of the typed CSV columns (text columns are written as they are)
+_FORMATTERS = {
+    "total_area": format_fixed,
+    "internal_area": format_fixed,
+    "external_area": format_fixed,
+    "price_cents": format_cents,
+    "discounted_price_cents": format_cents,
+}
+
+# Column names of the scraper CSV, in order
+CSV_FIELDNAMES = [column for _, column, _ in _FIELDS]
+# Record attributes besides the typed fields: the status as scraped, and the texts of values
+# that couldn't be parsed ({CSV column: text}, None when every value parsed)
+_TEXT_SLOTS = ("status_text", "unparsed")
+
+
+@dataclasses.dataclass
+class FlatRecord:
+    """
+    The typed details of one flat. Areas are in hundredths of m² and prices in cents;
+    fields missing on the page, or whose text couldn't be parsed, are None.
+    """
+
+    __slots__ = tuple(name for name, _, _ in _FIELDS) + _TEXT_SLOTS
+
+    url: str
+    stage: Optional[str]
+    apartment_number: Optional[str]
+    floor: Optional[int]
+    total_area: Optional[int]
+    rooms: Optional[int]
+    internal_area: Optional[int]
+    external_area: Optional[int]
+    status: Optional[FlatStatus]
+    price_cents: Optional[int]
+    discounted_price_cents: Optional[int]
+    status_text: Optional[str]
+    unparsed: Optional[dict]
+
+    @classmethod
+    def from_raw(cls, raw, report=True):
+        """
+        Builds a record from raw text fields keyed by CSV column (extractor output or a CSV row).
+        Values that can't be parsed are reported and stored as None, with their text kept in
+        `unparsed`. A status that isn't a known FlatStatus is reported too; its text is kept
+        in `status_text` like every status.
+
+        Parameters:
+        raw (dict): {CSV column: text or None}.
+        report (bool): Whether to log and count unparsed values (False when re-reading
+                       output that was reported when it was scraped).
+
+        Returns:
+        FlatRecord: The parsed record.
+        """
+        url = raw.get("url") or ""
+        values = {"status_text": None, "unparsed": None}
+        for name, column, parser in _FIELDS:
+            text = raw.get(column)
+            text = text.strip() if isinstance(text, str) else text
+            if not text:
+                values[name] = None
+            elif parser is None:
+                values[name] = text
+            else:
+                values[name] = parser(text)
+                if name == "status":
+                    values["status_text"] = text
+                if values[name] is None and report:
+                    logger.warning(
+                        "Could not parse %s %r on %s; keeping the text",
+                        column,
+                        text,
+                        url,
+                    )
+                    metrics.inc("parse_failures_total", field=name)
+                if values[name] is None and name != "status":
+                    values["unparsed"] = {**(values["unparsed"] or {}), column: text}
+        values["url"] = url
+        return cls(**values)
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Builds a record from to_dict() output. Raw text dicts stored by earlier versions
+        (keyed by CSV column) are parsed with from_raw().
+
+        Parameters:
+        data (dict): The stored dict.
+
+        Returns:
+        FlatRecord: The record.
+        """
+        if "apartment number" in data or "price with VAT" in data:
+            return cls.from_raw(data)
+        values = {name: data.get(name) for name in cls.__slots__}
+        if values["status"] is not None:
+            values["status"] = FlatStatus(values["status"])
+            values["status_text"] = values["status_text"] or values["status"].value
+        return cls(**values)
+
+    def to_dict(self):
+        """
+        Returns the record as a JSON-serializable dict of typed values.
+        """
+        data = {name: getattr(self, name) for name in self.__slots__}
+        if self.status is not None:
+            data["status"] = self.status.value
+        return data
+
+    def to_row(self):
+        """
+        Returns the record as a CSV row (decimal commas, whole euros without decimals).
+        Unparsed values and the status are written as scraped.
+        """
+        unparsed = self.unparsed or {}
+        row = {}
+        for name, column, _ in _FIELDS:
+            value = getattr(self, name)
+            if column in unparsed:
+                row[column] = unparsed[column]
+            elif name == "status":
+                row[column] = self.status_text or ""
+            elif name in _FORMATTERS:
+                row[column] = _FORMATTERS[name](value)
+            else:
+                row[column] = "" if value is None else str(value)
+        return row
+
+
+def read_csv_records(path):
+    """
+    Reads the records back from a CSV written with to_row(), one row at a time.
+
+    Parameters:
+    path (str): The CSV file.
+
+    Yields:
+    FlatRecord: The record of each row, in file order.
+    """
+    with open(path, newline="", encoding="utf8") as f:
+        for row in csv.DictReader(f):
+            yield FlatRecord.from_raw(row, report=False)
+
+
+def to_columns(records):
+    """
+    Batches records into column arrays.
+
+    Parameters:
+    records (iterable): FlatRecord objects.
+
+    Returns:
+    dict: {attribute name: list of values}, in FlatRecord field order.
+    """
+    columns = {name: [] for name in FlatRecord.__slots__}
+    appends = [(name, columns[name].append) for name in FlatRecord.__slots__]
+    for record in records:
+        for name, append in appends:
+            append(getattr(record, name))
+    return columns
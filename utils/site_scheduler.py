@@ -0,0 +1,114 @@
+"""
+utils/site_scheduler.py
+
+This module runs the crawls of several sites concurrently in one process. Each site keeps its own
+rate limits, output and state, while the crawls share one HTTP session whose requests in flight are
+capped by a global connection budget, the HTTP cache and the browser pool. Adding a site then costs
+little extra wall-clock time, as most of a crawl is spent waiting on the network or the rate limit.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import logging
+
+from utils.fetcher import make_session
+
+logger = logging.getLogger(__name__)
+
+
+class SharedResources:
+    """
+    What concurrent site crawls share.
+
+    Parameters:
+    headers (dict): Default headers of the shared HTTP session.
+    max_connections (int): Global connection budget: requests in flight across all sites.
+    cache (HttpCache): Optional HTTP cache (entries are keyed by URL, so sites don't collide).
+    driver_pool (DriverPool): Optional pool of browsers lent to the sites' Selenium discovery.
+    hosts (int): Number of hosts the session keeps connection pools for.
+    """
+
+    def __init__(
+        self, headers=None, max_connections=16, cache=None, driver_pool=None, hosts=10
+    ):
+        self.max_connections = max(1, int(max_connections))
+        self.session = make_session(headers, self.max_connections, hosts=hosts)
+        self.connection_budget = threading.BoundedSemaphore(self.max_connections)
+        self.cache = cache
+        self.driver_pool = driver_pool
+
+    def close(self):
+        """
+        Closes the shared session (the cache and the driver pool belong to the caller).
+        """
+        self.session.close()
+
+
+class SiteScheduler:
+    """
+    Runs one crawl per site, at most `max_parallel` at a time. A site that fails doesn't
+    stop the others.
+
+    Parameters:
+    run_site (callable): Called with a SiteAdapter in a scheduler thread; returns the site's
+                         run summary (a dict with at least "status").
+    max_parallel (int): Maximum number of sites crawled at the same time.
+    """
+
+    def __init__(self, run_site, max_parallel=4):
+        self.run_site = run_site
+        self.max_parallel = max(1, int(max_parallel))
+
+    def _run_one(self, site):
+        logger.info(f"Site {site.name}: crawl started.")
+        started = time.perf_counter()
+        try:
+            summary = dict(self.run_site(site) or {})
+        except Exception as e:
+            logger.error(f"Site {site.name}: crawl failed: {e}", exc_info=True)
+            summary = {"status": "failed", "error": str(e)}
+        summary["duration_seconds"] = round(time.perf_counter() - started, 3)
+        logger.info(f"Site {site.name}: crawl finished: {summary}")
+        return summary
+
+    def run(self, sites):
+        """
+        Crawls the sites and waits for all of them.
+
+        Parameters:
+        sites (list): SiteAdapter objects.
+
+        Returns:
+        dict: {site name: run summary}, in the order of `sites`.
+        """
+        workers = min(self.max_parallel, len(sites)) or 1
+        logger.info(
+            f"Crawling {len(sites)} sites, {workers} at a time: "
+            f"{', '.join(site.name for site in sites)}"
+        )
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="site"
+        ) as executor:
+            futures = [
+                (site.name, executor.submit(self._run_one, site)) for site in sites
+            ]
+            return {name: future.result() for name, future in futures}
+
+
+def overall_status(summaries):
+    """
+    Combines per-site statuses: "failed" if any site failed, "success" if any site wrote rows,
+    otherwise "empty".
+
+    Parameters:
+    summaries (dict): {site name: run summary}.
+
+    Returns:
+    str: The combined status.
+    """
+    statuses = {summary.get("status") for summary in summaries.values()}
+    if "failed" in statuses or not statuses:
+        return "failed"
+    return "success" if "success" in statuses else "empty"
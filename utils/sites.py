@@ -0,0 +1,166 @@
+"""
+utils/sites.py
+
+This module defines the interface of a crawled developer site (SiteAdapter) and the registry of known
+sites. An adapter covers what differs between sites: how the listing is discovered, how a detail page is
+extracted and how the extracted fields map to the common record (utils/records.py). Everything else
+(fetching, caching, state, output, change log) is shared by the scraper.
+
+Adapters register themselves with register_site() when their module is imported. The ceresne.sk adapter
+lives in scraper.py; further adapters can live in their own modules, listed in SITE_MODULES.
+"""
+
+import importlib
+import os
+
+import logging
+
+from utils.records import FlatRecord
+
+logger = logging.getLogger(__name__)
+
+# Site whose files keep their configured paths (see site_path())
+DEFAULT_SITE = "ceresne"
+
+_SITES = {}
+
+
+class SiteAdapter:
+    """
+    Base class of a site adapter. Subclasses set the attributes below and implement
+    iter_link_batches() and extract().
+
+    Attributes:
+    name (str): Short identifier used in SITES, file names and logs.
+    base_url (str): Base URL of the site.
+    list_url (str): URL of the listing page.
+    output_filename (str): CSV written for this site.
+    requests_per_second (float): Request rate for this site (None: REQUESTS_PER_SECOND).
+    per_host_concurrency (int): Requests in flight per host (None: PER_HOST_CONCURRENCY).
+    """
+
+    name = None
+    base_url = None
+    list_url = None
+    output_filename = None
+    requests_per_second = None
+    per_host_concurrency = None
+
+    def iter_link_batches(self, fetcher, summaries=None, timer=None, driver_pool=None):
+        """
+        Discovers the listing.
+
+        Parameters:
+        fetcher (PoliteFetcher): The site's fetcher (rate limited, shared connection budget).
+        summaries (dict): Optional dict to fill with {url: listing-table row text}; a changed
+                          summary makes the state store re-fetch the detail page.
+        timer (StartupTimer): Optional startup timer.
+        driver_pool (DriverPool): Optional pool of browsers shared between sites.
+
+        Yields:
+        list: Flat detail URLs, in discovery order.
+
+        Returns:
+        bool: False if discovery stopped before the end of the listing, so flats it didn't reach
+              aren't reported as delisted. Any other value means the listing was covered.
+        """
+        raise NotImplementedError
+
+    def extract(self, html, url):
+        """
+        Extracts the raw fields of a detail page. Runs in a parse process when PARSE_PROCESSES
+        is set, so the adapter must be picklable.
+
+        Parameters:
+        html (str): The HTML of the detail page.
+        url (str): The URL of the page.
+
+        Returns:
+        dict: Raw text values keyed by the CSV columns (utils.records.CSV_FIELDNAMES).
+        """
+        raise NotImplementedError
+
+    def to_record(self, raw):
+        """
+        Maps the extracted fields to a typed record. Override it for sites whose values need
+        translating first (e.g. a different status wording).
+
+        Parameters:
+        raw (dict): The output of extract().
+
+        Returns:
+        FlatRecord: The typed record.
+        """
+        return FlatRecord.from_raw(raw)
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.name}>"
+
+
+def register_site(adapter):
+    """
+    Adds a site adapter to the registry (replacing one with the same name).
+
+    Parameters:
+    adapter (SiteAdapter): The adapter.
+
+    Returns:
+    SiteAdapter: The adapter, so modules can write `SITE = register_site(MySite())`.
+    """
+    if not adapter.name:
+        raise ValueError(f"Site adapter {adapter!r} has no name.")
+    _SITES[adapter.name] = adapter
+    return adapter
+
+
+def load_site_modules(modules):
+    """
+    Imports the modules that register additional site adapters.
+
+    Parameters:
+    modules (str): Comma-separated module names (e.g. "sites.other_developer").
+    """
+    for module in filter(None, (m.strip() for m in modules.split(","))):
+        importlib.import_module(module)
+
+
+def get_sites(names):
+    """
+    Looks up registered sites by name.
+
+    Parameters:
+    names (str): Comma-separated site names.
+
+    Returns:
+    list: The SiteAdapter objects, in the given order.
+
+    Raises:
+    ValueError: If a name is not registered.
+    """
+    sites = []
+    for name in filter(None, (n.strip() for n in names.split(","))):
+        if name not in _SITES:
+            raise ValueError(
+                f"Unknown site {name!r} (registered: {', '.join(sorted(_SITES))})."
+            )
+        sites.append(_SITES[name])
+    return sites
+
+
+def site_path(path, name):
+    """
+    Returns the per-site variant of a configured file or directory path. The default site keeps
+    the configured path, so single-site setups are unchanged; other sites get their name inserted
+    before the extension (listing_state.sqlite3 -> listing_state.<name>.sqlite3).
+
+    Parameters:
+    path (str): The configured path ("" when the feature is disabled, which stays "").
+    name (str): The site name.
+
+    Returns:
+    str: The path to use for the site.
+    """
+    if not path or name == DEFAULT_SITE:
+        return path
+    root, ext = os.path.splitext(path.rstrip(os.sep))
+    return f"{root}.{name}{ext}"
@@ -0,0 +1,157 @@
+"""
+utils/snapshots.py
+
+This module writes typed, compressed Parquet snapshots of the scraped data, partitioned by scrape date
+(hive style: <snapshot_dir>/scrape_date=YYYY-MM-DD/flats.parquet). Numbers are typed by the record model
+(utils/records.py) as at scrape time, so downstream tools can load, memory-map and column-prune the data
+instead of re-parsing CSV text. pyarrow is optional: without it snapshots are skipped. It is imported on
+first use, so importing this module stays cheap for runs that never reach the snapshot step.
+"""
+
+import datetime
+import os
+import re
+
+import logging
+
+from utils.records import to_columns
+
+logger = logging.getLogger(__name__)
+
+_FLAT_ID_PATTERN = re.compile(r"byt/(\d+)/")
+
+# Records converted to columns at a time (one Parquet row group each), bounding memory
+SNAPSHOT_BATCH_ROWS = 10000
+
+# Stable snapshot schema (column names match the dashboard's snake_case names).
+# The scrape date itself is the partition key in the directory name, not a column.
+SNAPSHOT_COLUMNS = [
+    ("scraped_at", "timestamp"),
+    ("flat_id", "string"),
+    ("url", "string"),
+    ("stage", "string"),
+    ("apartment_number", "string"),
+    ("floor", "int"),
+    ("total_area", "float"),
+    ("rooms", "int"),
+    ("internal_area", "float"),
+    ("external_area", "float"),
+    ("status", "category"),
+    ("price_with_vat", "float"),
+    ("discounted_price", "float"),
+]
+
+
+def _import_pyarrow():
+    # pyarrow is optional for the scraper and slow to import
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def snapshot_schema():
+    """
+    Returns the Arrow schema of the snapshot files.
+
+    Returns:
+    pyarrow.Schema: The snapshot schema.
+    """
+    import pyarrow as pa
+
+    types = {
+        "timestamp": pa.timestamp("s"),
+        "string": pa.string(),
+        "int": pa.int16(),
+        "float": pa.float64(),
+        "category": pa.dictionary(pa.int8(), pa.string()),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in SNAPSHOT_COLUMNS])
+
+
+def _hundredths(values):
+    return [None if value is None else value / 100 for value in values]
+
+
+def _typed_columns(records, scraped_at):
+    typed = to_columns(records)
+    flat_ids = [_FLAT_ID_PATTERN.search(url) for url in typed["url"]]
+    return {
+        "scraped_at": [scraped_at] * len(flat_ids),
+        "flat_id": [match.group(1) if match else None for match in flat_ids],
+        "url": typed["url"],
+        "stage": typed["stage"],
+        "apartment_number": typed["apartment_number"],
+        "floor": typed["floor"],
+        "total_area": _hundredths(typed["total_area"]),
+        "rooms": typed["rooms"],
+        "internal_area": _hundredths(typed["internal_area"]),
+        "external_area": _hundredths(typed["external_area"]),
+        # Statuses that aren't a known FlatStatus keep their scraped text
+        "status": [
+            status.value if status else text
+            for status, text in zip(typed["status"], typed["status_text"])
+        ],
+        "price_with_vat": _hundredths(typed["price_cents"]),
+        "discounted_price": _hundredths(typed["discounted_price_cents"]),
+    }
+
+
+def _batches(records, size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def write_snapshot(records, snapshot_dir, scraped_at=None):
+    """
+    Writes the records of a run as a typed Parquet snapshot for its scrape date.
+    A snapshot written earlier on the same day is replaced atomically. Records are
+    consumed in batches of SNAPSHOT_BATCH_ROWS, so they can be streamed (e.g. from the CSV).
+
+    Parameters:
+    records (iterable): The FlatRecord objects of the run, in output order.
+    snapshot_dir (str): Root directory of the date-partitioned snapshots.
+    scraped_at (datetime.datetime): Scrape time (defaults to now).
+
+    Returns:
+    str: The path of the written snapshot, or None if pyarrow is not installed.
+    """
+    pa = _import_pyarrow()
+    if pa is None:
+        logger.warning("pyarrow is not installed; skipping the Parquet snapshot.")
+        return None
+
+    scraped_at = (scraped_at or datetime.datetime.now()).replace(microsecond=0)
+    schema = snapshot_schema()
+
+    partition_dir = os.path.join(
+        snapshot_dir, f"scrape_date={scraped_at.date().isoformat()}"
+    )
+    os.makedirs(partition_dir, exist_ok=True)
+    path = os.path.join(partition_dir, "flats.parquet")
+    tmp_path = path + ".tmp"
+    rows = 0
+    try:
+        with pa.parquet.ParquetWriter(tmp_path, schema, compression="zstd") as writer:
+            for batch in _batches(records, SNAPSHOT_BATCH_ROWS):
+                table = pa.Table.from_pydict(
+                    _typed_columns(batch, scraped_at), schema=schema
+                )
+                writer.write_table(table)
+                rows += table.num_rows
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+
+    logger.info(f"Parquet snapshot with {rows} rows saved to {path}")
+    return path
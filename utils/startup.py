@@ -0,0 +1,63 @@
+"""
+utils/startup.py
+
+This module provides a small phase timer for the scraper's cold start (imports, setup, driver
+resolution, browser launch, ...). Phases are marked as they complete and logged as a single
+breakdown line once the first detail request can start.
+"""
+
+import time
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """
+    Records the duration of consecutive startup phases.
+
+    Parameters:
+    started (float): time.perf_counter() value at process start (defaults to now).
+    """
+
+    def __init__(self, started=None):
+        self.started = started if started is not None else time.perf_counter()
+        self.phases = []
+        self.reported = False
+        self._last = self.started
+
+    def mark(self, phase):
+        """
+        Ends the current phase.
+
+        Parameters:
+        phase (str): Name of the phase that just finished (e.g. "imports").
+        """
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    @property
+    def elapsed(self):
+        """
+        float: Seconds since process start.
+        """
+        return time.perf_counter() - self.started
+
+    def report(self, milestone="first request"):
+        """
+        Logs the phase breakdown (once).
+
+        Parameters:
+        milestone (str): What the total time measures up to.
+        """
+        if self.reported:
+            return
+        self.reported = True
+        breakdown = ", ".join(
+            f"{phase} {seconds:.2f}s" for phase, seconds in self.phases
+        )
+        logger.info(
+            f"Startup timing: {breakdown} (total {self.elapsed:.2f}s to {milestone})"
+        )
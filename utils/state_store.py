@@ -0,0 +1,222 @@
+"""
+utils/state_store.py
+
+This module provides a persistent SQLite store of every listing the scraper has seen.
+For each flat (keyed by the numeric ID in its detail URL) it records when it was first and last seen,
+when its detail page was last fetched, a hash of its listing-table summary row, a hash of the extracted
+fields and the extracted fields themselves. The scraper uses it to only fetch detail pages for new,
+changed or stale listings.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+FLAT_ID_PATTERN = re.compile(r"byt/(\d+)/")
+
+
+def flat_id_from_url(url):
+    """
+    Returns the flat ID from a detail URL (e.g. ".../byt/123/..." -> "123"), or the URL itself
+    if it doesn't contain one.
+
+    Parameters:
+    url (str): The flat detail URL.
+
+    Returns:
+    str: The flat ID.
+    """
+    match = FLAT_ID_PATTERN.search(url)
+    return match.group(1) if match else url
+
+
+def text_hash(text):
+    """
+    Returns a hash of a piece of text with whitespace normalized, or None for missing text.
+
+    Parameters:
+    text (str): The text (e.g. the listing-table row of a flat).
+
+    Returns:
+    str: Hex SHA-1 digest, or None.
+    """
+    if text is None:
+        return None
+    return hashlib.sha1(" ".join(text.split()).encode("utf8")).hexdigest()
+
+
+def record_hash(data):
+    """
+    Returns a stable hash of an extracted record.
+
+    Parameters:
+    data (dict): The extracted fields.
+
+    Returns:
+    str: Hex SHA-1 digest of the record.
+    """
+    payload = json.dumps(data, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf8")).hexdigest()
+
+
+class ListingStateStore:
+    """
+    SQLite-backed listing state, safe to share between threads.
+
+    Parameters:
+    db_path (str): Path of the SQLite database file (created if missing).
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS listings (
+                flat_id TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                last_fetched REAL,
+                summary_hash TEXT,
+                content_hash TEXT,
+                data TEXT
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, flat_id):
+        """
+        Returns the stored state of a listing.
+
+        Parameters:
+        flat_id (str): The flat ID.
+
+        Returns:
+        dict: The stored row (with 'data' decoded), or None if the flat was never seen.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM listings WHERE flat_id = ?", (flat_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        state = dict(row)
+        state["data"] = json.loads(state["data"]) if state["data"] else None
+        return state
+
+    @staticmethod
+    def fetch_reason(state, summary_hash, max_age_seconds, now=None):
+        """
+        Decides whether a listing's detail page must be fetched.
+
+        Parameters:
+        state (dict): The stored state from get(), or None.
+        summary_hash (str): Hash of the current summary row, or None if unknown.
+        max_age_seconds (float): Stored data older than this is refreshed.
+        now (float): Current timestamp (defaults to time.time()).
+
+        Returns:
+        str: Why the page must be fetched ("new", "changed", "stale", "incomplete"),
+             or None if the stored data can be reused.
+        """
+        now = now or time.time()
+        if state is None:
+            return "new"
+        if not state["data"] or not state["last_fetched"]:
+            return "incomplete"
+        if (
+            summary_hash
+            and state["summary_hash"]
+            and summary_hash != state["summary_hash"]
+        ):
+            return "changed"
+        if now - state["last_fetched"] > max_age_seconds:
+            return "stale"
+        return None
+
+    def mark_seen(self, flat_id, url, summary_hash=None, now=None):
+        """
+        Updates the last-seen time of a listing whose stored data is reused.
+
+        Parameters:
+        flat_id (str): The flat ID.
+        url (str): The flat detail URL.
+        summary_hash (str): Hash of the current summary row; stored only if the listing has none yet,
+                            so later changes of the row are detected.
+        now (float): Current timestamp (defaults to time.time()).
+        """
+        now = now or time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                UPDATE listings SET last_seen = ?, url = ?,
+                    summary_hash = COALESCE(summary_hash, ?)
+                WHERE flat_id = ?
+                """,
+                (now, url, summary_hash, flat_id),
+            )
+            self._conn.commit()
+
+    def record(self, flat_id, url, summary_hash, data, now=None):
+        """
+        Stores freshly extracted data for a listing.
+
+        Parameters:
+        flat_id (str): The flat ID.
+        url (str): The flat detail URL.
+        summary_hash (str): Hash of the current summary row, or None if unknown.
+        data (dict): The extracted fields.
+        now (float): Current timestamp (defaults to time.time()).
+        """
+        now = now or time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO listings (flat_id, url, first_seen, last_seen, last_fetched,
+                                      summary_hash, content_hash, data)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(flat_id) DO UPDATE SET
+                    url = excluded.url,
+                    last_seen = excluded.last_seen,
+                    last_fetched = excluded.last_fetched,
+                    summary_hash = COALESCE(excluded.summary_hash, listings.summary_hash),
+                    content_hash = excluded.content_hash,
+                    data = excluded.data
+                """,
+                (
+                    flat_id,
+                    url,
+                    now,
+                    now,
+                    now,
+                    summary_hash,
+                    record_hash(data),
+                    json.dumps(data, ensure_ascii=False),
+                ),
+            )
+            self._conn.commit()
+
+    def close(self):
+        """
+        Closes the database connection.
+        """
+        with self._lock:
+            self._conn.close()
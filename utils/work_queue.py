@@ -0,0 +1,273 @@
+"""
+utils/work_queue.py
+
+This module provides a durable, SQLite-backed work queue for the coordinator/worker mode.
+The coordinator enqueues discovered flat URLs (keeping their discovery order); worker processes
+lease batches, process them and report each result. A lease expires after a fixed time, so the
+work of a crashed worker is handed out again. Failed URLs are retried up to a maximum number of
+attempts. Only the standard library is needed, and any process that can open the database file
+can act as a worker.
+"""
+
+import json
+import os
+import sqlite3
+import time
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+class WorkQueue:
+    """
+    Durable queue of URLs with leases.
+
+    Parameters:
+    db_path (str): Path of the SQLite database file (created if missing).
+    max_attempts (int): A URL whose processing failed this many times is marked failed.
+    """
+
+    def __init__(self, db_path, max_attempts=3):
+        self.db_path = db_path
+        self.max_attempts = max(1, int(max_attempts))
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Autocommit mode; writes that must be atomic use explicit BEGIN IMMEDIATE transactions
+        self._conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS tasks (
+                url TEXT PRIMARY KEY,
+                seq INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                lease_owner TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                summary TEXT,
+                result TEXT,
+                error TEXT
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS tasks_status_seq ON tasks (status, seq)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+
+    def reset(self):
+        """
+        Removes all tasks and flags (start of a fresh run).
+        """
+        self._conn.execute("BEGIN IMMEDIATE")
+        self._conn.execute("DELETE FROM tasks")
+        self._conn.execute("DELETE FROM meta")
+        self._conn.execute("COMMIT")
+
+    def enqueue(self, urls, summaries=None):
+        """
+        Adds URLs to the queue in order. URLs already queued (e.g. when resuming) are ignored.
+
+        Parameters:
+        urls (list): The URLs to add.
+        summaries (dict): Optional {url: listing-table row text}, handed to the worker with the URL.
+
+        Returns:
+        int: Number of URLs added.
+        """
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            next_seq = self._conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) + 1 FROM tasks"
+            ).fetchone()[0]
+            summaries = summaries or {}
+            added = 0
+            for url in urls:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO tasks (url, seq, status, summary) VALUES (?, ?, ?, ?)",
+                    (url, next_seq + added, PENDING, summaries.get(url)),
+                )
+                added += cursor.rowcount
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def set_flag(self, key, value=True):
+        """
+        Stores a run flag (e.g. "discovery_done").
+        """
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            (key, json.dumps(value)),
+        )
+
+    def get_flag(self, key, default=None):
+        """
+        Reads a run flag.
+        """
+        row = self._conn.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def save_metrics(self, owner, dumped):
+        """
+        Stores a worker's metrics (Metrics.dump()), replacing what it stored before.
+        """
+        self.set_flag(f"metrics:{owner}", dumped)
+
+    def worker_metrics(self):
+        """
+        Returns the metrics stored by the workers.
+
+        Returns:
+        list: The Metrics.dump() values, one per worker.
+        """
+        return [
+            json.loads(value)
+            for (value,) in self._conn.execute(
+                "SELECT value FROM meta WHERE key LIKE 'metrics:%' ORDER BY key"
+            )
+        ]
+
+    def clear_metrics(self):
+        """
+        Removes the stored worker metrics (start of a resumed run; reset() removes them too).
+        """
+        self._conn.execute("DELETE FROM meta WHERE key LIKE 'metrics:%'")
+
+    def lease(self, owner, batch_size=10, lease_seconds=300, now=None):
+        """
+        Leases up to batch_size pending URLs (or URLs whose lease expired) to a worker.
+
+        Parameters:
+        owner (str): Worker identifier.
+        batch_size (int): Maximum number of URLs to lease.
+        lease_seconds (float): How long the worker may take before the URLs are handed out again.
+        now (float): Current timestamp (defaults to time.time()).
+
+        Returns:
+        list: (url, summary) pairs in discovery order (empty if there is nothing to do right now).
+        """
+        now = now or time.time()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            tasks = self._conn.execute(
+                """
+                SELECT url, summary FROM tasks
+                WHERE status = ? OR (status = ? AND lease_expires < ?)
+                ORDER BY seq
+                LIMIT ?
+                """,
+                (PENDING, LEASED, now, batch_size),
+            ).fetchall()
+            self._conn.executemany(
+                """
+                UPDATE tasks SET status = ?, lease_owner = ?, lease_expires = ?
+                WHERE url = ?
+                """,
+                [(LEASED, owner, now + lease_seconds, url) for url, _ in tasks],
+            )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        return tasks
+
+    def complete(self, url, row):
+        """
+        Stores the result of a URL.
+
+        Parameters:
+        url (str): The processed URL.
+        row (dict): The extracted row.
+        """
+        self._conn.execute(
+            """
+            UPDATE tasks SET status = ?, result = ?, lease_owner = NULL, lease_expires = NULL
+            WHERE url = ? AND status != ?
+            """,
+            (DONE, json.dumps(row, ensure_ascii=False), url, DONE),
+        )
+
+    def fail(self, url, error):
+        """
+        Records a failed attempt. The URL is retried until max_attempts is reached.
+
+        Parameters:
+        url (str): The URL that could not be processed.
+        error (str): Description of the failure.
+        """
+        self._conn.execute(
+            """
+            UPDATE tasks
+            SET attempts = attempts + 1,
+                status = CASE WHEN attempts + 1 >= ? THEN ? ELSE ? END,
+                error = ?, lease_owner = NULL, lease_expires = NULL
+            WHERE url = ? AND status != ?
+            """,
+            (self.max_attempts, FAILED, PENDING, error, url, DONE),
+        )
+
+    def counts(self):
+        """
+        Returns the number of tasks per status.
+
+        Returns:
+        dict: {status: count} for pending, leased, done and failed.
+        """
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        for status, count in self._conn.execute(
+            "SELECT status, COUNT(*) FROM tasks GROUP BY status"
+        ):
+            counts[status] = count
+        return counts
+
+    def remaining(self):
+        """
+        Returns the number of tasks that are not finished (pending or leased).
+        """
+        counts = self.counts()
+        return counts[PENDING] + counts[LEASED]
+
+    def iter_results(self):
+        """
+        Yields the stored rows of finished URLs in discovery order.
+
+        Yields:
+        dict: The extracted row.
+        """
+        for (result,) in self._conn.execute(
+            "SELECT result FROM tasks WHERE status = ? ORDER BY seq", (DONE,)
+        ):
+            yield json.loads(result)
+
+    def failed(self):
+        """
+        Returns the URLs that were given up on, with their last error.
+
+        Returns:
+        list: (url, error) pairs in discovery order.
+        """
+        return self._conn.execute(
+            "SELECT url, error FROM tasks WHERE status = ? ORDER BY seq", (FAILED,)
+        ).fetchall()
+
+    def close(self):
+        """
+        Closes the database connection.
+        """
+        self._conn.close()
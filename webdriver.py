@@ -6,27 +6,270 @@ with a focus on headless operation and compatibility with environments such as W
 It includes functions to create a Chrome WebDriver instance with recommended options for stability and performance,
 as well as a utility to properly quit the driver. The configuration supports custom Chrome binary locations and
 extended timeouts for demanding web scraping tasks. Logging is integrated for easier debugging and monitoring.
+An opt-in lean profile (CHROME_LEAN_PROFILE=1) blocks non-essential resources and third-party hosts through the
+DevTools protocol, uses an eager page-load strategy and disables background services to cut bandwidth and memory.
 """
 
+import json
+import os
+import shutil
+import time
+from collections import Counter
+
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.chrome.service import Service as ChromeDriverService
+from selenium.common.exceptions import SessionNotCreatedException, WebDriverException
 
 # from selenium.webdriver.remote.remote_connection import RemoteConnection
-from webdriver_manager.chrome import ChromeDriverManager
 
 import logging
 
+from utils.metrics import metrics
+
 # --- Configuration (Chrome)---
 # IMPORTANT: Replace with the actual path to your Chrome executable.
 # Author's specific case: Chrome is installed directly in the WSL distribution
 CHROME_BINARY_PATH = "/usr/bin/google-chrome"
 
+# --- Chromedriver resolution (no network unless every local option fails) ---
+# Pinned driver (the Dockerfile installs the version matching Chrome here)
+CHROMEDRIVER_PATH = os.environ.get("CHROMEDRIVER_PATH", "/usr/local/bin/chromedriver")
+# Remembers the driver downloaded by webdriver-manager so later runs skip its version lookups
+CHROMEDRIVER_CACHE_FILE = os.environ.get(
+    "CHROMEDRIVER_CACHE_FILE",
+    os.path.join(os.path.expanduser("~"), ".cache", "ceresne-scraper", "chromedriver"),
+)
+# Allow downloading a driver with webdriver-manager as a last resort ("0" = offline only)
+CHROMEDRIVER_DOWNLOAD = os.environ.get("CHROMEDRIVER_DOWNLOAD", "1") == "1"
+
+# --- Lean profile (overridable via environment variables) ---
+# Opt-in: block non-essential resources, load pages eagerly and disable background services
+CHROME_LEAN_PROFILE = os.environ.get("CHROME_LEAN_PROFILE", "0") == "1"
+# Page-load strategy of the lean profile: "eager" (DOM ready) or "none" (return immediately).
+# The scraper waits explicitly for the listing rows, so it doesn't need images or subresources.
+CHROME_PAGE_LOAD_STRATEGY = os.environ.get("CHROME_PAGE_LOAD_STRATEGY", "eager")
+# Resource types blocked by the lean profile (comma-separated): image, media, font, stylesheet
+CHROME_BLOCKED_RESOURCES = os.environ.get(
+    "CHROME_BLOCKED_RESOURCES", "image,media,font"
+)
+# Third-party hosts blocked by the lean profile (comma-separated; subdomains included)
+CHROME_BLOCKED_HOSTS = os.environ.get(
+    "CHROME_BLOCKED_HOSTS",
+    "googletagmanager.com,google-analytics.com,doubleclick.net,googlesyndication.com,"
+    "googleadservices.com,facebook.net,facebook.com,hotjar.com,"
+    "clarity.ms,youtube.com,ytimg.com,fonts.googleapis.com,fonts.gstatic.com,"
+    "maps.googleapis.com,cookiebot.com,smartlook.com",
+)
+
+# File extensions per blockable resource type
+RESOURCE_EXTENSIONS = {
+    "image": ["png", "jpg", "jpeg", "gif", "webp", "svg", "ico", "avif"],
+    "media": ["mp4", "webm", "mp3", "ogg", "m3u8"],
+    "font": ["woff", "woff2", "ttf", "otf", "eot"],
+    "stylesheet": ["css"],
+}
+
+# Chrome background services that only cost CPU, memory and bandwidth in a scraper
+LEAN_CHROME_ARGUMENTS = [
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-client-side-phishing-detection",
+    "--disable-domain-reliability",
+    "--disable-breakpad",
+    "--disable-hang-monitor",
+    "--disable-ipc-flooding-protection",
+    "--disable-popup-blocking",
+    "--disable-prompt-on-repost",
+    "--metrics-recording-only",
+    "--mute-audio",
+    "--no-default-browser-check",
+    "--no-first-run",
+    "--no-pings",
+    "--disable-features=Translate,OptimizationHints,MediaRouter,BackForwardCache,"
+    "InterestFeedContentSuggestions,CalculateNativeWinOcclusion,AutofillServerCommunication",
+    # One renderer process is enough for a single tab
+    "--renderer-process-limit=1",
+]
+
 # Get a logger for the current module. The name will automatically be 'webdriver'
 logger = logging.getLogger(__name__)
 
 
-def get_chrome_driver(headless=True, browser_timeout_seconds=240):
+def blocked_url_patterns(resource_types, hosts):
+    """
+    Builds the Network.setBlockedURLs patterns for the given resource types and hosts.
+
+    Parameters:
+    resource_types (list): Resource types to block (keys of RESOURCE_EXTENSIONS).
+    hosts (list): Third-party hosts to block, including their subdomains.
+
+    Returns:
+    list: URL wildcard patterns.
+    """
+    patterns = []
+    for resource_type in resource_types:
+        if resource_type not in RESOURCE_EXTENSIONS:
+            logger.warning(f"Unknown resource type '{resource_type}' is not blocked.")
+            continue
+        # Anchored to the end of the path: "*.css*" would also block e.g. /x.css-loader/page.html
+        for extension in RESOURCE_EXTENSIONS[resource_type]:
+            patterns.extend([f"*.{extension}", f"*.{extension}?*"])
+    for host in hosts:
+        patterns.extend([f"*://{host}/*", f"*://*.{host}/*"])
+    return patterns
+
+
+def _split_setting(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+class NetworkStats:
+    """
+    Network totals of one run of a Chrome session, read from its performance log.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.bytes_received = 0
+        self.blocked = Counter()
+        self.bytes_by_type = Counter()
+        self._types = {}
+
+    def consume(self, entries):
+        """
+        Adds Network events from driver.get_log("performance") entries.
+
+        Parameters:
+        entries (list): The performance log entries.
+        """
+        for entry in entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            method = message.get("method")
+            params = message.get("params", {})
+            if method == "Network.requestWillBeSent":
+                self.requests += 1
+                self._types[params.get("requestId")] = params.get("type", "Other")
+            elif method == "Network.loadingFinished":
+                size = int(params.get("encodedDataLength", 0))
+                self.bytes_received += size
+                self.bytes_by_type[
+                    self._types.get(params.get("requestId"), "Other")
+                ] += size
+            elif method == "Network.loadingFailed" and params.get("blockedReason"):
+                self.blocked[params.get("type", "Other")] += 1
+
+    def summary(self):
+        """
+        Returns a one-line summary for the log.
+        """
+        blocked = ", ".join(
+            f"{kind} {count}" for kind, count in self.blocked.most_common()
+        )
+        return (
+            f"{self.requests} requests, {sum(self.blocked.values())} blocked ({blocked or 'none'}), "
+            f"{self.bytes_received / 1024:.0f} KB received"
+        )
+
+
+def _apply_lean_profile(options):
+    options.page_load_strategy = CHROME_PAGE_LOAD_STRATEGY
+    for argument in LEAN_CHROME_ARGUMENTS:
+        options.add_argument(argument)
+    options.add_experimental_option(
+        "prefs",
+        {
+            "profile.default_content_setting_values.notifications": 2,
+            "profile.default_content_setting_values.geolocation": 2,
+        },
+    )
+    # Network events (requests, bytes, blocked requests) for the per-run report
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+
+def _block_resources(driver):
+    patterns = blocked_url_patterns(
+        _split_setting(CHROME_BLOCKED_RESOURCES), _split_setting(CHROME_BLOCKED_HOSTS)
+    )
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    logger.info(
+        f"Lean profile: blocking {CHROME_BLOCKED_RESOURCES or 'no resource types'} and "
+        f"{len(_split_setting(CHROME_BLOCKED_HOSTS))} third-party hosts "
+        f"(page load strategy '{CHROME_PAGE_LOAD_STRATEGY}')."
+    )
+
+
+def _is_executable(path):
+    return bool(path) and os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+def _cached_chromedriver():
+    try:
+        with open(CHROMEDRIVER_CACHE_FILE, encoding="utf8") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _download_chromedriver():
+    # webdriver-manager does network version lookups, so it is only imported when needed
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    path = ChromeDriverManager().install()
+    try:
+        os.makedirs(os.path.dirname(CHROMEDRIVER_CACHE_FILE), exist_ok=True)
+        with open(CHROMEDRIVER_CACHE_FILE, "w", encoding="utf8") as f:
+            f.write(path)
+    except OSError as e:
+        logger.warning(f"Could not remember the chromedriver path: {e}")
+    return path
+
+
+def resolve_chromedriver(allow_download=None):
+    """
+    Finds a chromedriver executable, preferring local copies so no network access is needed:
+    the pinned CHROMEDRIVER_PATH, a chromedriver on PATH, then the path cached by a previous
+    download. Only if none exists is a driver downloaded with webdriver-manager.
+
+    Parameters:
+    allow_download (bool): Whether the download fallback may be used.
+                           Defaults to CHROMEDRIVER_DOWNLOAD.
+
+    Returns:
+    tuple: (path, source) where source is "pinned", "path", "cache" or "download".
+
+    Raises:
+    FileNotFoundError: If no local driver exists and downloading is not allowed.
+    """
+    allow_download = CHROMEDRIVER_DOWNLOAD if allow_download is None else allow_download
+    for source, path in (
+        ("pinned", CHROMEDRIVER_PATH),
+        ("path", shutil.which("chromedriver")),
+        ("cache", _cached_chromedriver()),
+    ):
+        if _is_executable(path):
+            return path, source
+
+    if not allow_download:
+        raise FileNotFoundError(
+            f"No chromedriver found at {CHROMEDRIVER_PATH}, on PATH or in {CHROMEDRIVER_CACHE_FILE}, "
+            "and CHROMEDRIVER_DOWNLOAD is disabled."
+        )
+    logger.info(
+        "No local chromedriver found. Downloading one with webdriver-manager..."
+    )
+    return _download_chromedriver(), "download"
+
+
+def get_chrome_driver(
+    headless=True, browser_timeout_seconds=240, lean=None, timer=None
+):
     """
     Initializes and returns a configured Chrome WebDriver instance.
 
@@ -35,10 +278,14 @@ def get_chrome_driver(headless=True, browser_timeout_seconds=240):
                         Defaults to True for performance.
     browser_timeout_seconds (int): Timeout in seconds for page loads and script execution.
                                     Defaults to 240 seconds (4 minutes).
+    lean (bool): If True, use the lean profile (blocked resources, eager page loads,
+                 no background services). Defaults to CHROME_LEAN_PROFILE.
+    timer (StartupTimer): Optional timer; marks the driver resolution and browser launch phases.
 
     Returns:
         selenium.webdriver.Chrome: The initialized Chrome WebDriver object.
     """
+    lean = CHROME_LEAN_PROFILE if lean is None else lean
     logger.info("Setting up Chrome WebDriver...")
 
     options = ChromeOptions()
@@ -77,19 +324,106 @@ def get_chrome_driver(headless=True, browser_timeout_seconds=240):
     else:
         logger.info("Running Chrome with GUI.")
 
-    service = ChromeDriverService(ChromeDriverManager().install())
+    if lean:
+        _apply_lean_profile(options)
+
+    started = time.perf_counter()
+    driver_path, source = resolve_chromedriver()
+    logger.info(
+        f"Using chromedriver {driver_path} ({source}, resolved in {time.perf_counter() - started:.2f}s)."
+    )
+    if timer:
+        timer.mark("driver resolution")
 
-    driver = webdriver.Chrome(service=service, options=options)
+    try:
+        driver = webdriver.Chrome(
+            service=ChromeDriverService(driver_path), options=options
+        )
+    except SessionNotCreatedException as e:
+        # Typically a local driver that no longer matches the installed Chrome version
+        if source == "download" or not CHROMEDRIVER_DOWNLOAD:
+            raise
+        logger.warning(
+            f"Chromedriver {driver_path} could not start Chrome ({e.msg}). Downloading a matching driver..."
+        )
+        driver = webdriver.Chrome(
+            service=ChromeDriverService(_download_chromedriver()), options=options
+        )
+    if timer:
+        timer.mark("browser launch")
+    _instrument_driver(driver)
+    driver.network_stats = None
+    if lean:
+        # With an eager page-load strategy callers wait explicitly for the elements they need
+        driver.set_page_load_timeout(browser_timeout_seconds)
+        driver.set_script_timeout(browser_timeout_seconds)
+        try:
+            _block_resources(driver)
+            driver.network_stats = NetworkStats()
+        except WebDriverException as e:
+            logger.warning(f"Could not enable resource blocking: {e}")
     logger.info("Chrome WebDriver initialized.")
 
     return driver
 
 
+def _instrument_driver(driver):
+    """
+    Counts every WebDriver protocol call (navigation, scripts, element lookups, wait polls)
+    and its duration by command in the run metrics.
+
+    Parameters:
+    driver (selenium.webdriver.Chrome): The WebDriver object.
+    """
+    execute = driver.execute
+
+    def counted_execute(driver_command, params=None):
+        started = time.perf_counter()
+        try:
+            return execute(driver_command, params)
+        finally:
+            metrics.inc("webdriver_calls_total", command=driver_command)
+            metrics.inc(
+                "webdriver_call_seconds_total",
+                time.perf_counter() - started,
+                command=driver_command,
+            )
+
+    driver.execute = counted_execute
+
+
+def report_network_stats(driver):
+    """
+    Drains the performance log of a lean-profile session and logs the network totals since the
+    last report (requests, blocked requests, bytes received), so a reused driver reports each
+    run separately. The next report starts from zero.
+
+    Parameters:
+    driver (selenium.webdriver.Chrome): The WebDriver object.
+
+    Returns:
+    NetworkStats: The totals, or None if the driver doesn't use the lean profile.
+    """
+    stats = getattr(driver, "network_stats", None)
+    if stats is None:
+        return None
+    try:
+        stats.consume(driver.get_log("performance"))
+    except WebDriverException as e:
+        logger.debug(f"Could not read the performance log: {e}")
+    driver.network_stats = NetworkStats()
+    # Nothing happened since the last report (e.g. a pooled driver quit after its last run)
+    if stats.requests or stats.blocked:
+        logger.info(f"Chrome network usage: {stats.summary()}")
+    return stats
+
+
 def quit_driver(driver):
     """
-    Quits the WebDriver.
+    Quits the WebDriver (logging the unreported network totals of a lean-profile session first).
     """
     if driver:
+        report_network_stats(driver)
         driver.quit()
         logger.info("WebDriver quit successfully.")
 